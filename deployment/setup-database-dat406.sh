@@ -168,6 +168,7 @@ DAT406 Workshop - Product Data Loader
 Loads products with Bedrock Titan embeddings into PostgreSQL
 """
 
+import asyncio
 import os
 import sys
 import time
@@ -204,11 +205,16 @@ DB_CONFIG = {
 
 AWS_REGION = os.getenv('AWS_REGION', 'us-west-2')
 DATA_FILE = sys.argv[1] if len(sys.argv) > 1 else None
+BACKEND_DIR = sys.argv[2] if len(sys.argv) > 2 else None
 
 if not DATA_FILE or not os.path.exists(DATA_FILE):
     print("❌ Data file not provided or doesn't exist")
     sys.exit(1)
 
+if not BACKEND_DIR or not os.path.isdir(BACKEND_DIR):
+    print("❌ Lab 2 backend directory not provided or doesn't exist")
+    sys.exit(1)
+
 # Validate database config
 if not all(DB_CONFIG.values()):
     print("❌ Missing database configuration")
@@ -347,51 +353,57 @@ with conn.cursor() as cur:
     cur.execute("TRUNCATE TABLE bedrock_integration.product_catalog CASCADE;")
     conn.commit()
 
-# Insert products in batches
-print(f"\n📝 Inserting {len(df)} products...")
-total_inserted = 0
-failed_inserts = 0
+# Stream products through the backend's DatabaseService.copy_rows (binary
+# COPY, one round trip instead of one per row)
+print(f"\n📝 Copying {len(df)} products...")
+sys.path.insert(0, BACKEND_DIR)
+from services.database import DatabaseService
+
+COPY_COLUMNS = [
+    "productId", "product_description", "imgurl", "producturl", "stars",
+    "reviews", "price", "category_id", "isbestseller", "boughtinlastmonth",
+    "category_name", "quantity", "embedding",
+]
+
+def product_rows(pbar):
+    for row in df.itertuples(index=False):
+        yield (
+            row.productId,
+            str(row.product_description),
+            str(row.imgurl),
+            str(row.producturl),
+            round(float(row.stars), 2),
+            int(row.reviews),
+            round(float(row.price), 2),
+            int(row.category_id),
+            bool(row.isbestseller),
+            int(row.boughtinlastmonth),
+            str(row.category_name),
+            int(row.quantity),
+            row.embedding,
+        )
+        pbar.update(1)
 
-with tqdm(total=len(df), desc="Inserting products") as pbar:
-    for i in range(0, len(df), BATCH_SIZE):
-        batch = df.iloc[i:i+BATCH_SIZE]
-        
-        with conn.cursor() as cur:
-            for _, row in batch.iterrows():
-                try:
-                    cur.execute('''
-                        INSERT INTO bedrock_integration.product_catalog 
-                        ("productId", product_description, imgurl, producturl, 
-                         stars, reviews, price, category_id, isbestseller,
-                         boughtinlastmonth, category_name, quantity, embedding)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ''', (
-                        row['productId'],
-                        str(row['product_description']),
-                        str(row['imgurl']),
-                        str(row['producturl']),
-                        float(row['stars']),
-                        int(row['reviews']),
-                        float(row['price']),
-                        int(row['category_id']),
-                        bool(row['isbestseller']),
-                        int(row['boughtinlastmonth']),
-                        str(row['category_name']),
-                        int(row['quantity']),
-                        row['embedding']
-                    ))
-                    total_inserted += 1
-                except Exception as e:
-                    failed_inserts += 1
-                    if failed_inserts <= 5:
-                        print(f"\n⚠️  Insert error: {str(e)[:100]}")
-        
-        conn.commit()
-        pbar.update(len(batch))
+async def copy_products() -> int:
+    db = DatabaseService()
+    await db.connect()
+    try:
+        with tqdm(total=len(df), desc="Copying products") as pbar:
+            return await db.copy_rows(
+                "bedrock_integration.product_catalog",
+                COPY_COLUMNS,
+                product_rows(pbar),
+            )
+    finally:
+        await db.disconnect()
+
+try:
+    total_inserted = asyncio.run(copy_products())
+except Exception as e:
+    print(f"\n❌ COPY failed: {str(e)[:200]}")
+    sys.exit(1)
 
 print(f"\n✅ Inserted {total_inserted} products")
-if failed_inserts > 0:
-    print(f"⚠️  Failed inserts: {failed_inserts}")
 
 # Create indexes
 print("\n🔍 Creating search indexes...")
@@ -422,6 +434,58 @@ with conn.cursor() as cur:
         USING GIN (product_description gin_trgm_ops);
     """)
     
+    # Trending leaderboard: partial expression index matching the
+    # get_trending_products predicate, so top-N is an ordered index read
+    print("  Creating trending leaderboard index...")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_product_trending 
+        ON bedrock_integration.product_catalog
+        ((reviews * stars) DESC, stars DESC)
+        WHERE quantity > 0 AND stars >= 4.0 AND reviews > 50;
+    """)
+    
+    # Low / out-of-stock lists: partial indexes ordered by demand, so
+    # inventory pages are keyset index reads at any catalog size. Only narrow
+    # columns are INCLUDEd (counts stay index-only); descriptions and URLs
+    # would push tuples past the btree row size limit, and are read from
+    # the heap for the page rows only
+
+    print("  Creating low-stock and out-of-stock indexes...")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_product_low_stock 
+        ON bedrock_integration.product_catalog (reviews DESC, "productId" DESC)
+        INCLUDE (quantity, stars, price, category_name)
+        WHERE quantity < 10;
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_product_out_of_stock 
+        ON bedrock_integration.product_catalog (reviews DESC, "productId" DESC)
+        INCLUDE (quantity, stars, price, category_name)
+        WHERE quantity = 0;
+    """)
+    
+    # Product listing: keyset order (reviews, productId) with the range
+    # filters as trailing key columns, checked inside the index; category
+    # listings get their own equality-prefixed copy
+    print("  Creating product listing indexes...")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_product_listing 
+        ON bedrock_integration.product_catalog (reviews DESC, "productId" DESC, stars, price);
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_product_listing_category 
+        ON bedrock_integration.product_catalog (category_name, reviews DESC, "productId" DESC, stars, price);
+    """)
+    
+    # Category browse: best-rated in-stock products per category as an
+    # ordered index read (terms are resolved to categories in the app)
+    print("  Creating category browse index...")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_product_category_browse 
+        ON bedrock_integration.product_catalog (category_name, stars DESC, reviews DESC)
+        WHERE quantity > 0;
+    """)
+    
     conn.commit()
 
 print("✅ Indexes created")
@@ -465,13 +529,639 @@ PYTHON_LOADER
 
 # Run the loader
 log "Running data loader (this will take 5-10 minutes)..."
-if python3 /tmp/load_products_dat406.py "$DATA_FILE"; then
+if python3 /tmp/load_products_dat406.py "$DATA_FILE" "$REPO_DIR/lab2/backend"; then
     log "✅ Product data loaded successfully"
     rm -f /tmp/load_products_dat406.py
 else
     error "Failed to load product data"
 fi
 
+# ============================================================================
+# CREATE CATALOG AGGREGATES
+# ============================================================================
+
+log "==================== Creating Catalog Aggregates ===================="
+
+log "Creating incrementally maintained inventory and price aggregates..."
+PGPASSWORD="$DB_PASSWORD" psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" \
+    -v ON_ERROR_STOP=1 << 'SQL_AGGREGATES'
+-- Category lookups used when refreshing per-category aggregates
+CREATE INDEX IF NOT EXISTS idx_product_category_name
+    ON bedrock_integration.product_catalog (category_name);
+
+-- Earlier setups kept catalog_aggregates as a single-row table
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'bedrock_integration' AND c.relname = 'catalog_aggregates' AND c.relkind = 'r'
+    ) THEN
+        DROP TABLE bedrock_integration.catalog_aggregates;
+    END IF;
+END;
+$$;
+
+-- Stock-band deltas, sharded by backend so concurrent writers update
+-- different rows instead of queueing on one row lock. Readers sum shards.
+CREATE TABLE IF NOT EXISTS bedrock_integration.catalog_aggregate_shards (
+    shard SMALLINT PRIMARY KEY,
+    total_products BIGINT NOT NULL DEFAULT 0,
+    out_of_stock BIGINT NOT NULL DEFAULT 0,
+    low_stock BIGINT NOT NULL DEFAULT 0,
+    healthy_stock BIGINT NOT NULL DEFAULT 0,
+    quantity_rows BIGINT NOT NULL DEFAULT 0,  -- rows with a quantity (AVG denominator)
+    total_quantity BIGINT NOT NULL DEFAULT 0,
+    data_version BIGINT NOT NULL DEFAULT 0,  -- bumped on every catalog write
+    price_version BIGINT NOT NULL DEFAULT 0,  -- bumped when the in-stock price set changes
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO bedrock_integration.catalog_aggregate_shards (shard)
+SELECT generate_series(0, 15)
+ON CONFLICT (shard) DO NOTHING;
+
+-- Overall in-stock price statistics. A median cannot be maintained by
+-- deltas, so this row is recomputed off the write path (see
+-- refresh_stale_price_aggregates) and records the price_version it saw.
+CREATE TABLE IF NOT EXISTS bedrock_integration.overall_price_aggregates (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    in_stock_products BIGINT NOT NULL DEFAULT 0,
+    min_price NUMERIC(10,2),
+    max_price NUMERIC(10,2),
+    avg_price NUMERIC,
+    median_price DOUBLE PRECISION,
+    price_version BIGINT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO bedrock_integration.overall_price_aggregates (id) VALUES (TRUE)
+ON CONFLICT (id) DO NOTHING;
+
+-- The one-row view the application reads
+CREATE OR REPLACE VIEW bedrock_integration.catalog_aggregates AS
+SELECT
+    s.total_products,
+    s.out_of_stock,
+    s.low_stock,
+    s.healthy_stock,
+    s.quantity_rows,
+    s.total_quantity,
+    p.in_stock_products,
+    p.min_price,
+    p.max_price,
+    p.avg_price,
+    p.median_price,
+    s.data_version,
+    s.price_version > p.price_version AS prices_stale,
+    s.refreshed_at
+FROM (
+    SELECT
+        SUM(total_products)::bigint AS total_products,
+        SUM(out_of_stock)::bigint AS out_of_stock,
+        SUM(low_stock)::bigint AS low_stock,
+        SUM(healthy_stock)::bigint AS healthy_stock,
+        SUM(quantity_rows)::bigint AS quantity_rows,
+        SUM(total_quantity)::bigint AS total_quantity,
+        SUM(data_version)::bigint AS data_version,
+        SUM(price_version)::bigint AS price_version,
+        MAX(refreshed_at) AS refreshed_at
+    FROM bedrock_integration.catalog_aggregate_shards
+) s
+CROSS JOIN bedrock_integration.overall_price_aggregates p;
+
+-- Per-category in-stock price statistics
+CREATE TABLE IF NOT EXISTS bedrock_integration.category_price_aggregates (
+    category_name VARCHAR(255) PRIMARY KEY,
+    product_count BIGINT NOT NULL,
+    min_price NUMERIC(10,2),
+    max_price NUMERIC(10,2),
+    avg_price NUMERIC,
+    median_price DOUBLE PRECISION,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_category_price_aggregates_count
+    ON bedrock_integration.category_price_aggregates (product_count DESC);
+
+-- Recompute price statistics for the given categories only. Upserts rather
+-- than delete-then-insert, so concurrent writers to the same category never
+-- collide on the primary key; rows go away only for categories left with
+-- no in-stock products.
+CREATE OR REPLACE FUNCTION bedrock_integration.refresh_category_price_aggregates(categories TEXT[])
+RETURNS VOID LANGUAGE sql AS $$
+    INSERT INTO bedrock_integration.category_price_aggregates
+        (category_name, product_count, min_price, max_price, avg_price, median_price, refreshed_at)
+    SELECT
+        category_name,
+        COUNT(*),
+        MIN(price),
+        MAX(price),
+        AVG(price),
+        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price),
+        NOW()
+    FROM bedrock_integration.product_catalog
+    WHERE quantity > 0
+      AND category_name = ANY(categories)
+    GROUP BY category_name
+    ON CONFLICT (category_name) DO UPDATE SET
+        product_count = EXCLUDED.product_count,
+        min_price = EXCLUDED.min_price,
+        max_price = EXCLUDED.max_price,
+        avg_price = EXCLUDED.avg_price,
+        median_price = EXCLUDED.median_price,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    DELETE FROM bedrock_integration.category_price_aggregates a
+    WHERE a.category_name = ANY(categories)
+      AND NOT EXISTS (
+          SELECT 1
+          FROM bedrock_integration.product_catalog p
+          WHERE p.category_name = a.category_name
+            AND p.quantity > 0
+      );
+$$;
+
+-- Recompute overall in-stock price statistics (full in-stock scan)
+CREATE OR REPLACE FUNCTION bedrock_integration.refresh_overall_price_aggregates()
+RETURNS VOID LANGUAGE sql AS $$
+    UPDATE bedrock_integration.overall_price_aggregates a
+    SET in_stock_products = s.in_stock_products,
+        min_price = s.min_price,
+        max_price = s.max_price,
+        avg_price = s.avg_price,
+        median_price = s.median_price,
+        price_version = v.price_version,
+        refreshed_at = NOW()
+    FROM (
+        -- Read the version first: writes that land during the scan leave
+        -- the row stale rather than marked fresh
+        SELECT SUM(price_version)::bigint AS price_version
+        FROM bedrock_integration.catalog_aggregate_shards
+    ) v,
+    LATERAL (
+        SELECT
+            COUNT(*) AS in_stock_products,
+            MIN(price) AS min_price,
+            MAX(price) AS max_price,
+            AVG(price) AS avg_price,
+            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price) AS median_price
+        FROM bedrock_integration.product_catalog
+        WHERE quantity > 0
+    ) s
+    WHERE a.id;
+$$;
+
+-- Deferred refresh, called after writes by the application (coalesced) or
+-- on a schedule. Returns true when it recomputed; a refresh already running
+-- in another session makes it a no-op.
+CREATE OR REPLACE FUNCTION bedrock_integration.refresh_stale_price_aggregates()
+RETURNS BOOLEAN LANGUAGE plpgsql AS $$
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('bedrock_integration.overall_price_aggregates')) THEN
+        RETURN FALSE;
+    END IF;
+    IF NOT (SELECT prices_stale FROM bedrock_integration.catalog_aggregates) THEN
+        RETURN FALSE;
+    END IF;
+    PERFORM bedrock_integration.refresh_overall_price_aggregates();
+    RETURN TRUE;
+END;
+$$;
+
+-- Full rebuild (initial load, TRUNCATE, or manual repair). Totals are
+-- collected into shard 0; data_version stays a per-shard running count so
+-- the summed version never goes backwards.
+CREATE OR REPLACE FUNCTION bedrock_integration.refresh_catalog_aggregates()
+RETURNS VOID LANGUAGE sql AS $$
+    UPDATE bedrock_integration.catalog_aggregate_shards a
+    SET total_products = COALESCE(s.total_products, 0),
+        out_of_stock = COALESCE(s.out_of_stock, 0),
+        low_stock = COALESCE(s.low_stock, 0),
+        healthy_stock = COALESCE(s.healthy_stock, 0),
+        quantity_rows = COALESCE(s.quantity_rows, 0),
+        total_quantity = COALESCE(s.total_quantity, 0),
+        data_version = a.data_version + (a.shard = 0)::int,
+        price_version = a.price_version + (a.shard = 0)::int,
+        refreshed_at = NOW()
+    FROM bedrock_integration.catalog_aggregate_shards z
+    LEFT JOIN (
+        SELECT
+            0 AS shard,
+            COUNT(*) AS total_products,
+            COUNT(*) FILTER (WHERE quantity = 0) AS out_of_stock,
+            COUNT(*) FILTER (WHERE quantity > 0 AND quantity < 10) AS low_stock,
+            COUNT(*) FILTER (WHERE quantity >= 10) AS healthy_stock,
+            COUNT(quantity) AS quantity_rows,
+            COALESCE(SUM(quantity), 0) AS total_quantity
+        FROM bedrock_integration.product_catalog
+    ) s ON s.shard = z.shard
+    WHERE a.shard = z.shard;
+
+    DELETE FROM bedrock_integration.category_price_aggregates;
+
+    SELECT bedrock_integration.refresh_category_price_aggregates(
+        ARRAY(
+            SELECT DISTINCT category_name
+            FROM bedrock_integration.product_catalog
+            WHERE category_name IS NOT NULL
+        )
+    );
+
+    SELECT bedrock_integration.refresh_overall_price_aggregates();
+$$;
+
+-- Statement-level maintenance: stock bands are adjusted by signed deltas
+-- from the transition tables, on this backend's shard; per-category price
+-- statistics are recomputed only for categories whose in-stock price set
+-- actually changed (a restock of an item that was already in stock touches
+-- no price aggregate). Such a change only bumps price_version; the overall
+-- median is recomputed later by refresh_stale_price_aggregates().
+CREATE OR REPLACE FUNCTION bedrock_integration.maintain_catalog_aggregates()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE
+    new_sql CONSTANT TEXT := 'SELECT "productId", category_name, price, quantity, 1 AS sign FROM new_rows';
+    old_sql CONSTANT TEXT := 'SELECT "productId", category_name, price, quantity, -1 AS sign FROM old_rows';
+    changes_sql TEXT;
+    changed_categories TEXT[];
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM bedrock_integration.refresh_catalog_aggregates();
+        RETURN NULL;
+    END IF;
+
+    changes_sql := CASE TG_OP
+        WHEN 'INSERT' THEN new_sql
+        WHEN 'DELETE' THEN old_sql
+        ELSE new_sql || ' UNION ALL ' || old_sql
+    END;
+
+    -- Rows whose (id, category, price) in-stock tuple did not cancel out
+    EXECUTE format($sql$
+        SELECT array_agg(DISTINCT category_name)
+        FROM (
+            SELECT category_name
+            FROM (%s) changes
+            WHERE quantity > 0
+              AND category_name IS NOT NULL
+            GROUP BY "productId", category_name, price
+            HAVING SUM(sign) <> 0
+        ) changed
+    $sql$, changes_sql) INTO changed_categories;
+
+    EXECUTE format($sql$
+        UPDATE bedrock_integration.catalog_aggregate_shards a
+        SET total_products = a.total_products + d.total_products,
+            out_of_stock = a.out_of_stock + d.out_of_stock,
+            low_stock = a.low_stock + d.low_stock,
+            healthy_stock = a.healthy_stock + d.healthy_stock,
+            quantity_rows = a.quantity_rows + d.quantity_rows,
+            total_quantity = a.total_quantity + d.total_quantity,
+            data_version = a.data_version + 1,
+            price_version = a.price_version + $1,
+            refreshed_at = NOW()
+        FROM (
+            SELECT
+                COALESCE(SUM(sign), 0) AS total_products,
+                COALESCE(SUM(sign) FILTER (WHERE quantity = 0), 0) AS out_of_stock,
+                COALESCE(SUM(sign) FILTER (WHERE quantity > 0 AND quantity < 10), 0) AS low_stock,
+                COALESCE(SUM(sign) FILTER (WHERE quantity >= 10), 0) AS healthy_stock,
+                COALESCE(SUM(sign) FILTER (WHERE quantity IS NOT NULL), 0) AS quantity_rows,
+                COALESCE(SUM(sign * quantity), 0) AS total_quantity
+            FROM (%s) changes
+        ) d
+        WHERE a.shard = pg_backend_pid() %% 16
+    $sql$, changes_sql)
+    USING (changed_categories IS NOT NULL)::int;
+
+    IF changed_categories IS NOT NULL THEN
+        PERFORM bedrock_integration.refresh_category_price_aggregates(changed_categories);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_catalog_aggregates_insert ON bedrock_integration.product_catalog;
+CREATE TRIGGER trg_catalog_aggregates_insert
+    AFTER INSERT ON bedrock_integration.product_catalog
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bedrock_integration.maintain_catalog_aggregates();
+
+DROP TRIGGER IF EXISTS trg_catalog_aggregates_update ON bedrock_integration.product_catalog;
+CREATE TRIGGER trg_catalog_aggregates_update
+    AFTER UPDATE ON bedrock_integration.product_catalog
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bedrock_integration.maintain_catalog_aggregates();
+
+DROP TRIGGER IF EXISTS trg_catalog_aggregates_delete ON bedrock_integration.product_catalog;
+CREATE TRIGGER trg_catalog_aggregates_delete
+    AFTER DELETE ON bedrock_integration.product_catalog
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bedrock_integration.maintain_catalog_aggregates();
+
+DROP TRIGGER IF EXISTS trg_catalog_aggregates_truncate ON bedrock_integration.product_catalog;
+CREATE TRIGGER trg_catalog_aggregates_truncate
+    AFTER TRUNCATE ON bedrock_integration.product_catalog
+    FOR EACH STATEMENT EXECUTE FUNCTION bedrock_integration.maintain_catalog_aggregates();
+
+-- Seed from the freshly loaded catalog
+SELECT bedrock_integration.refresh_catalog_aggregates();
+
+SELECT 'Catalog aggregates created' as status;
+SQL_AGGREGATES
+
+if [ $? -eq 0 ]; then
+    log "✅ Catalog aggregates created"
+else
+    error "Failed to create catalog aggregates"
+fi
+
+# ============================================================================
+# CREATE INVENTORY HISTORY
+# ============================================================================
+
+log "==================== Creating Inventory History ===================="
+
+log "Creating append-only inventory history..."
+PGPASSWORD="$DB_PASSWORD" psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" \
+    -v ON_ERROR_STOP=1 << 'SQL_INVENTORY_HISTORY'
+-- One narrow row per stock movement, written in the same statement as the
+-- quantity change (restocks and sales). No foreign key: history outlives
+-- deleted products and inserts stay cheap.
+CREATE TABLE IF NOT EXISTS bedrock_integration.inventory_history (
+    event_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    "productId" VARCHAR(255) NOT NULL,
+    event_type CHAR(1) NOT NULL CHECK (event_type IN ('R', 'S')),  -- R = restock, S = sale
+    quantity_delta INTEGER NOT NULL,  -- positive for restocks, negative for sales
+    quantity_after INTEGER,
+    recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Append-only and time-ordered: BRIN keeps window scans cheap at tiny size
+CREATE INDEX IF NOT EXISTS idx_inventory_history_recorded_brin
+    ON bedrock_integration.inventory_history USING BRIN (recorded_at);
+
+SELECT 'Inventory history created' as status;
+SQL_INVENTORY_HISTORY
+
+if [ $? -eq 0 ]; then
+    log "✅ Inventory history created"
+else
+    error "Failed to create inventory history"
+fi
+
+# ============================================================================
+# CREATE CATALOG CHANGE FEED
+# ============================================================================
+
+log "==================== Creating Catalog Change Feed ===================="
+
+log "Creating NOTIFY triggers for catalog changes..."
+PGPASSWORD="$DB_PASSWORD" psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" \
+    -v ON_ERROR_STOP=1 << 'SQL_CHANGE_FEED'
+-- Publish one compact NOTIFY per statement on channel catalog_changes:
+--   {"op": "update", "ids": [...], "columns": [...], "count": n}
+-- columns is null for inserts/deletes (whole rows changed). Payloads over
+-- the NOTIFY limit drop the id list and set "truncated": true, which tells
+-- listeners to invalidate everything. The channel name is also the
+-- CHANGE_FEED_CHANNEL constant in lab2/backend/services/change_feed.py.
+CREATE OR REPLACE FUNCTION bedrock_integration.notify_catalog_changes()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE
+    changed_ids TEXT[];
+    changed_columns TEXT[];
+    payload TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('catalog_changes', json_build_object(
+            'op', 'truncate', 'ids', NULL, 'columns', NULL, 'count', NULL, 'truncated', true
+        )::text);
+        RETURN NULL;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT array_agg("productId") INTO changed_ids FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg("productId") INTO changed_ids FROM old_rows;
+    ELSE
+        SELECT array_agg(DISTINCT "productId") INTO changed_ids
+        FROM (
+            SELECT "productId" FROM new_rows
+            UNION
+            SELECT "productId" FROM old_rows
+        ) touched;
+
+        SELECT array_remove(ARRAY[
+            CASE WHEN bool_or(n.quantity IS DISTINCT FROM o.quantity) THEN 'quantity' END,
+            CASE WHEN bool_or(n.price IS DISTINCT FROM o.price) THEN 'price' END,
+            CASE WHEN bool_or(n.stars IS DISTINCT FROM o.stars) THEN 'stars' END,
+            CASE WHEN bool_or(n.reviews IS DISTINCT FROM o.reviews) THEN 'reviews' END,
+            CASE WHEN bool_or(n.category_name IS DISTINCT FROM o.category_name) THEN 'category_name' END,
+            CASE WHEN bool_or(n.category_id IS DISTINCT FROM o.category_id) THEN 'category_id' END,
+            CASE WHEN bool_or(n.product_description IS DISTINCT FROM o.product_description) THEN 'product_description' END,
+            CASE WHEN bool_or(n.imgurl IS DISTINCT FROM o.imgurl) THEN 'imgurl' END,
+            CASE WHEN bool_or(n.producturl IS DISTINCT FROM o.producturl) THEN 'producturl' END,
+            CASE WHEN bool_or(n.isbestseller IS DISTINCT FROM o.isbestseller) THEN 'isbestseller' END,
+            CASE WHEN bool_or(n.boughtinlastmonth IS DISTINCT FROM o.boughtinlastmonth) THEN 'boughtinlastmonth' END,
+            CASE WHEN bool_or(n.embedding IS DISTINCT FROM o.embedding) THEN 'embedding' END
+        ], NULL) INTO changed_columns
+        FROM new_rows n
+        JOIN old_rows o USING ("productId");
+
+        -- A changed primary key has no partner row: treat as whole-row change
+        IF (SELECT COUNT(*) FROM new_rows) <> cardinality(changed_ids) THEN
+            changed_columns := NULL;
+        END IF;
+    END IF;
+
+    IF changed_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    payload := json_build_object(
+        'op', lower(TG_OP),
+        'ids', changed_ids,
+        'columns', changed_columns,
+        'count', cardinality(changed_ids)
+    )::text;
+
+    IF octet_length(payload) > 7900 THEN
+        payload := json_build_object(
+            'op', lower(TG_OP),
+            'ids', NULL,
+            'columns', changed_columns,
+            'count', cardinality(changed_ids),
+            'truncated', true
+        )::text;
+    END IF;
+
+    PERFORM pg_notify('catalog_changes', payload);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_catalog_changes_insert ON bedrock_integration.product_catalog;
+CREATE TRIGGER trg_catalog_changes_insert
+    AFTER INSERT ON bedrock_integration.product_catalog
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bedrock_integration.notify_catalog_changes();
+
+DROP TRIGGER IF EXISTS trg_catalog_changes_update ON bedrock_integration.product_catalog;
+CREATE TRIGGER trg_catalog_changes_update
+    AFTER UPDATE ON bedrock_integration.product_catalog
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bedrock_integration.notify_catalog_changes();
+
+DROP TRIGGER IF EXISTS trg_catalog_changes_delete ON bedrock_integration.product_catalog;
+CREATE TRIGGER trg_catalog_changes_delete
+    AFTER DELETE ON bedrock_integration.product_catalog
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bedrock_integration.notify_catalog_changes();
+
+DROP TRIGGER IF EXISTS trg_catalog_changes_truncate ON bedrock_integration.product_catalog;
+CREATE TRIGGER trg_catalog_changes_truncate
+    AFTER TRUNCATE ON bedrock_integration.product_catalog
+    FOR EACH STATEMENT EXECUTE FUNCTION bedrock_integration.notify_catalog_changes();
+
+SELECT 'Catalog change feed created' as status;
+SQL_CHANGE_FEED
+
+if [ $? -eq 0 ]; then
+    log "✅ Catalog change feed created"
+else
+    error "Failed to create catalog change feed"
+fi
+
+# ============================================================================
+# CREATE CATALOG VOCABULARY
+# ============================================================================
+
+log "==================== Creating Catalog Vocabulary ===================="
+
+log "Building spelling vocabulary from catalog terms..."
+PGPASSWORD="$DB_PASSWORD" psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" \
+    -v ON_ERROR_STOP=1 << 'SQL_CATALOG_VOCABULARY'
+-- Distinct words of product descriptions and category names, with how many
+-- products use them. A few tens of thousands of short strings: trigram
+-- lookups against it stay cheap where idx_product_trgm would scan
+-- descriptions. Used by the search "did you mean" stage.
+CREATE TABLE IF NOT EXISTS bedrock_integration.catalog_vocabulary (
+    term TEXT PRIMARY KEY,
+    frequency INTEGER NOT NULL
+);
+
+-- Serves term % 'token' (similarity above pg_trgm.similarity_threshold)
+CREATE INDEX IF NOT EXISTS idx_catalog_vocabulary_trgm
+    ON bedrock_integration.catalog_vocabulary USING GIN (term gin_trgm_ops);
+
+-- Rebuild from the catalog. Every catalog word is a term, so rare brand and
+-- model names are never "corrected"; frequency only ranks candidates. Run
+-- here after the load and by the application (services/spell_correct.py)
+-- after title or category writes.
+-- Returns the term count, or NULL when another session is already refreshing.
+CREATE OR REPLACE FUNCTION bedrock_integration.refresh_catalog_vocabulary()
+RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE
+    term_count INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('bedrock_integration.catalog_vocabulary')) THEN
+        RETURN NULL;
+    END IF;
+
+    -- ON COMMIT DROP only fires at commit; allow a second call in one transaction
+    DROP TABLE IF EXISTS pg_temp.catalog_vocabulary_new;
+    CREATE TEMP TABLE catalog_vocabulary_new ON COMMIT DROP AS
+    SELECT word AS term, COUNT(DISTINCT "productId")::int AS frequency
+    FROM bedrock_integration.product_catalog,
+         regexp_split_to_table(
+             lower(coalesce(product_description, '') || ' ' || coalesce(category_name, '')),
+             '[^[:alnum:]]+'
+         ) AS word
+    WHERE length(word) BETWEEN 3 AND 30
+      AND word !~ '^[0-9]+$'
+    GROUP BY word;
+
+    DELETE FROM bedrock_integration.catalog_vocabulary v
+    WHERE NOT EXISTS (SELECT 1 FROM catalog_vocabulary_new n WHERE n.term = v.term);
+
+    INSERT INTO bedrock_integration.catalog_vocabulary (term, frequency)
+    SELECT term, frequency FROM catalog_vocabulary_new
+    ON CONFLICT (term) DO UPDATE SET frequency = EXCLUDED.frequency;
+
+    SELECT COUNT(*) INTO term_count FROM bedrock_integration.catalog_vocabulary;
+    RETURN term_count;
+END;
+$$;
+
+SELECT bedrock_integration.refresh_catalog_vocabulary() AS vocabulary_terms;
+ANALYZE bedrock_integration.catalog_vocabulary;
+
+SELECT 'Catalog vocabulary created' as status;
+SQL_CATALOG_VOCABULARY
+
+if [ $? -eq 0 ]; then
+    log "✅ Catalog vocabulary created"
+else
+    error "Failed to create catalog vocabulary"
+fi
+
+# ============================================================================
+# CREATE CATEGORY CENTROIDS
+# ============================================================================
+
+log "==================== Creating Category Centroids ===================="
+
+log "Computing per-category centroid embeddings..."
+PGPASSWORD="$DB_PASSWORD" psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" \
+    -v ON_ERROR_STOP=1 << 'SQL_CATEGORY_CENTROIDS'
+-- One row per category: the normalized mean of its normalized product
+-- embeddings. A few hundred rows, so nearest-category lookups are a scan of
+-- this table, not of the HNSW graph. Used to route searches to their
+-- nearest categories and by the agents for intent routing.
+CREATE TABLE IF NOT EXISTS bedrock_integration.category_centroids (
+    category_name TEXT PRIMARY KEY,
+    centroid vector(1024) NOT NULL,
+    product_count INTEGER NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Batch job: run after catalog loads (lab2/backend/refresh_category_centroids.py)
+CREATE OR REPLACE FUNCTION bedrock_integration.refresh_category_centroids()
+RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE
+    category_count INTEGER;
+BEGIN
+    INSERT INTO bedrock_integration.category_centroids (category_name, centroid, product_count, refreshed_at)
+    SELECT category_name, l2_normalize(avg(l2_normalize(embedding))), COUNT(*)::int, now()
+    FROM bedrock_integration.product_catalog
+    WHERE embedding IS NOT NULL AND category_name IS NOT NULL
+    GROUP BY category_name
+    ON CONFLICT (category_name) DO UPDATE SET
+        centroid = EXCLUDED.centroid,
+        product_count = EXCLUDED.product_count,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    DELETE FROM bedrock_integration.category_centroids c
+    WHERE NOT EXISTS (
+        SELECT 1 FROM bedrock_integration.product_catalog p
+        WHERE p.category_name = c.category_name AND p.embedding IS NOT NULL
+    );
+
+    SELECT COUNT(*) INTO category_count FROM bedrock_integration.category_centroids;
+    RETURN category_count;
+END;
+$$;
+
+SELECT bedrock_integration.refresh_category_centroids() AS category_centroids;
+ANALYZE bedrock_integration.category_centroids;
+
+SELECT 'Category centroids created' as status;
+SQL_CATEGORY_CENTROIDS
+
+if [ $? -eq 0 ]; then
+    log "✅ Category centroids created"
+else
+    error "Failed to create category centroids"
+fi
+
 # ============================================================================
 # CREATE VERIFICATION QUERIES
 # ============================================================================
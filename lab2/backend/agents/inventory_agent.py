@@ -2,7 +2,7 @@
 Inventory Restock Agent - Monitors stock levels and suggests restocking
 """
 from strands import Agent, tool
-from services.agent_tools import get_inventory_health, restock_product, run_query
+from services.agent_tools import get_inventory_health, get_reorder_forecast, restock_product, run_query
 
 
 @tool
@@ -24,25 +24,28 @@ def inventory_restock_agent(query: str) -> str:
 
 You have access to these tools:
 - get_inventory_health() - Get current stock statistics
+- get_reorder_forecast(lead_time_days, cover_days, limit) - Sales velocity, days of cover and suggested reorder quantities
 - restock_product(product_id, quantity) - Add stock to a product
 - run_query(sql) - Execute custom inventory queries
 
 Workflow:
 1. Call get_inventory_health() to see current stock levels
-2. Analyze the data and identify issues
-3. Provide recommendations or execute restock if requested
+2. Call get_reorder_forecast() to see which products will run out first
+3. Analyze the data and identify issues
+4. Provide recommendations or execute restock if requested
 
 Guidelines:
 - LOW STOCK: quantity < 10 | OUT OF STOCK: quantity = 0
 - Prioritize by stars and reviews
-- Reorder quantities: High demand (100+ reviews) = 50 units, Medium (50-100) = 30 units, Low (<50) = 20 units
+- Reorder quantities: use suggested_order from get_reorder_forecast (based on recorded sales)
+- Only if a product has no sales history, fall back to: High demand (100+ reviews) = 50 units, Medium (50-100) = 30 units, Low (<50) = 20 units
 - Keep response under 200 words
 
 Format:
 - Summary stats
 - Top priority items
 - Recommended actions""",
-            tools=[get_inventory_health, restock_product, run_query]
+            tools=[get_inventory_health, get_reorder_forecast, restock_product, run_query]
         )
         
         response = agent(query)
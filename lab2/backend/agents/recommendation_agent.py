@@ -2,7 +2,7 @@
 Product Recommendation Agent - Suggests products based on user preferences
 """
 from strands import Agent, tool
-from services.agent_tools import get_trending_products, run_query
+from services.agent_tools import find_relevant_categories, get_trending_products, run_query
 
 
 @tool
@@ -26,11 +26,13 @@ OUR CATALOG: 21,704 products including headphones, security cameras, vacuums, ga
 
 You have access to these tools:
 - get_trending_products(limit) - Get popular products
+- find_relevant_categories(query, top) - Catalog categories nearest in meaning to the request
 - run_query(sql) - Search product catalog with SQL
 
 Workflow:
 1. Understand user's needs (budget, features, category)
-2. Use run_query() to search for matching products:
+2. If the category is unclear, call find_relevant_categories() to get exact category names
+3. Use run_query() to search for matching products:
    SELECT "productId", product_description as name, price, stars, reviews,
           category_name as category, quantity, imgurl as image_url
    FROM bedrock_integration.product_catalog
@@ -38,7 +40,8 @@ Workflow:
      AND price > 0 AND quantity > 0
    ORDER BY stars DESC, reviews DESC
    LIMIT 5
-3. Provide 3-5 recommendations with reasoning
+   (add AND category_name IN (...) with the categories found in step 2)
+4. Provide 3-5 recommendations with reasoning
 
 Guidelines:
 - Prioritize highly-rated products (4+ stars)
@@ -50,7 +53,7 @@ Format:
 - Product name, price, rating
 - Why it's a good fit
 - Key features""",
-            tools=[get_trending_products, run_query]
+            tools=[get_trending_products, find_relevant_categories, run_query]
         )
         
         response = agent(query)
@@ -4,31 +4,51 @@ FastAPI app with semantic search (Lab 1) and multi-agent system (Lab 2)
 """
 
 import time
+import asyncio
 import logging
 import json
 from contextlib import asynccontextmanager
 from typing import List
 
-from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi import FastAPI, HTTPException, Query, Depends, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from psycopg.errors import UndefinedTable
 
 from config import settings
 from models.search import (
     SearchRequest,
     SearchResponse,
-    SearchResult,
     RecommendationRequest,
     AgentResponse,
     HealthResponse,
     ChatRequest,
     ChatResponse,
 )
-from models.product import Product, ProductWithScore, InventoryStats
-from services.database import DatabaseService
+from models.product import (
+    Product,
+    ProductWithScore,
+    InventoryStats,
+    BulkRestockRequest,
+    RecordSalesRequest,
+)
+from services.database import DatabaseService, QueryTimeoutError
 from services.embeddings import EmbeddingService
-from services.bedrock import BedrockService
-from services.chat import ChatService
+from services.lazy import LazyService
+from services.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, decode_cursor, next_cursor
+from services.category_dictionary import get_category_dictionary
+from services.serialization import FastJSONResponse, model_fields, project_rows
+from services.suggest_index import get_suggest_index, start_suggest_index
+from services.price_aggregates import get_price_aggregate_refresher, start_price_aggregate_refresher
+from services.facets import DEFAULT_EF_SEARCH, faceted_search_statements, shape_facets
+from services.category_centroids import routing_statements, shape_routes
+from services.diversify import MAX_CANDIDATES, candidate_count, group_near_duplicates
+from services.spell_correct import get_spell_corrector
+from services.query_parser import FILTERED_EF_SEARCH, SearchFilters, parse_query
+from services.projection import PRODUCT_COLUMNS, InvalidFieldsError, parse_fields, select_list
+from services.product_cache import etag_matches, get_product_cache, peek_product_cache, rows_etag
+from services.analytics_snapshot import create_catalog_snapshot_manager, get_catalog_snapshot_manager
+from middleware import RequestDeadlineMiddleware, CompressionMiddleware
 
 # Lab 2 agents use Strands SDK function pattern (not class-based)
 # Agents are available via /api/agents/query endpoint
@@ -48,14 +68,48 @@ logging.getLogger("strands").setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Response fields of trusted rows served through FastJSONResponse
+PRODUCT_FIELDS = model_fields(Product)
+PRODUCT_WITH_SCORE_FIELDS = model_fields(ProductWithScore)
+
+# fields= allow-lists (the defaults keep each endpoint's full response)
+SEARCH_FIELDS = (*PRODUCT_COLUMNS, "similarity_score")
+BROWSE_FIELDS = (
+    "productId", "product_description", "imgurl", "producturl", "stars",
+    "reviews", "price", "category_name", "quantity", "similarity_score",
+)
+
 
 # Global service instances
 db_service: DatabaseService = None
 embedding_service: EmbeddingService = None
-bedrock_service: BedrockService = None
-chat_service: ChatService = None
 
-# Lab 2 agents use function pattern - no global instances needed
+
+def _setup_agent_tools(tools) -> None:
+    """Give agent tools the shared database and embedding services (live data)"""
+    tools.set_db_service(db_service)
+    tools.set_embedding_service(embedding_service)
+
+
+# Optional subsystems are imported and constructed on first use, so
+# catalog/search workers never load Strands, MCP or the chat stack
+bedrock_subsystem = LazyService("bedrock", "services.bedrock", "BedrockService")
+chat_subsystem = LazyService("chat", "services.chat", "ChatService")
+agent_tools_subsystem = LazyService("agent_tools", "services.agent_tools", setup=_setup_agent_tools)
+
+
+# Readiness is reported separately from liveness
+services_ready = False
+startup_phases_ms: dict = {}
+
+
+async def _timed_phase(name: str, awaitable):
+    """Await a startup phase and record its duration"""
+    phase_start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        startup_phases_ms[name] = round((time.perf_counter() - phase_start) * 1000, 1)
 
 
 @asynccontextmanager
@@ -67,35 +121,42 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting DAT406 Workshop API...")
     
-    global db_service, embedding_service, bedrock_service, chat_service
-    global search_agent, inventory_agent, recommendation_agent
+    global db_service, embedding_service
+    global services_ready
+    
+    startup_start = time.perf_counter()
     
     try:
-        # Initialize core services
+        # The database pool and the embeddings client do not depend on each other
         db_service = DatabaseService()
-        await db_service.connect()
+        _, embedding_service = await asyncio.gather(
+            _timed_phase("database", db_service.connect()),
+            _timed_phase("embeddings", asyncio.to_thread(EmbeddingService)),
+        )
         logger.info("✅ Database service initialized")
-        
-        embedding_service = EmbeddingService()
         logger.info("✅ Embedding service initialized")
         
-        bedrock_service = BedrockService()
-        logger.info("✅ Bedrock service initialized")
+        # Typeahead index builds in the background; /api/suggest waits for it
+        start_suggest_index(db_service)
         
-        chat_service = ChatService()
-        logger.info("✅ Chat service initialized")
+        # Overall price median is recomputed after writes, off the write path
+        start_price_aggregate_refresher(db_service)
         
-        # Set chat service logger to INFO
-        logging.getLogger('services.chat').setLevel(logging.INFO)
-        
-        # Initialize agent tools with database service reference (live data)
-        from services.agent_tools import set_db_service
-        set_db_service(db_service)
-        logger.info("✅ Agent tools initialized with live database access")
+        # Optional analytics snapshot (needs the database)
+        snapshot_manager = create_catalog_snapshot_manager(db_service)
+        if snapshot_manager is not None:
+            await _timed_phase("analytics_snapshot", snapshot_manager.refresh())
         
         # Lab 2 agents use Strands SDK function pattern
-        logger.info("✅ Lab 2 agents available via /api/agents/query")
+        logger.info("✅ Chat and Lab 2 agents load on first use via /api/chat and /api/agents/query")
+        
+        startup_phases_ms["total"] = round((time.perf_counter() - startup_start) * 1000, 1)
+        logger.info(
+            "⏱️ Startup phases: "
+            + ", ".join(f"{name}={ms:.0f}ms" for name, ms in startup_phases_ms.items())
+        )
         
+        services_ready = True
         logger.info("🚀 DAT406 Workshop API is ready!")
         
     except Exception as e:
@@ -106,6 +167,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down DAT406 Workshop API...")
+    services_ready = False
     
     if db_service:
         await db_service.disconnect()
@@ -128,8 +190,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],  # Keyset pagination cursors, product ETags
 )
 
+# Per-request query deadlines and cancellation on client disconnect
+app.add_middleware(RequestDeadlineMiddleware)
+
+# Negotiated br/gzip compression of JSON responses
+app.add_middleware(CompressionMiddleware)
+
 
 # Dependency injection
 async def get_db_service() -> DatabaseService:
@@ -149,11 +218,23 @@ async def get_embedding_service() -> EmbeddingService:
     return embedding_service
 
 
-async def get_bedrock_service() -> BedrockService:
-    """Get Bedrock service instance"""
-    if not bedrock_service:
+async def get_bedrock_service():
+    """Get Bedrock service instance (loaded on first use)"""
+    try:
+        return await bedrock_subsystem.aget()
+    except Exception as e:
+        logger.error(f"Bedrock service unavailable: {e}")
         raise HTTPException(status_code=503, detail="Bedrock service not initialized")
-    return bedrock_service
+
+
+async def get_chat_service():
+    """Get chat service instance (loads Strands, MCP and agent tools on first use)"""
+    try:
+        await agent_tools_subsystem.aget()
+        return await chat_subsystem.aget()
+    except Exception as e:
+        logger.error(f"Chat service unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Chat service not initialized")
 
 
 # ============================================================================
@@ -171,6 +252,45 @@ async def root():
     }
 
 
+@app.get("/api/health/live")
+async def liveness():
+    """
+    Liveness probe
+    Succeeds while the process can serve requests, without touching dependencies
+    """
+    return {"status": "alive"}
+
+
+@app.get("/api/health/ready")
+async def readiness():
+    """
+    Readiness probe
+    Succeeds once startup finished and the database pool is connected
+    """
+    ready = services_ready and db_service is not None and db_service.is_connected
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "database": "connected" if db_service and db_service.is_connected else "disconnected",
+            "startup_phases_ms": startup_phases_ms,
+            "subsystems": {
+                lazy.name: lazy.stats()
+                for lazy in (bedrock_subsystem, chat_subsystem, agent_tools_subsystem)
+            },
+            "analytics_snapshot": (
+                get_catalog_snapshot_manager().stats()
+                if get_catalog_snapshot_manager() else "disabled"
+            ),
+            "suggest_index": get_suggest_index().stats() if get_suggest_index() else "not_started",
+            "price_aggregates": (
+                get_price_aggregate_refresher().stats()
+                if get_price_aggregate_refresher() else "not_started"
+            ),
+        }
+    )
+
+
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check(
     db: DatabaseService = Depends(get_db_service),
@@ -205,9 +325,9 @@ async def health_check(
         health_status["bedrock"] = "inaccessible"
         health_status["status"] = "degraded"
     
-    # Check MCP if Lab 2 is available
+    # Check MCP if Lab 2 is available (chat stack loads on first use)
     if LAB2_AVAILABLE:
-        health_status["mcp"] = "available"
+        health_status["mcp"] = "available" if chat_subsystem.loaded else "not_loaded"
     
     return HealthResponse(**health_status)
 
@@ -232,151 +352,324 @@ async def semantic_search(
     
     try:
         logger.info(f"🔍 Semantic search: '{request.query}' (limit={request.limit})")
+        fields = parse_fields(request.fields, SEARCH_FIELDS, PRODUCT_WITH_SCORE_FIELDS)
+        
+        # "Did you mean": correct misspelled tokens against catalog terms
+        corrected_query, corrections = None, None
+        if request.spell_correct != "off":
+            corrected_query, corrections = await get_spell_corrector(db).correct(request.query)
+            if corrections:
+                logger.info(f"✏️ Did you mean: '{corrected_query}'")
+        search_text = corrected_query if request.spell_correct == "apply" and corrections else request.query
+        
+        # Structured filters: explicit request fields win over parsed phrases
+        filters = SearchFilters(
+            min_price=request.min_price,
+            max_price=request.max_price,
+            min_stars=request.min_stars,
+            in_stock=request.in_stock,
+        )
+        parsed = None
+        category_term = request.category
+        if request.parse_query:
+            parsed = parse_query(search_text)
+            filters = filters.merged(parsed.filters)
+            search_text = parsed.text or search_text
+            category_term = category_term or parsed.category_hint
+            if parsed.phrases:
+                logger.info(f"🧩 Parsed filters {parsed.phrases}, embedding '{search_text}'")
+        if category_term:
+            resolved = await get_category_dictionary(db).resolve(category_term)
+            if resolved.categories:
+                filters = filters.merged(SearchFilters(categories=resolved.categories))
+            elif request.category:
+                filters = filters.merged(SearchFilters(categories=(request.category,)))
+            else:
+                # Not a catalog category after all; let the embedding have it
+                search_text = f"{search_text} {category_term}"
+        if request.route_categories and not filters.categories:
+            filters = filters.merged(SearchFilters(nearest_categories=request.route_categories))
         
         # Generate query embedding
-        query_embedding = embeddings.generate_embedding(request.query)
+        query_embedding = embeddings.generate_embedding(search_text)
         logger.info(f"✅ Generated embedding vector (1024 dimensions)")
         
-        # Perform vector similarity search
-        query = """
+        # Perform vector similarity search, selecting only the requested columns
+        # (plus stored embeddings when near-duplicates are collapsed)
+        columns = select_list(fields) + (",\n                embedding" if request.diversify else "")
+        query = f"""
             SELECT 
-                "productId",
-                product_description,
-                imgurl,
-                producturl,
-                stars,
-                reviews,
-                price,
-                category_id,
-                isbestseller,
-                boughtinlastmonth,
-                category_name,
-                quantity,
-                1 - (embedding <=> %s::vector) as similarity_score
+                {columns},
+                1 - (embedding <=> %(embedding)s::vector) as similarity_score
             FROM bedrock_integration.product_catalog
-            WHERE 1 - (embedding <=> %s::vector) >= %s
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s
+            WHERE 1 - (embedding <=> %(embedding)s::vector) >= %(min_similarity)s{filters.sql()}
+            ORDER BY embedding <=> %(embedding)s::vector
+            LIMIT %(limit)s
         """
+        params = {
+            "embedding": query_embedding,
+            "min_similarity": request.min_similarity,
+            **filters.params(),
+        }
         
-        results = await db.fetch_all(
-            query,
-            query_embedding,
-            query_embedding,
-            request.min_similarity,
-            query_embedding,
-            request.limit
+        # Routed searches first pick the nearest categories (same round trip)
+        route_statements = (
+            routing_statements(query_embedding, filters.nearest_categories)
+            if filters.nearest_categories else []
         )
         
+        facets = facet_time_ms = groups = None
+        attempt = 0
+        while True:
+            # Diversified searches over-fetch, and fetch more if too few distinct groups came back
+            page_limit = candidate_count(request.limit, attempt) if request.diversify else request.limit
+            if request.facets:
+                # Page and facet counts over the top-N candidates in one statement
+                *prefix, results = await db.pipeline(route_statements + faceted_search_statements(
+                    columns,
+                    query_embedding,
+                    request.min_similarity,
+                    page_limit,
+                    request.facet_candidates,
+                    filters,
+                ))
+                facets = shape_facets(results[0]["facets"] if results else None)
+                facet_time_ms = results[0]["facet_time_ms"] if results else 0.0
+            else:
+                # HNSW returns at most ef_search rows, and filters discard some after the scan
+                ef_search = max(DEFAULT_EF_SEARCH, page_limit, FILTERED_EF_SEARCH if filters else 0)
+                statements = [(query, {**params, "limit": page_limit})]
+                if ef_search > DEFAULT_EF_SEARCH:
+                    statements.insert(0, ("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),)))
+                *prefix, results = await db.pipeline(route_statements + statements)
+            routes = prefix[0] if route_statements else None
+            
+            if not request.diversify:
+                break
+            groups = await asyncio.to_thread(
+                group_near_duplicates,
+                [row["embedding"] for row in results],
+                request.diversity_threshold,
+                request.limit,
+            )
+            if len(groups) >= request.limit or len(results) < page_limit or page_limit >= MAX_CANDIDATES:
+                break
+            attempt += 1
+        
         logger.info(f"📦 Found {len(results)} products")
         
-        # Convert to response model
-        search_results = []
-        for row in results:
-            product = ProductWithScore(**dict(row))
-            search_result = SearchResult(product=product)
-            search_results.append(search_result)
+        # Rows already match ProductWithScore; shape them without re-validation
+        if groups is None:
+            search_results = [
+                {"product": product, "explanation": None}
+                for product in project_rows(results, fields)
+            ]
+        else:
+            representatives = project_rows([results[group.representative] for group in groups], fields)
+            search_results = [
+                {
+                    "product": product,
+                    "explanation": None,
+                    "variant_count": len(group.variants),
+                    "variant_ids": [results[i]["productId"] for i in group.variants],
+                }
+                for product, group in zip(representatives, groups)
+            ]
+            logger.info(f"🧬 Collapsed {len(results)} candidates into {len(groups)} distinct products")
         
         search_time_ms = (time.time() - start_time) * 1000
         logger.info(f"⚡ Search completed in {search_time_ms:.2f}ms")
         
-        return SearchResponse(
-            query=request.query,
-            results=search_results,
-            total_results=len(search_results),
-            search_time_ms=search_time_ms,
-            search_type="semantic"
-        )
+        content = {
+            "query": request.query,
+            "results": search_results,
+            "total_results": len(search_results),
+            "search_time_ms": search_time_ms,
+            "search_type": "semantic"
+        }
+        if request.facets:
+            content["facets"] = facets
+            content["facet_time_ms"] = facet_time_ms
+        if corrections:
+            content["corrected_query"] = corrected_query
+            content["corrections"] = corrections
+        if route_statements:
+            content["routed_categories"] = shape_routes(routes)
+        if parsed is not None:
+            # Report the filters actually applied (parsed, explicit and resolved)
+            content["parsed_query"] = {
+                **parsed.as_dict(),
+                "filters": {name: value for name, value in filters.as_dict().items() if value is not None},
+            }
+        return FastJSONResponse(content)
         
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UndefinedTable as e:
+        # category_centroids (route_categories) or catalog_vocabulary not created yet
+        raise HTTPException(status_code=503, detail=f"Search feature not set up: {str(e)}")
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Search failed: {e}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
+@app.get("/api/products:batch")
+async def get_products_batch(
+    ids: List[str] = Query(..., description="Product IDs, comma-separated or repeated"),
+    if_none_match: str = Header(default=None),
+    db: DatabaseService = Depends(get_db_service),
+):
+    """
+    Get many products in one request
+    Served from the product cache; misses are fetched with one = ANY(%s) query.
+    Products come back in request order; unknown IDs are listed in "missing".
+    """
+    try:
+        product_ids = list(dict.fromkeys(
+            product_id.strip() for value in ids for product_id in value.split(",") if product_id.strip()
+        ))
+        if not product_ids:
+            raise HTTPException(status_code=400, detail="ids must not be empty")
+        if len(product_ids) > 100:
+            raise HTTPException(status_code=400, detail="At most 100 ids per request")
+        
+        rows = await get_product_cache(db).get_many(product_ids)
+        
+        etag = rows_etag(rows.get(product_id) for product_id in product_ids)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        return FastJSONResponse(
+            {
+                "products": project_rows(
+                    (rows[product_id] for product_id in product_ids if product_id in rows),
+                    PRODUCT_FIELDS
+                ),
+                "missing": [product_id for product_id in product_ids if product_id not in rows]
+            },
+            headers={"ETag": etag}
+        )
+    
+    except (HTTPException, QueryTimeoutError):
+        raise
+    except Exception as e:
+        logger.error(f"Failed to fetch products: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch products: {str(e)}")
+
+
 @app.get("/api/products/{product_id}", response_model=Product)
 async def get_product(
     product_id: str,
+    response: Response,
+    if_none_match: str = Header(default=None),
     db: DatabaseService = Depends(get_db_service),
 ):
     """
     Get a single product by ID
+    Served from the product cache, with ETag / If-None-Match support
     """
     try:
-        query = """
-            SELECT 
-                "productId",
-                product_description,
-                imgurl,
-                producturl,
-                stars,
-                reviews,
-                price,
-                category_id,
-                isbestseller,
-                boughtinlastmonth,
-                category_name,
-                quantity
-            FROM bedrock_integration.product_catalog
-            WHERE "productId" = $1
-        """
-        
-        result = await db.fetch_one(query, product_id)
+        result = await get_product_cache(db).get(product_id)
         
         if not result:
             raise HTTPException(status_code=404, detail="Product not found")
         
-        return Product(**dict(result))
+        etag = rows_etag([result])
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        
+        return Product(**result)
         
-    except HTTPException:
+    except (HTTPException, QueryTimeoutError):
         raise
     except Exception as e:
         logger.error(f"Failed to fetch product: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch product: {str(e)}")
 
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit rate and size of the in-process product cache"""
+    cache = peek_product_cache()
+    return {"product_cache": cache.stats() if cache else "not_started"}
+
+
 @app.get("/api/products/category/{category_query}")
 async def browse_category(
     category_query: str,
     limit: int = Query(default=10, ge=1, le=50),
+    fields: str = Query(default=None, description="Comma-separated fields to return"),
     db: DatabaseService = Depends(get_db_service),
 ):
-    """Fast category browsing without embeddings"""
+    """
+    Fast category browsing without embeddings
+    
+    The term is resolved against the in-memory category dictionary (exact,
+    substring or trigram-fuzzy); matched categories are read best-rated
+    first from idx_product_category_browse. Terms that match no category
+    fall back to a description search on the trigram index.
+    """
     try:
         logger.info(f"📂 Category browse: '{category_query}' (limit={limit})")
+        fields = parse_fields(fields, BROWSE_FIELDS, BROWSE_FIELDS)
+        columns = select_list(fields, always=("stars", "reviews"))
         
-        query = """
-            SELECT 
-                "productId",
-                product_description,
-                imgurl,
-                producturl,
-                stars,
-                reviews,
-                price,
-                category_name,
-                quantity,
-                1.0 as similarity_score
-            FROM bedrock_integration.product_catalog
-            WHERE (category_name ILIKE %s OR product_description ILIKE %s)
-              AND quantity > 0
-            ORDER BY stars DESC, reviews DESC
-            LIMIT %s
-        """
+        resolved = await get_category_dictionary(db).resolve(category_query)
         
-        results = await db.fetch_all(query, f"%{category_query}%", f"%{category_query}%", limit)
-        logger.info(f"📦 Found {len(results)} products in category")
+        if resolved.categories:
+            # One ordered index read of at most `limit` rows per category
+            query = f"""
+                SELECT p.*
+                FROM unnest(%s::text[]) AS c(name)
+                CROSS JOIN LATERAL (
+                    SELECT 
+                        {columns},
+                        1.0 as similarity_score
+                    FROM bedrock_integration.product_catalog
+                    WHERE category_name = c.name
+                      AND quantity > 0
+                    ORDER BY stars DESC, reviews DESC
+                    LIMIT %s
+                ) p
+                ORDER BY p.stars DESC, p.reviews DESC
+                LIMIT %s
+            """
+            results = await db.fetch_all(query, list(resolved.categories), limit, limit)
+        else:
+            query = f"""
+                SELECT 
+                    {columns},
+                    1.0 as similarity_score
+                FROM bedrock_integration.product_catalog
+                WHERE product_description ILIKE %s
+                  AND quantity > 0
+                ORDER BY stars DESC, reviews DESC
+                LIMIT %s
+            """
+            results = await db.fetch_all(query, f"%{category_query}%", limit)
         
-        return {
+        logger.info(f"📦 Found {len(results)} products in category ({resolved.match} match)")
+        
+        return FastJSONResponse({
             "results": [
                 {
-                    "product": dict(row),
+                    "product": product,
                     "similarity_score": 1.0
                 }
-                for row in results
+                for product in project_rows(results, fields)
             ],
             "total_results": len(results),
-            "search_type": "category"
-        }
+            "search_type": "category",
+            "category_match": resolved.match,
+            "matched_categories": list(resolved.categories)
+        })
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Category browse failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -386,67 +679,125 @@ async def browse_category(
 async def list_products(
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str = Query(default=None, description=f"{NEXT_CURSOR_HEADER} from the previous page"),
     category: str = Query(default=None),
     min_stars: float = Query(default=None, ge=0, le=5),
     max_price: float = Query(default=None, ge=0),
+    fields: str = Query(default=None, description="Comma-separated fields to return"),
     db: DatabaseService = Depends(get_db_service),
 ):
     """
-    List products with optional filters
+    List products with optional filters, most reviewed first
+    
+    Pages with keyset cursors on (reviews, productId): pass the
+    X-Next-Cursor header of one page as ``cursor`` to get the next, at the
+    same cost as the first. ``offset`` is still accepted without a cursor.
     """
     try:
+        if cursor and offset:
+            raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+        after = decode_cursor(cursor, 2)
+        fields = parse_fields(fields, PRODUCT_COLUMNS, PRODUCT_FIELDS)
+        
         # Build dynamic query
         conditions = []
         params = []
-        param_count = 1
         
         if category:
-            conditions.append(f"category_name = ${param_count}")
+            conditions.append("category_name = %s")
             params.append(category)
-            param_count += 1
         
         if min_stars is not None:
-            conditions.append(f"stars >= ${param_count}")
+            conditions.append("stars >= %s")
             params.append(min_stars)
-            param_count += 1
         
         if max_price is not None:
-            conditions.append(f"price <= ${param_count}")
+            conditions.append("price <= %s")
             params.append(max_price)
-            param_count += 1
+        
+        if after:
+            conditions.append('(reviews, "productId") < (%s, %s)')
+            params.extend(after)
         
         where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
         
+        # ORDER BY matches idx_product_listing / idx_product_listing_category
         query = f"""
             SELECT 
-                "productId",
-                product_description,
-                imgurl,
-                producturl,
-                stars,
-                reviews,
-                price,
-                category_id,
-                isbestseller,
-                boughtinlastmonth,
-                category_name,
-                quantity
+                {select_list(fields, always=("reviews", "productId"))}
             FROM bedrock_integration.product_catalog
             {where_clause}
-            ORDER BY reviews DESC
-            LIMIT ${param_count} OFFSET ${param_count + 1}
+            ORDER BY reviews DESC, "productId" DESC
+            LIMIT %s OFFSET %s
         """
         
-        params.extend([limit, offset])
+        params.extend([limit + 1, offset])
         results = await db.fetch_all(query, *params)
         
-        return [Product(**dict(row)) for row in results]
+        next_page = next_cursor(results, limit, ("reviews", "productId"))
         
+        return FastJSONResponse(
+            project_rows(results, fields),
+            headers={NEXT_CURSOR_HEADER: next_page} if next_page else None
+        )
+        
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (HTTPException, QueryTimeoutError):
+        raise
     except Exception as e:
         logger.error(f"Failed to list products: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to list products: {str(e)}")
 
 
+@app.get("/api/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(default=8, ge=1, le=20),
+):
+    """
+    Typeahead suggestions for the search box
+    Served from the in-memory prefix index: no database or Bedrock calls.
+    """
+    index = get_suggest_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Suggest index is not started")
+    
+    try:
+        start = time.perf_counter()
+        suggestions = await index.suggest(q, limit=limit)
+        return FastJSONResponse({
+            "query": q,
+            **suggestions,
+            "took_ms": round((time.perf_counter() - start) * 1000, 3)
+        })
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.get("/api/spell-correct")
+async def spell_correct(
+    q: str = Query(..., min_length=1, max_length=2000, description="Query to check"),
+    db: DatabaseService = Depends(get_db_service),
+):
+    """
+    "Did you mean" check for a query
+    Tokens are matched against the catalog vocabulary with pg_trgm similarity.
+    """
+    try:
+        corrected, corrections = await get_spell_corrector(db).correct(q)
+        return FastJSONResponse({
+            "query": q,
+            "corrected_query": corrected if corrections else None,
+            "corrections": corrections,
+        })
+    except QueryTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Spell correction failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Spell correction failed: {str(e)}")
+
+
 # ============================================================================
 # LAB 2: MULTI-AGENT ENDPOINTS (Optional)
 # ============================================================================
@@ -468,6 +819,15 @@ async def http_exception_handler(request, exc):
     )
 
 
+@app.exception_handler(QueryTimeoutError)
+async def query_timeout_handler(request, exc):
+    """Handle queries stopped by the request deadline"""
+    return JSONResponse(
+        status_code=504,
+        content={"detail": f"Request timed out: {exc}"}
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Handle general exceptions"""
@@ -502,6 +862,8 @@ async def get_trending(
         from services.business_logic import BusinessLogic
         logic = BusinessLogic(db)
         return await logic.get_trending_products(limit)
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Failed to get trending products: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -516,21 +878,99 @@ async def get_inventory_health_endpoint(
         from services.business_logic import BusinessLogic
         logic = BusinessLogic(db)
         return await logic.get_inventory_health()
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Failed to get inventory health: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/inventory/analyze")
+async def analyze_inventory(
+    low_stock_threshold: int = Query(10, ge=1, le=10, description="Low stock means quantity below this"),
+    sample_size: int = Query(20, ge=1, le=100, description="Products per list"),
+    db: DatabaseService = Depends(get_db_service)
+):
+    """Inventory summary with top low-stock and out-of-stock products"""
+    try:
+        from services.business_logic import BusinessLogic
+        logic = BusinessLogic(db)
+        return await logic.analyze_inventory(low_stock_threshold, sample_size)
+    except QueryTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to analyze inventory: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/inventory/low-stock")
+async def get_low_stock_products(
+    response: Response,
+    threshold: int = Query(10, ge=1, le=10, description="Low stock means quantity below this"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = Query(None, description=f"{NEXT_CURSOR_HEADER} from the previous page"),
+    db: DatabaseService = Depends(get_db_service)
+):
+    """
+    In-stock products below the threshold, highest demand first
+    Next page cursor is returned in the X-Next-Cursor header
+    """
+    try:
+        from services.business_logic import BusinessLogic
+        logic = BusinessLogic(db)
+        products, next_page = await logic.get_low_stock_products(threshold, limit, cursor)
+        if next_page:
+            response.headers[NEXT_CURSOR_HEADER] = next_page
+        return products
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueryTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to list low stock products: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/inventory/out-of-stock")
+async def get_out_of_stock_products(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = Query(None, description=f"{NEXT_CURSOR_HEADER} from the previous page"),
+    db: DatabaseService = Depends(get_db_service)
+):
+    """
+    Products with no stock, highest demand first
+    Next page cursor is returned in the X-Next-Cursor header
+    """
+    try:
+        from services.business_logic import BusinessLogic
+        logic = BusinessLogic(db)
+        products, next_page = await logic.get_out_of_stock_products(limit, cursor)
+        if next_page:
+            response.headers[NEXT_CURSOR_HEADER] = next_page
+        return products
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueryTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to list out of stock products: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/mcp/price-stats")
 async def get_price_stats(
     category: str = Query(default=None),
+    exact: bool = Query(default=True, description="False serves p50/p90/p99 from quantile sketches"),
     db: DatabaseService = Depends(get_db_service)
 ):
     """Get price statistics using business logic"""
     try:
         from services.business_logic import BusinessLogic
         logic = BusinessLogic(db)
-        return await logic.get_price_statistics(category)
+        return await logic.get_price_statistics(category, exact=exact)
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Failed to get price statistics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -549,11 +989,70 @@ async def restock_product_endpoint(
             product_id=request["product_id"],
             quantity=request["quantity"]
         )
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Failed to restock product: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/mcp/restock/bulk")
+async def bulk_restock_endpoint(
+    request: BulkRestockRequest,
+    db: DatabaseService = Depends(get_db_service)
+):
+    """Restock many products in one atomic UPDATE ... RETURNING"""
+    try:
+        from services.business_logic import BusinessLogic
+        logic = BusinessLogic(db)
+        return await logic.restock_products(
+            [(item.product_id, item.quantity) for item in request.items]
+        )
+    except QueryTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to bulk restock products: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/mcp/sales")
+async def record_sales_endpoint(
+    request: RecordSalesRequest,
+    db: DatabaseService = Depends(get_db_service)
+):
+    """Record sale events: decrement stock and append to inventory history"""
+    try:
+        from services.business_logic import BusinessLogic
+        logic = BusinessLogic(db)
+        return await logic.record_sales(
+            [(item.product_id, item.quantity) for item in request.items]
+        )
+    except QueryTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to record sales: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/mcp/reorder-forecast")
+async def get_reorder_forecast(
+    window_days: int = Query(30, ge=1, le=365, description="Days of sales history"),
+    lead_time_days: int = Query(7, ge=0, le=180, description="Reorder lead time"),
+    cover_days: int = Query(30, ge=1, le=365, description="Days of stock a reorder should cover"),
+    limit: int = Query(20, ge=1, le=500),
+    db: DatabaseService = Depends(get_db_service)
+):
+    """Forecast depletion rate and days of cover from recorded sales"""
+    try:
+        from services.business_logic import BusinessLogic
+        logic = BusinessLogic(db)
+        return await logic.get_reorder_forecast(window_days, lead_time_days, cover_days, limit)
+    except QueryTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to forecast reorders: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -566,13 +1065,13 @@ if __name__ == "__main__":
     )
 
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    chat_service=Depends(get_chat_service),
+):
     """
     Chat endpoint with Aurora AI using Strands SDK and MCP
     """
-    if not chat_service:
-        raise HTTPException(status_code=503, detail="Chat service not initialized")
-    
     try:
         # Convert conversation history to dict format
         history = [{"role": msg.role, "content": msg.content} for msg in request.conversation_history]
@@ -591,15 +1090,14 @@ async def chat(request: ChatRequest):
 
 
 @app.post("/api/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(
+    request: ChatRequest,
+    chat_service=Depends(get_chat_service),
+):
     """
     Streaming chat endpoint - sends agent thinking process in real-time
     """
     from fastapi.responses import StreamingResponse
-    import asyncio
-    
-    if not chat_service:
-        raise HTTPException(status_code=503, detail="Chat service not initialized")
     
     async def event_generator():
         try:
@@ -696,6 +1194,9 @@ async def agent_query(
         enable_thinking: Enable Claude Sonnet 4's extended thinking (default: False)
     """
     try:
+        # Agent tools need the database reference before agents import them
+        await agent_tools_subsystem.aget()
+        
         from agents.orchestrator import create_orchestrator
         from agents.inventory_agent import inventory_restock_agent
         from agents.recommendation_agent import product_recommendation_agent
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Analytics snapshot benchmark for BusinessLogic questions
+
+Compares the in-process NumPy snapshot (services/analytics_snapshot.py)
+with the SQL queries BusinessLogic runs when the snapshot is disabled, on
+synthetic catalogs of 21k and 2M rows. The synthetic rows are generated in
+a temporary table, so nothing in bedrock_integration is touched; the
+snapshot is built by reading that table back, which also times a reload.
+
+Usage:
+    cd lab2/backend
+    python benchmarks/analytics_snapshot_benchmark.py [--sizes 21000 2000000] [--repeat 5]
+    python benchmarks/analytics_snapshot_benchmark.py --no-db   # snapshot only
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(_name, "benchmark")
+
+from services.analytics_snapshot import CatalogSnapshot  # noqa: E402
+
+CATEGORIES = 250
+TABLE = "pg_temp.synthetic_catalog"
+
+CREATE_SQL = f"""
+    CREATE TEMP TABLE synthetic_catalog AS
+    SELECT
+        'P' || i AS "productId",
+        'Synthetic product ' || i AS product_description,
+        round((random() * 500)::numeric + 1, 2)::numeric(10,2) AS price,
+        round((random() * 4 + 1)::numeric, 2)::numeric(3,2) AS stars,
+        (random() * 5000)::int AS reviews,
+        (CASE WHEN random() < 0.1 THEN 0 ELSE (random() * 100)::int END) AS quantity,
+        'Category ' || (random() * {CATEGORIES - 1})::int AS category_name
+    FROM generate_series(1, %s) AS i
+"""
+
+SQL_QUERIES = {
+    "trending": f"""
+        SELECT "productId", product_description, price, stars, reviews,
+               category_name, quantity, (reviews * stars) as trending_score
+        FROM {TABLE}
+        WHERE quantity > 0 AND stars >= 4.0 AND reviews > 50
+        ORDER BY trending_score DESC, stars DESC
+        LIMIT 10
+    """,
+    "inventory_statistics": f"""
+        SELECT
+            COUNT(*) as total_products,
+            COUNT(CASE WHEN quantity = 0 THEN 1 END) as out_of_stock,
+            COUNT(CASE WHEN quantity > 0 AND quantity < 10 THEN 1 END) as low_stock,
+            COUNT(CASE WHEN quantity >= 10 THEN 1 END) as healthy_stock,
+            AVG(quantity) as avg_quantity,
+            SUM(quantity) as total_quantity
+        FROM {TABLE}
+    """,
+    "price_statistics": f"""
+        SELECT category_name, COUNT(*) as product_count,
+               MIN(price) as min_price, MAX(price) as max_price, AVG(price) as avg_price,
+               PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price) as median_price
+        FROM {TABLE}
+        WHERE quantity > 0
+        GROUP BY category_name
+        ORDER BY product_count DESC
+        LIMIT 10
+    """,
+}
+
+SNAPSHOT_QUERY = f"""
+    SELECT "productId", price::float8, stars::float8,
+           reviews::float8, quantity::float8, category_name
+    FROM {TABLE}
+"""
+
+
+def synthetic_snapshot(rows: int, seed: int = 406) -> CatalogSnapshot:
+    """Generate a snapshot directly in NumPy (no database)."""
+    rng = np.random.default_rng(seed)
+    quantity = np.where(rng.random(rows) < 0.1, 0, rng.integers(1, 100, rows)).astype(np.float64)
+    ids = np.array([f"P{i}" for i in range(rows)], dtype=object)
+    
+    return CatalogSnapshot(
+        product_ids=ids,
+        price=np.round(rng.random(rows) * 500 + 1, 2),
+        stars=np.round(rng.random(rows) * 4 + 1, 2),
+        reviews=rng.integers(0, 5000, rows).astype(np.float64),
+        quantity=quantity,
+        category_codes=rng.integers(0, CATEGORIES, rows).astype(np.int32),
+        categories=[f"Category {i}" for i in range(CATEGORIES)],
+    )
+
+
+def time_ms(fn, repeat: int) -> float:
+    """Median wall time of ``fn`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def snapshot_timings(snapshot: CatalogSnapshot, repeat: int) -> dict:
+    return {
+        "trending": time_ms(lambda: snapshot.trending(10), repeat),
+        "inventory_statistics": time_ms(snapshot.inventory_statistics, repeat),
+        "price_statistics": time_ms(lambda: snapshot.price_statistics(), repeat),
+    }
+
+
+def run_with_database(sizes: list[int], repeat: int) -> None:
+    import psycopg
+    from config import settings
+    
+    with psycopg.connect(settings.database_url, autocommit=True) as conn:
+        for rows in sizes:
+            conn.execute("DROP TABLE IF EXISTS pg_temp.synthetic_catalog")
+            conn.execute(CREATE_SQL, (rows,))
+            conn.execute(f"ANALYZE {TABLE}")
+            
+            start = time.perf_counter()
+            snapshot = CatalogSnapshot.from_rows(conn.execute(SNAPSHOT_QUERY).fetchall())
+            load_ms = (time.perf_counter() - start) * 1000
+            
+            sql_ms = {
+                name: time_ms(lambda q=query: conn.execute(q).fetchall(), repeat)
+                for name, query in SQL_QUERIES.items()
+            }
+            report(rows, snapshot_timings(snapshot, repeat), sql_ms, load_ms)
+            
+            # Sanity check: both paths agree on the stock bands
+            sql_stats = conn.execute(SQL_QUERIES["inventory_statistics"]).fetchone()
+            np_stats = snapshot.inventory_statistics()
+            assert sql_stats[:4] == (
+                np_stats["total_products"], np_stats["out_of_stock"],
+                np_stats["low_stock"], np_stats["healthy_stock"],
+            ), "snapshot and SQL stock bands differ"
+
+
+def report(rows: int, snapshot_ms: dict, sql_ms: dict = None, load_ms: float = None) -> None:
+    print(f"\n {rows:,} rows" + (f"  (snapshot load {load_ms:.0f}ms)" if load_ms is not None else ""))
+    print(f"   {'question':<24} {'snapshot':>12} {'sql':>12} {'speedup':>9}")
+    for name, ms in snapshot_ms.items():
+        if sql_ms:
+            print(f"   {name:<24} {ms:>10.2f}ms {sql_ms[name]:>10.2f}ms {sql_ms[name] / ms:>8.1f}x")
+        else:
+            print(f"   {name:<24} {ms:>10.2f}ms {'-':>12} {'-':>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the analytics snapshot against SQL")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[21000, 2000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-db", action="store_true", help="Time the snapshot only")
+    args = parser.parse_args()
+    
+    print("=" * 70)
+    print(" DAT406 - Analytics Snapshot vs SQL (median of %d runs)" % args.repeat)
+    print("=" * 70)
+    
+    if args.no_db:
+        for rows in args.sizes:
+            report(rows, snapshot_timings(synthetic_snapshot(rows), args.repeat))
+    else:
+        run_with_database(args.sizes, args.repeat)
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Category routing: latency and recall with and without pruning
+
+Embeds a set of shopping queries once, then runs /api/search's statements
+for each: unrouted (HNSW over the whole catalog) and routed to the 1, 2, 3
+and 5 nearest category centroids. Recall@limit is measured against an exact
+(sequential scan) nearest-neighbour search over the whole catalog, so it
+shows both what HNSW approximation loses and what pruning loses when the
+right products sit outside the routed categories.
+
+Needs the database (with category_centroids built) and Bedrock access.
+
+Usage:
+    cd lab2/backend
+    python benchmarks/category_routing_benchmark.py [--limit 10] [--routes 1 2 3 5] [--repeat 10]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.category_centroids import routing_statements  # noqa: E402
+from services.database import DatabaseService  # noqa: E402
+from services.embeddings import EmbeddingService  # noqa: E402
+from services.facets import DEFAULT_EF_SEARCH  # noqa: E402
+from services.query_parser import SearchFilters  # noqa: E402
+
+QUERIES = [
+    "wireless noise cancelling headphones",
+    "security camera with night vision",
+    "robot vacuum for pet hair",
+    "mechanical gaming keyboard",
+    "fitness tracker for running",
+    "waterproof portable bluetooth speaker",
+    "usb c charging cable",
+    "smart home video doorbell",
+    "ergonomic office chair",
+    "gift for a teenager who games",
+    "comfortable earbuds for small ears",
+    "home office setup",
+]
+
+SEARCH_QUERY = """
+    SELECT "productId"
+    FROM bedrock_integration.product_catalog
+    WHERE 1 - (embedding <=> %(embedding)s::vector) >= 0{filters}
+    ORDER BY embedding <=> %(embedding)s::vector
+    LIMIT %(limit)s
+"""
+
+
+def search_statements(embedding, limit: int, routes: int | None, exact: bool = False) -> list:
+    """Statements as /api/search issues them (exact=True scans the whole catalog)."""
+    filters = SearchFilters(nearest_categories=routes) if routes else SearchFilters()
+    statements = routing_statements(embedding, routes) if routes else []
+    if exact:
+        statements.append(("SELECT set_config('enable_indexscan', 'off', true)", ()))
+    elif limit > DEFAULT_EF_SEARCH:
+        statements.append(("SELECT set_config('hnsw.ef_search', %s, true)", (str(limit),)))
+    statements.append((
+        SEARCH_QUERY.format(filters=filters.sql()),
+        {"embedding": embedding, "limit": limit, **filters.params()},
+    ))
+    return statements
+
+
+async def timed_search(db: DatabaseService, embedding, limit: int, routes: int | None, exact: bool = False):
+    start = time.perf_counter()
+    *_, rows = await db.pipeline(search_statements(embedding, limit, routes, exact))
+    return [row["productId"] for row in rows], (time.perf_counter() - start) * 1000
+
+
+async def main(limit: int, route_counts: list[int], repeat: int) -> int:
+    db = DatabaseService()
+    await db.connect()
+    embeddings = EmbeddingService()
+    
+    try:
+        vectors = [embeddings.generate_embedding(query) for query in QUERIES]
+        truth = [set((await timed_search(db, vector, limit, None, exact=True))[0]) for vector in vectors]
+        
+        print("=" * 70)
+        print(f" Category routing: {len(QUERIES)} queries, recall@{limit} vs exact scan, "
+              f"median of {repeat}")
+        print("=" * 70)
+        print(f"   {'mode':<22} {'p50 ms':>8} {'p95 ms':>8} {'recall':>8} {'min recall':>11}")
+        
+        for routes in [None, *route_counts]:
+            latencies, recalls = [], []
+            for vector, expected in zip(vectors, truth):
+                ids, _ = await timed_search(db, vector, limit, routes)
+                recalls.append(len(expected & set(ids)) / max(1, len(expected)))
+                for _ in range(repeat):
+                    latencies.append((await timed_search(db, vector, limit, routes))[1])
+            
+            latencies.sort()
+            mode = "unrouted (HNSW)" if routes is None else f"routed to {routes} categor{'y' if routes == 1 else 'ies'}"
+            print(f"   {mode:<22} {statistics.median(latencies):>8.2f} "
+                  f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f} "
+                  f"{statistics.mean(recalls):>8.3f} {min(recalls):>11.3f}")
+        
+        print("=" * 70)
+    finally:
+        await db.disconnect()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark category-routed search")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--routes", type=int, nargs="+", default=[1, 2, 3, 5])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.limit, args.routes, args.repeat)))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Per-row overhead of numeric loading: Decimal + convert_decimals vs FloatLoader
+
+Loads the same raw text-format rows (shaped like the trending query) through
+psycopg's loaders twice: once with the default numeric -> Decimal loader
+followed by the recursive convert_decimals walk BusinessLogic used to do,
+and once with the float loader registered by configure_connection. No
+database is needed; the rows are decoded exactly as psycopg decodes results.
+
+Usage:
+    cd lab2/backend
+    python benchmarks/numeric_loader_benchmark.py [--rows 10000] [--repeat 7]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import psycopg
+from psycopg.adapt import AdaptersMap, Transformer
+from psycopg.pq import Format
+from psycopg.types.numeric import FloatLoader
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(_name, "benchmark")
+
+from services.business_logic import convert_decimals  # noqa: E402
+
+TEXT_OID, INT4_OID, NUMERIC_OID = 25, 23, 1700
+
+# productId, description, price, stars, reviews, category, quantity, trending_score
+COLUMNS = [
+    ("productId", TEXT_OID),
+    ("product_description", TEXT_OID),
+    ("price", NUMERIC_OID),
+    ("stars", NUMERIC_OID),
+    ("reviews", INT4_OID),
+    ("category_name", TEXT_OID),
+    ("quantity", INT4_OID),
+    ("trending_score", NUMERIC_OID),
+]
+
+
+class _Context:
+    """Minimal adaptation context (no connection needed to load values)."""
+    
+    def __init__(self, adapters: AdaptersMap):
+        self.adapters = adapters
+        self.connection = None
+
+
+def raw_rows(count: int) -> list[list[bytes]]:
+    """Text-format wire values for ``count`` rows."""
+    return [
+        [
+            f"B0{i:08d}".encode(),
+            f"Synthetic product {i} with a reasonably long description".encode(),
+            f"{(i % 50000) / 100 + 1:.2f}".encode(),
+            f"{1 + (i % 400) / 100:.2f}".encode(),
+            str(i % 5000).encode(),
+            f"Category {i % 250}".encode(),
+            str(i % 100).encode(),
+            f"{(i % 5000) * (1 + (i % 400) / 100):.2f}".encode(),
+        ]
+        for i in range(count)
+    ]
+
+
+def make_transformer(float_numeric: bool) -> Transformer:
+    adapters = AdaptersMap(psycopg.adapters)
+    if float_numeric:
+        adapters.register_loader("numeric", FloatLoader)
+    tx = Transformer(_Context(adapters))
+    tx.set_loader_types([oid for _, oid in COLUMNS], Format.TEXT)
+    return tx
+
+
+def decimal_path(tx: Transformer, rows: list, names: list) -> list:
+    """Before: Decimal loader, dict_row, then convert_decimals(dict(row))."""
+    return [convert_decimals(dict(zip(names, tx.load_sequence(row)))) for row in rows]
+
+
+def float_path(tx: Transformer, rows: list, names: list) -> list:
+    """After: float loader and dict_row; rows are used as-is."""
+    return [dict(zip(names, tx.load_sequence(row))) for row in rows]
+
+
+def per_row_us(fn, rows: list, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        samples.append((time.perf_counter() - start) / len(rows) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark numeric row loading")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    
+    rows = raw_rows(args.rows)
+    names = [name for name, _ in COLUMNS]
+    decimal_tx, float_tx = make_transformer(False), make_transformer(True)
+    
+    assert decimal_path(decimal_tx, rows[:100], names) == float_path(float_tx, rows[:100], names)
+    
+    before = per_row_us(lambda r: decimal_path(decimal_tx, r, names), rows, args.repeat)
+    after = per_row_us(lambda r: float_path(float_tx, r, names), rows, args.repeat)
+    
+    print("=" * 70)
+    print(f" Numeric loading, {args.rows:,} rows x {len(COLUMNS)} columns "
+          f"(median of {args.repeat})")
+    print("=" * 70)
+    print(f"   Decimal loader + convert_decimals   {before:>8.2f} us/row")
+    print(f"   FloatLoader (configure_connection)  {after:>8.2f} us/row")
+    print(f"   Saved per row                       {before - after:>8.2f} us ({before / after:.1f}x)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
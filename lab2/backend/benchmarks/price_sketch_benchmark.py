@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Price percentile sketches: accuracy and latency vs exact sorting
+
+Builds one t-digest per category from synthetic catalog prices and compares
+p50/p90/p99 against exact percentiles, per category and for the merged
+catalog-wide digest. Also times the incremental path (adding a batch of
+restocked prices to an existing digest) against re-sorting the category.
+No database is needed.
+
+Usage:
+    cd lab2/backend
+    python benchmarks/price_sketch_benchmark.py [--products 21000] [--categories 250]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(_name, "benchmark")
+
+from services.quantile_sketch import REPORTED_QUANTILES, TDigest  # noqa: E402
+
+
+def synthetic_prices(products: int, categories: int, seed: int = 7) -> dict:
+    """Log-normal prices with a different scale per category and skewed sizes."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.zipf(1.6, categories).astype(float)
+    sizes = np.maximum(1, (sizes / sizes.sum() * products).astype(int))
+    return {
+        f"Category {i}": np.round(rng.lognormal(rng.uniform(2, 5), 0.8, size), 2)
+        for i, size in enumerate(sizes)
+    }
+
+
+def rank_error(values: np.ndarray, estimate: float, q: float) -> float:
+    """Distance between the estimate's true rank and q, as a fraction of n."""
+    return abs(np.searchsorted(np.sort(values), estimate) / values.size - q)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark price quantile sketches")
+    parser.add_argument("--products", type=int, default=21000)
+    parser.add_argument("--categories", type=int, default=250)
+    parser.add_argument("--compression", type=float, default=100.0)
+    args = parser.parse_args()
+    
+    prices = synthetic_prices(args.products, args.categories)
+    everything = np.concatenate(list(prices.values()))
+    
+    start = time.perf_counter()
+    digests = {name: TDigest(args.compression).update(values) for name, values in prices.items()}
+    for digest in digests.values():
+        digest.quantile(0.5)
+    build_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    for values in prices.values():
+        np.percentile(values, [50, 90, 99])
+    exact_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    for digest in digests.values():
+        [digest.quantile(q) for q in REPORTED_QUANTILES]
+    sketch_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    merged = TDigest.merge(digests.values(), args.compression)
+    merge_ms = (time.perf_counter() - start) * 1000
+    
+    largest = max(prices, key=lambda name: prices[name].size)
+    # Rank error is only meaningful once a category has a few hundred prices
+    sizable = [name for name in prices if prices[name].size >= 200]
+    errors = {q: max(rank_error(prices[n], digests[n].quantile(q), q) for n in sizable)
+              for q in REPORTED_QUANTILES}
+    
+    print("=" * 70)
+    print(f" {everything.size:,} prices in {len(prices)} categories "
+          f"(largest {prices[largest].size:,}), compression {args.compression:g}")
+    print("=" * 70)
+    print(f"   Build all digests                {build_ms:>9.2f} ms")
+    print(f"   Exact p50/p90/p99 (sort)         {exact_ms:>9.2f} ms")
+    print(f"   Sketch p50/p90/p99               {sketch_ms:>9.2f} ms")
+    print(f"   Merge into catalog-wide digest   {merge_ms:>9.2f} ms "
+          f"({merged.centroid_count} centroids)")
+    print()
+    print(f"   Rank error ({len(sizable)} categories with >= 200 prices, and merged)")
+    print(f"   {'quantile':<10}{'worst category':>16}{'merged':>12}{'merged bound':>16}")
+    for q in REPORTED_QUANTILES:
+        merged_error = rank_error(everything, merged.quantile(q), q)
+        print(f"   p{int(q * 100):<9}{errors[q]:>16.4f}{merged_error:>12.4f}{merged.rank_error(q):>16.4f}")
+    print("   (rank error as a fraction of the category size)")
+    
+    restocked = np.round(np.random.default_rng(1).lognormal(3, 0.8, 100), 2)
+    digest = digests[largest]
+    start = time.perf_counter()
+    digest.update(restocked)
+    digest.quantile(0.99)
+    incremental_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    np.percentile(np.concatenate([prices[largest], restocked]), [50, 90, 99])
+    resort_ms = (time.perf_counter() - start) * 1000
+    print()
+    print(f"   +100 prices into '{largest}': sketch {incremental_ms:.3f} ms, "
+          f"re-sort {resort_ms:.3f} ms")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
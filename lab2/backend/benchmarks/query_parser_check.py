@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Query parser check
+
+Runs services.query_parser over every sample query in SAMPLE_QUERIES_GUIDE.md
+(quoted chat queries, agent "query" payloads and "User:" turns), checks the
+queries with known constraints against their expected filters and residual
+text, confirms the rest pass through unchanged, and reports parse time.
+No database or Bedrock access is needed.
+
+Usage:
+    cd lab2/backend
+    python benchmarks/query_parser_check.py [--guide ../../SAMPLE_QUERIES_GUIDE.md] [--repeat 2000] [--verbose]
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.query_parser import parse_query  # noqa: E402
+
+DEFAULT_GUIDE = Path(__file__).resolve().parents[3] / "SAMPLE_QUERIES_GUIDE.md"
+
+_QUOTED_LINE = re.compile(r'^\s*"(?P<q>[^"]+)"\s*$')
+_JSON_QUERY = re.compile(r'"query":\s*"(?P<q>[^"]+)"')
+_USER_TURN = re.compile(r'^User:\s*"(?P<q>[^"]+)"')
+
+# query -> (residual text, filters, category hint); queries not listed here
+# must come back unchanged with no filters
+EXPECTED = {
+    "Recommend wireless headphones under $200":
+        ("Recommend wireless headphones", {"max_price": 200.0}, None),
+    "I need a gift for my dad who loves tech gadgets, budget around $150":
+        ("I need a gift for my dad who loves tech gadgets", {"max_price": 150.0}, None),
+    "Show me the best wireless earbuds under $100":
+        ("Show me the best wireless earbuds", {"max_price": 100.0}, None),
+    "I want quality headphones but don't want to spend more than $75":
+        ("I want quality headphones", {"max_price": 75.0}, None),
+    "Show me only 5-star rated products":
+        ("Show me only products", {"min_stars": 5.0}, None),
+    "Show me out of stock items":
+        ("Show me items", {"in_stock": False}, None),
+    "Inventory status for headphones category":
+        ("Inventory status", {}, "headphones"),
+    "I need a gift for my dad who loves tech, around $150":
+        ("I need a gift for my dad who loves tech", {"min_price": 120.0, "max_price": 180.0}, None),
+    "Best wireless earbuds under $100?":
+        ("Best wireless earbuds", {"max_price": 100.0}, None),
+}
+
+# Phrasings the guide does not cover, including the request's own example
+EXTRA = {
+    "wireless headphones under $100 with 4+ stars":
+        ("wireless headphones", {"max_price": 100.0, "min_stars": 4.0}, None),
+    "laptops between $500 and $1,000 in stock":
+        ("laptops", {"min_price": 500.0, "max_price": 1000.0, "in_stock": True}, None),
+    "security cameras rated 4.5 or higher":
+        ("security cameras", {"min_stars": 4.5}, None),
+    "portable speakers $50-$100":
+        ("portable speakers", {"min_price": 50.0, "max_price": 100.0}, None),
+    "mechanical keyboard 100 dollars or less":
+        ("mechanical keyboard", {"max_price": 100.0}, None),
+    "highly rated vacuum for pet hair":
+        ("vacuum for pet hair", {"min_stars": 4.0}, None),
+    "I need headphones with at least 20 hours battery life":
+        ("I need headphones with at least 20 hours battery life", {}, None),
+    "Compare Sony WH-1000XM5 vs Bose QC45":
+        ("Compare Sony WH-1000XM5 vs Bose QC45", {}, None),
+    "shoes for 5 star hotel":
+        ("shoes for 5 star hotel", {}, None),
+    "4 stars and up bluetooth speaker":
+        ("bluetooth speaker", {"min_stars": 4.0}, None),
+}
+
+
+def guide_queries(path: Path) -> list[str]:
+    """Sample queries from the guide, in order, without duplicates."""
+    queries: dict[str, None] = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        for pattern in (_QUOTED_LINE, _JSON_QUERY, _USER_TURN):
+            match = pattern.search(line)
+            if match:
+                queries[match.group("q").strip()] = None
+                break
+    return list(queries)
+
+
+def check(query: str, expected: tuple) -> list[str]:
+    """Differences between the parse of ``query`` and ``expected``."""
+    text, filters, hint = expected
+    parsed = parse_query(query)
+    actual_filters = {name: value for name, value in parsed.filters.as_dict().items() if value is not None}
+    problems = []
+    if parsed.text != text:
+        problems.append(f"text {parsed.text!r} != {text!r}")
+    if actual_filters != filters:
+        problems.append(f"filters {actual_filters} != {filters}")
+    if parsed.category_hint != hint:
+        problems.append(f"category_hint {parsed.category_hint!r} != {hint!r}")
+    return problems
+
+
+def median_us(query: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse_query(query)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the search query parser against the sample queries")
+    parser.add_argument("--guide", type=Path, default=DEFAULT_GUIDE)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--verbose", action="store_true", help="Print every parse")
+    args = parser.parse_args()
+    
+    corpus = guide_queries(args.guide)
+    missing = [query for query in EXPECTED if query not in corpus]
+    cases = {query: EXPECTED.get(query, (query, {}, None)) for query in corpus}
+    cases.update(EXTRA)
+    
+    print("=" * 78)
+    print(f" Query parser: {len(corpus)} guide queries + {len(EXTRA)} extra phrasings")
+    print("=" * 78)
+    
+    failures = 0
+    for query, expected in cases.items():
+        problems = check(query, expected)
+        parsed = parse_query(query)
+        if problems or args.verbose or parsed.phrases:
+            status = "FAIL" if problems else "ok"
+            print(f"   {status:<4} {query}")
+            if parsed.phrases:
+                print(f"        -> {parsed.as_dict()}")
+            for problem in problems:
+                print(f"        !! {problem}")
+        failures += bool(problems)
+    for query in missing:
+        print(f"   FAIL expected query not found in guide: {query}")
+    
+    extracted = [query for query in cases if parse_query(query).phrases]
+    plain = [query for query in cases if not parse_query(query).phrases]
+    with_filters = [median_us(query, args.repeat) for query in extracted]
+    without = [median_us(query, args.repeat) for query in plain]
+    
+    print("-" * 78)
+    print(f"   {len(extracted)} queries with extracted phrases: median {statistics.median(with_filters):.1f}us, "
+          f"max {max(with_filters):.1f}us")
+    print(f"   {len(plain)} queries passed through:        median {statistics.median(without):.1f}us, "
+          f"max {max(without):.1f}us")
+    print(f"   {failures + len(missing)} failure(s)")
+    print("=" * 78)
+    sys.exit(1 if failures or missing else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Search response serialization: Pydantic models vs the fast JSON path
+
+Builds /api/search responses for 10, 50 and 100 rows the way the endpoint
+used to (ProductWithScore + SearchResult + SearchResponse, then FastAPI's
+response_model validation and JSON encoding) and the way it does now
+(project_rows + FastJSONResponse). Also reports the body size with the
+gzip and brotli encodings CompressionMiddleware negotiates. No database
+is needed.
+
+Usage:
+    cd lab2/backend
+    python benchmarks/serialization_benchmark.py [--rows 10 50 100] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(_name, "benchmark")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi._compat import ModelField  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from models.product import ProductWithScore  # noqa: E402
+from models.search import SearchResponse, SearchResult  # noqa: E402
+from services.serialization import FastJSONResponse, model_fields, orjson, project_rows  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FIELDS = model_fields(ProductWithScore)
+
+
+def search_rows(count: int) -> list[dict]:
+    """Rows shaped like the semantic search query returns them."""
+    return [
+        {
+            "productId": f"B0{i:08d}",
+            "product_description": f"Wireless noise cancelling headphones model {i} with 30 hour battery",
+            "imgurl": f"https://m.media-amazon.com/images/I/{i:08d}.jpg",
+            "producturl": f"https://www.amazon.com/dp/B0{i:08d}",
+            "stars": 4.0 + (i % 10) / 10,
+            "reviews": 100 + i * 7,
+            "price": 19.99 + i,
+            "category_id": i % 40,
+            "isbestseller": i % 5 == 0,
+            "boughtinlastmonth": i * 3,
+            "category_name": "Headphones & Earbuds",
+            "quantity": i % 60,
+            "similarity_score": 0.9 - i / 1000,
+        }
+        for i in range(count)
+    ]
+
+
+async def pydantic_path(rows: list[dict], field: ModelField) -> bytes:
+    """Before: one model per row, then response_model validation and encoding."""
+    results = [SearchResult(product=ProductWithScore(**dict(row))) for row in rows]
+    content = SearchResponse(
+        query="wireless headphones", results=results, total_results=len(results),
+        search_time_ms=12.5, search_type="semantic",
+    )
+    encoded = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return JSONResponse(encoded).body
+
+
+def fast_path(rows: list[dict]) -> bytes:
+    """After: trusted rows projected onto the model fields, encoded once."""
+    return FastJSONResponse({
+        "query": "wireless headphones",
+        "results": [{"product": product, "explanation": None} for product in project_rows(rows, FIELDS)],
+        "total_results": len(rows),
+        "search_time_ms": 12.5,
+        "search_type": "semantic",
+    }).body
+
+
+def median_us(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark search response serialization")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    
+    field = create_model_field(name="Response_search", type_=SearchResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+    
+    print("=" * 78)
+    print(f" Search response serialization (median of {args.repeat}, "
+          f"encoder: {'orjson' if orjson else 'json'}, brotli: {'yes' if brotli else 'no'})")
+    print("=" * 78)
+    print(f"   {'rows':>5} {'pydantic':>11} {'fast':>9} {'speedup':>8} "
+          f"{'json':>8} {'gzip':>8} {'br':>8}")
+    
+    for count in args.rows:
+        rows = search_rows(count)
+        before_body = loop.run_until_complete(pydantic_path(rows, field))
+        after_body = fast_path(rows)
+        assert json.loads(before_body) == json.loads(after_body), "fast path changed the response"
+        
+        before = median_us(lambda: loop.run_until_complete(pydantic_path(rows, field)), args.repeat)
+        after = median_us(lambda: fast_path(rows), args.repeat)
+        gzip_size = len(gzip.compress(after_body, compresslevel=6))
+        br_size = f"{len(brotli.compress(after_body, quality=4)):>7}B" if brotli else f"{'-':>8}"
+        
+        print(f"   {count:>5} {before:>9.0f}us {after:>7.0f}us {before / after:>7.1f}x "
+              f"{len(after_body):>7}B {gzip_size:>7}B {br_size}")
+    
+    print("=" * 78)
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the DAT406 API process
+
+Measures how long a fresh interpreter takes to import the FastAPI app and
+records per-module import time using CPython's ``-X importtime``. Run it
+before and after changes that touch module-level imports to keep search
+workers quick to become ready.
+
+Usage:
+    cd lab2/backend
+    python benchmarks/startup_benchmark.py [--runs 5] [--top 25]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Subsystems worth tracking individually (present or absent from startup)
+TRACKED_MODULES = [
+    "app",
+    "config",
+    "fastapi",
+    "pydantic",
+    "psycopg",
+    "psycopg_pool",
+    "pgvector.psycopg",
+    "boto3",
+    "botocore",
+    "services.database",
+    "services.embeddings",
+    "services.bedrock",
+    "services.chat",
+    "services.agent_tools",
+    "strands",
+    "mcp",
+    "agents.orchestrator",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _environment() -> dict:
+    """Environment for the child interpreter; settings only need placeholders."""
+    env = dict(os.environ)
+    for name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+        env.setdefault(name, "benchmark")
+    return env
+
+
+def measure_import(runs: int) -> tuple[list[float], dict[str, tuple[int, int, int]]]:
+    """
+    Import the app in fresh interpreters.
+
+    Returns:
+        Wall-clock import times in ms, and per-module
+        (self_us, cumulative_us, depth) from the last run
+    """
+    wall_times = []
+    modules: dict[str, tuple[int, int, int]] = {}
+
+    code = (
+        "import time; start = time.perf_counter(); import app; "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=BACKEND_DIR,
+            env=_environment(),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing app failed:\n{result.stderr[-2000:]}")
+
+        wall_times.append(float(result.stdout.strip().splitlines()[-1]))
+
+        modules = {}
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+
+    return wall_times, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure API process import time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=25, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    wall_times, modules = measure_import(args.runs)
+
+    print("=" * 70)
+    print(" DAT406 API - Startup Import Benchmark")
+    print("=" * 70)
+    print(f" import app (wall, {args.runs} runs): "
+          f"median {statistics.median(wall_times):.1f}ms, "
+          f"min {min(wall_times):.1f}ms, max {max(wall_times):.1f}ms")
+    print(f" Modules imported: {len(modules)}")
+
+    print("\n Tracked subsystems (cumulative import time):")
+    for name in TRACKED_MODULES:
+        if name in modules:
+            print(f"   {name:<24} {modules[name][1] / 1000:>9.1f}ms")
+        else:
+            print(f"   {name:<24} {'not imported':>11}")
+
+    print(f"\n Top {args.top} modules by cumulative import time:")
+    ranked = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us, _) in ranked[:args.top]:
+        print(f"   {name:<40} self {self_us / 1000:>7.1f}ms   cumulative {cumulative_us / 1000:>8.1f}ms")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
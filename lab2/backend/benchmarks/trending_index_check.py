@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Trending leaderboard check
+
+Confirms that get_trending_products returns the same leaderboard as the
+original full-scan-and-sort query, and that its statement (TRENDING_QUERY)
+is planned on the partial expression index idx_product_trending. Reports
+the latency of both.
+
+Usage:
+    cd lab2/backend
+    python benchmarks/trending_index_check.py [--limits 5 10 50] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.business_logic import TRENDING_QUERY, BusinessLogic, convert_decimals  # noqa: E402
+from services.database import DatabaseService  # noqa: E402
+
+# The query as it ran before the index existed
+REFERENCE_QUERY = """
+    SELECT
+        "productId",
+        product_description,
+        price,
+        stars,
+        reviews,
+        category_name,
+        quantity,
+        (reviews * stars) as trending_score
+    FROM bedrock_integration.product_catalog
+    WHERE quantity > 0
+      AND stars >= 4.0
+      AND reviews > 50
+    ORDER BY trending_score DESC, stars DESC
+    LIMIT %s
+"""
+
+
+async def run_leaderboard(db: DatabaseService, query: str, limit: int, use_index: bool) -> tuple[list, str, float]:
+    """Run a leaderboard query with or without index scans; return rows, plan and ms."""
+    async with db.get_connection() as conn:
+        if not use_index:
+            await conn.execute("SET LOCAL enable_indexscan = off")
+            await conn.execute("SET LOCAL enable_bitmapscan = off")
+        
+        cur = await conn.execute("EXPLAIN " + query, (limit,))
+        plan = "\n".join(row["QUERY PLAN"] for row in await cur.fetchall())
+        
+        start = time.perf_counter()
+        cur = await conn.execute(query, (limit,))
+        rows = await cur.fetchall()
+        elapsed = (time.perf_counter() - start) * 1000
+        await conn.rollback()
+    
+    return [convert_decimals(dict(row)) for row in rows], plan, elapsed
+
+
+def same_leaderboard(expected: list, actual: list) -> bool:
+    """Scores must match position by position; IDs may only differ within exact ties."""
+    if [(p["trending_score"], p["stars"]) for p in expected] != [(p["trending_score"], p["stars"]) for p in actual]:
+        return False
+    
+    by_key: dict = {}
+    for product in expected:
+        by_key.setdefault((product["trending_score"], product["stars"]), set()).add(product["productId"])
+    boundary = (expected[-1]["trending_score"], expected[-1]["stars"]) if expected else None
+    
+    for product in actual:
+        key = (product["trending_score"], product["stars"])
+        # The last tie group can be cut at different rows by LIMIT
+        if product["productId"] not in by_key[key] and key != boundary:
+            return False
+    return True
+
+
+async def main(limits: list[int], repeat: int) -> int:
+    db = DatabaseService()
+    await db.connect()
+    logic = BusinessLogic(db)
+    failures = 0
+    
+    try:
+        for limit in limits:
+            expected, scan_plan, _ = await run_leaderboard(db, REFERENCE_QUERY, limit, use_index=False)
+            # The statement get_trending_products runs, as the planner sees it
+            _, index_plan, _ = await run_leaderboard(db, TRENDING_QUERY, limit, use_index=True)
+            
+            result = await logic.get_trending_products(limit)
+            matches = same_leaderboard(expected, result["products"])
+            uses_index = "idx_product_trending" in index_plan
+            failures += (not matches) + (not uses_index)
+            
+            scan_ms = statistics.median(
+                [(await run_leaderboard(db, REFERENCE_QUERY, limit, use_index=False))[2] for _ in range(repeat)]
+            )
+            index_ms = statistics.median(
+                [(await run_leaderboard(db, TRENDING_QUERY, limit, use_index=True))[2] for _ in range(repeat)]
+            )
+            
+            print(f"limit={limit:<4} match={'✅' if matches else '❌'} "
+                  f"index={'✅' if uses_index else '❌'} "
+                  f"scan {scan_ms:.2f}ms -> index {index_ms:.2f}ms")
+            if not uses_index:
+                print(f"  plan without idx_product_trending:\n{index_plan}")
+            if not matches:
+                print(f"  first mismatch candidates: {[p['productId'] for p in expected][:5]} "
+                      f"vs {[p['productId'] for p in result['products']][:5]}")
+        
+        print(f"\nScan plan for reference:\n{scan_plan}")
+    finally:
+        await db.disconnect()
+    
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the trending leaderboard index")
+    parser.add_argument("--limits", type=int, nargs="+", default=[5, 10, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.limits, args.repeat)))
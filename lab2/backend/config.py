@@ -80,6 +80,20 @@ class Settings(BaseSettings):
     DB_POOL_TIMEOUT: int = 30  # seconds
     DB_CONNECT_TIMEOUT: int = 10  # seconds
     
+    # ========================================
+    # Request Deadlines
+    # ========================================
+    # Default deadline for queries issued while serving a request.
+    # Clients may lower or raise it (up to the max) with the header below.
+    REQUEST_TIMEOUT_MS: int = 15000
+    MAX_REQUEST_TIMEOUT_MS: int = 60000
+    REQUEST_TIMEOUT_HEADER: str = "X-Request-Timeout-Ms"
+    
+    # Long-running LLM routes manage their own budgets; agent SQL is
+    # bounded per statement by AGENT_QUERY_TIMEOUT_MS instead
+    REQUEST_DEADLINE_EXEMPT_PREFIXES: list[str] = ["/api/chat", "/api/agents"]
+    AGENT_QUERY_TIMEOUT_MS: int = 10000
+    
     # ========================================
     # Search Configuration
     # ========================================
@@ -97,6 +111,20 @@ class Settings(BaseSettings):
     ENABLE_CACHE: bool = False
     CACHE_TTL: int = 300  # seconds
     
+    # Optional in-process NumPy snapshot of the catalog's analytic columns
+    # (price, stars, reviews, quantity, category) used by BusinessLogic.
+    # Reloaded in the background when the catalog data_version changes; the
+    # version is checked at most once per interval.
+    ANALYTICS_SNAPSHOT_ENABLED: bool = False
+    ANALYTICS_SNAPSHOT_CHECK_INTERVAL_MS: int = 1000
+    
+    # Read-through LRU of product rows for /api/products lookups; entries
+    # are dropped by the change feed and re-read after CACHE_TTL at most
+    PRODUCT_CACHE_SIZE: int = 5000
+    
+    # Responses smaller than this are sent uncompressed (br/gzip otherwise)
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+    
     # ========================================
     # Logging Configuration
     # ========================================
@@ -243,6 +271,10 @@ def validate_config() -> None:
     if settings.DB_POOL_MIN_SIZE > settings.DB_POOL_MAX_SIZE:
         raise ValueError("DB_POOL_MIN_SIZE cannot exceed DB_POOL_MAX_SIZE")
     
+    # Validate request deadlines
+    if settings.REQUEST_TIMEOUT_MS > settings.MAX_REQUEST_TIMEOUT_MS:
+        raise ValueError("REQUEST_TIMEOUT_MS cannot exceed MAX_REQUEST_TIMEOUT_MS")
+    
     # Validate search limits
     if settings.DEFAULT_SEARCH_LIMIT > settings.MAX_SEARCH_LIMIT:
         raise ValueError("DEFAULT_SEARCH_LIMIT cannot exceed MAX_SEARCH_LIMIT")
@@ -0,0 +1,191 @@
+"""
+ASGI middleware for DAT406 Workshop Backend
+
+Applies per-request query deadlines and cancels in-flight work when the
+client disconnects, so abandoned requests stop holding pooled connections.
+Compresses JSON responses with the best encoding the client accepts.
+"""
+
+import asyncio
+import gzip
+import logging
+from contextlib import suppress
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from config import settings
+from services.database import request_deadline
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only without brotli
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class RequestDeadlineMiddleware:
+    """
+    Bound database work per request and cancel it on client disconnect.
+    
+    The deadline comes from ``settings.REQUEST_TIMEOUT_MS`` or, when present,
+    the ``settings.REQUEST_TIMEOUT_HEADER`` request header (clamped to
+    ``settings.MAX_REQUEST_TIMEOUT_MS``). ``DatabaseService`` enforces it
+    with ``statement_timeout`` on every query it runs.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self._header = settings.REQUEST_TIMEOUT_HEADER.lower().encode("latin-1")
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        messages: asyncio.Queue = asyncio.Queue()
+        disconnected = asyncio.Event()
+        
+        async def pump_receive():
+            # Forward client messages to the app while watching for disconnect
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+        
+        # The task copies the current context, deadline included
+        with request_deadline(self._timeout_ms(scope)):
+            app_task = asyncio.create_task(self.app(scope, messages.get, send))
+        pump_task = asyncio.create_task(pump_receive())
+        disconnect_task = asyncio.create_task(disconnected.wait())
+        
+        try:
+            await asyncio.wait(
+                {app_task, disconnect_task},
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not app_task.done():
+                logger.info(f"Client disconnected, cancelling {scope['path']}")
+                app_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await app_task
+                return
+            app_task.result()
+        finally:
+            for task in (app_task, pump_task, disconnect_task):
+                if not task.done():
+                    task.cancel()
+    
+    def _timeout_ms(self, scope) -> Optional[int]:
+        """Resolve the deadline for a request, or None if it is exempt."""
+        path = scope.get("path", "")
+        if any(path.startswith(prefix) for prefix in settings.REQUEST_DEADLINE_EXEMPT_PREFIXES):
+            return None
+        
+        for name, value in scope.get("headers", []):
+            if name == self._header:
+                try:
+                    requested = int(value.decode("latin-1"))
+                except ValueError:
+                    break
+                if requested > 0:
+                    return min(requested, settings.MAX_REQUEST_TIMEOUT_MS)
+                break
+        
+        return settings.REQUEST_TIMEOUT_MS
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli / gzip compression for buffered responses.
+    
+    Picks ``br`` (when the brotli package is installed) or ``gzip`` from the
+    request's Accept-Encoding, honouring q-values. Only single-message
+    bodies of at least ``settings.RESPONSE_COMPRESSION_MIN_BYTES`` with a
+    JSON or text content type are compressed; streaming responses (chat
+    SSE) pass through untouched so tokens are not held back.
+    """
+    
+    COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/css", "application/javascript")
+    
+    def __init__(self, app):
+        self.app = app
+        self.minimum_size = settings.RESPONSE_COMPRESSION_MIN_BYTES
+        self.available = ("br", "gzip") if brotli is not None else ("gzip",)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = self._negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        pending_start = None
+        
+        async def send_compressed(message):
+            nonlocal pending_start
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk shows the size
+                pending_start = message
+                return
+            
+            if message["type"] == "http.response.body" and pending_start is not None:
+                start, pending_start = pending_start, None
+                body = message.get("body", b"")
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                
+                if (message.get("more_body", False)
+                        or len(body) < self.minimum_size
+                        or "content-encoding" in headers
+                        or not headers.get("content-type", "").startswith(self.COMPRESSIBLE_TYPES)):
+                    await send(start)
+                    await send(message)
+                    return
+                
+                compressed = self._compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                await send(start)
+                await send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+            
+            await send(message)
+        
+        await self.app(scope, receive, send_compressed)
+    
+    def _negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Choose the supported encoding with the highest q-value (br wins ties)."""
+        accepted = {}
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name.strip()] = quality
+        
+        wildcard = accepted.get("*", 0.0)
+        best, best_quality = None, 0.0
+        for encoding in self.available:
+            quality = accepted.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+    
+    @staticmethod
+    def _compress(body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            # Quality 4: most of brotli's size win at gzip-like speed
+            return brotli.compress(body, quality=4)
+        return gzip.compress(body, compresslevel=6)
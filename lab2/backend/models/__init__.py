@@ -1,7 +1,16 @@
 """
 Pydantic models for DAT406 Workshop Backend
 """
-from .product import Product, ProductWithScore, ProductSearchResult, ProductFilters
+from .product import (
+    Product,
+    ProductWithScore,
+    ProductSearchResult,
+    ProductFilters,
+    RestockItem,
+    BulkRestockRequest,
+    SaleItem,
+    RecordSalesRequest,
+)
 from .search import SearchRequest, SearchResponse, SearchResult
 
 __all__ = [
@@ -9,6 +18,10 @@ __all__ = [
     "ProductWithScore",
     "ProductSearchResult",
     "ProductFilters",
+    "RestockItem",
+    "BulkRestockRequest",
+    "SaleItem",
+    "RecordSalesRequest",
     "SearchRequest",
     "SearchResponse",
     "SearchResult",
@@ -2,7 +2,7 @@
 Product models for DAT406 Workshop
 """
 
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -89,4 +89,68 @@ class InventoryStats(BaseModel):
                 "out_of_stock_count": 8,
                 "avg_price": 149.99
             }
-        }
\ No newline at end of file
+        }
+
+
+class RestockItem(BaseModel):
+    """Quantity to add to one product"""
+    
+    product_id: str = Field(..., description="Product ID to restock")
+    quantity: int = Field(..., gt=0, description="Units to add")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "product_id": "B07XYZ1234",
+                "quantity": 25
+            }
+        }
+
+
+class BulkRestockRequest(BaseModel):
+    """Restock many products in one atomic statement"""
+    
+    items: List[RestockItem] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Products and quantities to add (repeated IDs are summed)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"product_id": "B07XYZ1234", "quantity": 25},
+                    {"product_id": "B08ABC5678", "quantity": 10}
+                ]
+            }
+        }
+
+
+class SaleItem(BaseModel):
+    """Units sold for one product"""
+    
+    product_id: str = Field(..., description="Product ID sold")
+    quantity: int = Field(..., gt=0, description="Units sold")
+
+
+class RecordSalesRequest(BaseModel):
+    """Sale events to record against stock"""
+    
+    items: List[SaleItem] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Products and units sold (repeated IDs are summed)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"product_id": "B07XYZ1234", "quantity": 2},
+                    {"product_id": "B08ABC5678", "quantity": 1}
+                ]
+            }
+        }
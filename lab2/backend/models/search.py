@@ -2,7 +2,7 @@
 Search request and response models
 """
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Literal
 from pydantic import BaseModel, Field
 
 from .product import ProductWithScore
@@ -29,6 +29,53 @@ class SearchRequest(BaseModel):
         le=1,
         description="Minimum similarity score threshold (0-1)"
     )
+    fields: Optional[List[str]] = Field(
+        default=None,
+        description="Product fields to return (e.g. [\"productId\", \"price\", \"similarity_score\"]); all by default"
+    )
+    facets: bool = Field(
+        default=False,
+        description="Also return category, price and star counts over the top candidates"
+    )
+    facet_candidates: int = Field(
+        default=200,
+        ge=1,
+        le=1000,
+        description="Number of top candidates facet counts are computed over"
+    )
+    spell_correct: Literal["off", "suggest", "apply"] = Field(
+        default="off",
+        description="Check query spelling against catalog terms: 'suggest' returns a corrected query, 'apply' also searches with it"
+    )
+    parse_query: bool = Field(
+        default=False,
+        description="Turn price, rating, stock and category phrases in the query into filters and embed only the rest"
+    )
+    min_price: Optional[float] = Field(default=None, ge=0, description="Minimum price")
+    max_price: Optional[float] = Field(default=None, ge=0, description="Maximum price")
+    min_stars: Optional[float] = Field(default=None, ge=0, le=5, description="Minimum star rating")
+    in_stock: Optional[bool] = Field(default=None, description="Only in-stock (true) or out-of-stock (false) products")
+    category: Optional[str] = Field(
+        default=None,
+        max_length=200,
+        description="Category name or term, resolved like category browse"
+    )
+    diversify: bool = Field(
+        default=False,
+        description="Collapse near-duplicate results (e.g. colour variants) into one result with a variant count"
+    )
+    diversity_threshold: float = Field(
+        default=0.95,
+        ge=0.5,
+        le=1,
+        description="Embedding cosine similarity at which two products count as variants"
+    )
+    route_categories: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=10,
+        description="Only search the N categories whose centroid embeddings are nearest the query"
+    )
 
 
 class SearchResult(BaseModel):
@@ -36,6 +83,8 @@ class SearchResult(BaseModel):
     
     product: ProductWithScore
     explanation: Optional[str] = None
+    variant_count: Optional[int] = None
+    variant_ids: Optional[List[str]] = None
 
 
 class SearchResponse(BaseModel):
@@ -46,6 +95,12 @@ class SearchResponse(BaseModel):
     total_results: int
     search_time_ms: float
     search_type: str = "semantic"
+    facets: Optional[Dict[str, List[Dict]]] = None
+    facet_time_ms: Optional[float] = None
+    corrected_query: Optional[str] = None
+    corrections: Optional[List[Dict]] = None
+    parsed_query: Optional[Dict] = None
+    routed_categories: Optional[List[Dict]] = None
 
 
 class RecommendationRequest(BaseModel):
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Recompute category centroid embeddings (batch job)
+
+Runs bedrock_integration.refresh_category_centroids(), which rebuilds one
+normalized mean embedding per category for search routing. Run it after
+catalog loads or on a schedule (e.g. nightly cron); centroids move slowly,
+so a stale table only makes routing slightly less sharp.
+
+Usage:
+    cd lab2/backend
+    python refresh_category_centroids.py
+"""
+
+import asyncio
+import sys
+import time
+
+from services.category_centroids import refresh_category_centroids
+from services.database import DatabaseService
+
+
+async def main() -> int:
+    db = DatabaseService()
+    await db.connect()
+    try:
+        start = time.perf_counter()
+        categories = await refresh_category_centroids(db)
+        print(f"✅ Refreshed {categories} category centroids in {(time.perf_counter() - start):.1f}s")
+        return 0
+    except Exception as e:
+        print(f"❌ Centroid refresh failed: {e}")
+        return 1
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,12 +1,22 @@
 """
 Core services for DAT406 Workshop Backend
+
+The names below are imported on first access, so importing one service
+module (e.g. ``services.database``) does not load the others, and boto3
+with them.
 """
-from .database import DatabaseService
-from .embeddings import EmbeddingService
-from .bedrock import BedrockService
-
-__all__ = [
-    "DatabaseService",
-    "EmbeddingService",
-    "BedrockService",
-]
\ No newline at end of file
+import importlib
+
+_EXPORTS = {
+    "DatabaseService": ".database",
+    "EmbeddingService": ".embeddings",
+    "BedrockService": ".bedrock",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
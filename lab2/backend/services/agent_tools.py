@@ -6,14 +6,29 @@ from strands import tool
 import json
 import asyncio
 
+from config import settings
+from services.database import request_deadline
+
 # Global database service reference
 _db_service = None
+# Shared embedding service reference (routing tools)
+_embedding_service = None
 
 def set_db_service(db_service):
     """Set the database service instance"""
     global _db_service
     _db_service = db_service
 
+def set_embedding_service(embedding_service):
+    """Set the embedding service instance"""
+    global _embedding_service
+    _embedding_service = embedding_service
+
+async def _bounded_fetch_all(sql: str):
+    """Run agent SQL under its own statement deadline"""
+    with request_deadline(settings.AGENT_QUERY_TIMEOUT_MS):
+        return await _db_service.fetch_all(sql)
+
 def _run_async(coro):
     """Helper to run async functions in sync context"""
     try:
@@ -79,6 +94,38 @@ def restock_product(product_id: str, quantity: int) -> str:
     except Exception as e:
         return json.dumps({"error": str(e)})
 
+@tool
+def get_reorder_forecast(lead_time_days: int = 7, cover_days: int = 30, limit: int = 10) -> str:
+    """Forecast which products will run out first, from recorded sales velocity"""
+    if not _db_service:
+        return json.dumps({"error": "Database service not initialized"})
+    
+    try:
+        from services.business_logic import BusinessLogic
+        logic = BusinessLogic(_db_service)
+        result = _run_async(
+            logic.get_reorder_forecast(lead_time_days=lead_time_days, cover_days=cover_days, limit=limit)
+        )
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+@tool
+def find_relevant_categories(query: str, top: int = 3) -> str:
+    """Find the catalog categories closest in meaning to a shopper's request, using category centroid embeddings"""
+    if not _db_service:
+        return json.dumps({"error": "Database service not initialized"})
+    if not _embedding_service:
+        return json.dumps({"error": "Embedding service not initialized"})
+    
+    try:
+        from services.category_centroids import nearest_categories
+        embedding = _embedding_service.generate_embedding(query)
+        result = _run_async(nearest_categories(_db_service, embedding, max(1, min(top, 10))))
+        return json.dumps({"query": query, "categories": result}, indent=2)
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
 @tool
 def run_query(sql: str) -> str:
     """Execute arbitrary SQL query on the database"""
@@ -86,7 +133,7 @@ def run_query(sql: str) -> str:
         return json.dumps({"error": "Database service not initialized"})
     
     try:
-        result = _run_async(_db_service.fetch_all(sql))
+        result = _run_async(_bounded_fetch_all(sql))
         # Convert to list of dicts
         data = [dict(row) for row in result]
         return json.dumps(data, indent=2, default=str)
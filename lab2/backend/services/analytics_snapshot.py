@@ -0,0 +1,545 @@
+"""
+In-memory columnar analytics snapshot for Blaize Bazaar
+
+Loads the columns that BusinessLogic questions touch (price, stars, reviews,
+quantity, category) into NumPy arrays, with categories dictionary-encoded as
+integer codes. Trending, stock-band and price-by-category questions are then
+answered with vectorized operations instead of catalog scans. Descriptions
+are not held; the few products a question returns are looked up by id.
+
+The snapshot is optional (ANALYTICS_SNAPSHOT_ENABLED) and is reloaded in
+the background when the catalog's data_version, maintained by the aggregate
+triggers, changes. Requests never wait for a reload.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from psycopg.errors import UndefinedTable
+from psycopg.rows import tuple_row
+
+from config import settings
+from services.product_cache import get_product_cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_QUERY = """
+    SELECT
+        "productId",
+        price::float8,
+        stars::float8,
+        reviews::float8,
+        quantity::float8,
+        category_name
+    FROM bedrock_integration.product_catalog
+"""
+
+# Catalog columns held by the snapshot (for change-feed filtering)
+SNAPSHOT_COLUMNS = frozenset({
+    "productId", "price", "stars", "reviews", "quantity", "category_name",
+})
+
+VERSION_QUERY = """
+    SELECT data_version, refreshed_at
+    FROM bedrock_integration.catalog_aggregates
+"""
+
+
+def _number(value: float, integer: bool = False) -> Any:
+    """Convert a NumPy scalar to a JSON-friendly value (NaN means NULL)."""
+    if np.isnan(value):
+        return None
+    return int(value) if integer else float(value)
+
+
+class CatalogSnapshot:
+    """
+    Column arrays for every catalog row.
+    
+    Numeric columns are float64 with NaN standing in for SQL NULL, so
+    comparisons behave like SQL predicates (NULL never matches).
+    """
+    
+    def __init__(
+        self,
+        product_ids: np.ndarray,
+        price: np.ndarray,
+        stars: np.ndarray,
+        reviews: np.ndarray,
+        quantity: np.ndarray,
+        category_codes: np.ndarray,
+        categories: Sequence[Optional[str]],
+        data_version: Optional[int] = None,
+        refreshed_at: Optional[datetime] = None,
+    ):
+        """
+        Wrap pre-built column arrays.
+        
+        Args:
+            product_ids: Object array of product IDs
+            price: Prices (float64, NaN for NULL)
+            stars: Ratings (float64, NaN for NULL)
+            reviews: Review counts (float64, NaN for NULL)
+            quantity: Stock quantities (float64, NaN for NULL)
+            category_codes: Index into ``categories`` for each row
+            categories: Category dictionary (may contain None)
+            data_version: Catalog data_version the rows were read at
+            refreshed_at: When that data_version was written
+        """
+        self.product_ids = product_ids
+        self.price = price
+        self.stars = stars
+        self.reviews = reviews
+        self.quantity = quantity
+        self.category_codes = category_codes
+        self.categories = list(categories)
+        self.data_version = data_version
+        self.refreshed_at = refreshed_at or datetime.now(timezone.utc)
+    
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[tuple],
+        data_version: Optional[int] = None,
+        refreshed_at: Optional[datetime] = None,
+    ) -> "CatalogSnapshot":
+        """
+        Build a snapshot from SNAPSHOT_QUERY rows.
+        
+        CPU-bound at catalog scale; CatalogSnapshotManager runs it in a
+        worker thread.
+        
+        Args:
+            rows: Tuples of (productId, price, stars, reviews, quantity,
+                category_name)
+            data_version: Catalog data_version the rows were read at
+            refreshed_at: When that data_version was written
+        
+        Returns:
+            CatalogSnapshot: Encoded snapshot
+        """
+        if rows:
+            ids, price, stars, reviews, quantity, category = zip(*rows)
+        else:
+            ids = price = stars = reviews = quantity = category = ()
+        
+        def floats(column: tuple) -> np.ndarray:
+            # NumPy converts None to NaN for float64
+            return np.array(column, dtype=np.float64)
+        
+        # Dictionary-encode categories (sorted so codes are stable across loads)
+        names = sorted(set(category), key=lambda name: (name is None, name or ""))
+        code_of = {name: code for code, name in enumerate(names)}
+        codes = np.fromiter((code_of[name] for name in category), dtype=np.int32, count=len(category))
+        
+        return cls(
+            product_ids=np.array(ids, dtype=object),
+            price=floats(price),
+            stars=floats(stars),
+            reviews=floats(reviews),
+            quantity=floats(quantity),
+            category_codes=codes,
+            categories=names,
+            data_version=data_version,
+            refreshed_at=refreshed_at,
+        )
+    
+    def __len__(self) -> int:
+        return len(self.price)
+    
+    @property
+    def freshness(self) -> Dict[str, Any]:
+        """Freshness block matching the one BusinessLogic reports."""
+        return {
+            "source": "snapshot",
+            "as_of": self.refreshed_at.isoformat(),
+            "data_version": self.data_version
+        }
+    
+    def _product(self, i: int, **extra: Any) -> Dict[str, Any]:
+        """Materialize row ``i`` as a result dict (description filled in by attach_descriptions)."""
+        product = {
+            "productId": self.product_ids[i],
+            "product_description": None,
+            "price": _number(self.price[i]),
+            "stars": _number(self.stars[i]),
+            "reviews": _number(self.reviews[i], integer=True),
+            "category_name": self.categories[self.category_codes[i]],
+            "quantity": _number(self.quantity[i], integer=True),
+        }
+        product.update(extra)
+        return product
+    
+    def trending(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Top products by reviews * stars (in stock, 4+ stars, 50+ reviews).
+        
+        Args:
+            limit: Number of products to return
+        
+        Returns:
+            List of product dicts with ``trending_score``
+        """
+        candidates = np.flatnonzero(
+            (self.quantity > 0) & (self.stars >= 4.0) & (self.reviews > 50)
+        )
+        score = self.reviews[candidates] * self.stars[candidates]
+        
+        # Partial selection first, then an exact sort of the survivors
+        if len(candidates) > limit:
+            keep = np.argpartition(-score, limit - 1)[:limit]
+            candidates, score = candidates[keep], score[keep]
+        order = np.lexsort((-self.stars[candidates], -score))
+        
+        return [
+            self._product(i, trending_score=float(s))
+            for i, s in zip(candidates[order], score[order])
+        ]
+    
+    def inventory_statistics(self) -> Dict[str, Any]:
+        """Stock-band counts and quantity totals for the whole catalog."""
+        q = self.quantity
+        has_quantity = ~np.isnan(q)
+        
+        return {
+            "total_products": len(q),
+            "out_of_stock": int(np.count_nonzero(q == 0)),
+            "low_stock": int(np.count_nonzero((q > 0) & (q < 10))),
+            "healthy_stock": int(np.count_nonzero(q >= 10)),
+            "avg_quantity": float(q[has_quantity].mean()) if has_quantity.any() else None,
+            "total_quantity": int(q[has_quantity].sum()) if has_quantity.any() else None,
+        }
+    
+    def critical_items(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Low-stock items with high demand, lowest quantity first."""
+        candidates = np.flatnonzero(
+            (self.quantity < 10) & (self.stars >= 4.0) & (self.reviews > 100)
+        )
+        order = np.lexsort((-self.reviews[candidates], self.quantity[candidates]))[:limit]
+        
+        return [
+            {
+                "productId": self.product_ids[i],
+                "product_description": None,
+                "stars": _number(self.stars[i]),
+                "reviews": _number(self.reviews[i], integer=True),
+                "quantity": _number(self.quantity[i], integer=True),
+            }
+            for i in candidates[order]
+        ]
+    
+    @cached_property
+    def _price_groups(self) -> Dict[str, np.ndarray]:
+        """
+        In-stock prices sorted by (category, price), built on first use.
+        
+        One lexsort yields every group's min, max and median by position;
+        sums come from a weighted bincount. The snapshot is immutable, so
+        this is computed once per load.
+        """
+        in_stock = self.quantity > 0
+        codes = self.category_codes[in_stock]
+        prices = self.price[in_stock]
+        n_categories = len(self.categories)
+        
+        product_count = np.bincount(codes, minlength=n_categories)
+        
+        priced = ~np.isnan(prices)
+        codes, prices = codes[priced], prices[priced]
+        order = np.lexsort((prices, codes))
+        codes, prices = codes[order], prices[order]
+        
+        counts = np.bincount(codes, minlength=n_categories)
+        ends = np.cumsum(counts)
+        
+        return {
+            "product_count": product_count,
+            "counts": counts,
+            "starts": ends - counts,
+            "sums": np.bincount(codes, weights=prices, minlength=n_categories),
+            "prices": prices,
+            "all_prices": np.sort(prices),
+        }
+    
+    def price_statistics(
+        self,
+        category: Optional[str] = None,
+        top: int = 10,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        In-stock price statistics per category and overall.
+        
+        Reads the grouped price arrays prepared once per snapshot, so each
+        call only does per-category arithmetic.
+        
+        Args:
+            category: Case-insensitive substring filter on category name;
+                when omitted the ``top`` categories by product count are returned
+            top: Number of categories to return without a filter
+        
+        Returns:
+            Tuple of (per-category stats, overall stats)
+        """
+        groups = self._price_groups
+        product_count, counts, starts, sums, prices = (
+            groups["product_count"], groups["counts"], groups["starts"],
+            groups["sums"], groups["prices"],
+        )
+        
+        if category:
+            needle = category.lower()
+            selected = [
+                code for code, name in enumerate(self.categories)
+                if name is not None and needle in name.lower() and product_count[code] > 0
+            ]
+        else:
+            ranked = np.argsort(-product_count, kind="stable")
+            selected = [int(code) for code in ranked[:top] if product_count[code] > 0]
+        
+        by_category = []
+        for code in selected:
+            n, lo = counts[code], starts[code]
+            by_category.append({
+                "category_name": self.categories[code],
+                "product_count": int(product_count[code]),
+                "min_price": float(prices[lo]) if n else None,
+                "max_price": float(prices[lo + n - 1]) if n else None,
+                "avg_price": float(sums[code] / n) if n else None,
+                "median_price": float((prices[lo + (n - 1) // 2] + prices[lo + n // 2]) / 2) if n else None,
+            })
+        
+        all_prices = groups["all_prices"]
+        n = len(all_prices)
+        overall = {
+            "total_products": int(product_count.sum()),
+            "min_price": float(all_prices[0]) if n else None,
+            "max_price": float(all_prices[-1]) if n else None,
+            "avg_price": float(all_prices.mean()) if n else None,
+            "median_price": float(np.median(all_prices)) if n else None,
+        }
+        
+        return by_category, overall
+
+
+class CatalogSnapshotManager:
+    """
+    Keeps a CatalogSnapshot in step with the catalog's data_version.
+    
+    Callers always get the snapshot already in memory. The version is
+    checked in a background task, scheduled at most once per check interval
+    or as soon as the change feed reports a relevant write; when it has
+    moved, the same task reloads the rows and builds the arrays in a worker
+    thread, then swaps the new snapshot in. Until then callers read the
+    previous snapshot, whose freshness block carries its data_version.
+    """
+    
+    def __init__(self, db_service, check_interval_ms: int = 1000):
+        """
+        Args:
+            db_service: Connected DatabaseService
+            check_interval_ms: Minimum time between data_version checks
+        """
+        self.db = db_service
+        self._check_interval = check_interval_ms / 1000
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._loading = False
+        self._check_task: Optional[asyncio.Task] = None
+        self._recheck = False
+        self._unavailable = False
+        self._loads = 0
+        self._last_load_ms: Optional[float] = None
+    
+    def current(self) -> Optional[CatalogSnapshot]:
+        """
+        Return the snapshot in memory, or None when callers should use SQL.
+        
+        Never waits on the database; a due version check is started in the
+        background.
+        """
+        if self._unavailable:
+            return None
+        
+        if time.monotonic() - self._checked_at >= self._check_interval:
+            self._schedule_check()
+        return self._snapshot
+    
+    def _schedule_check(self) -> None:
+        """Start a background version check, or queue one behind a running check."""
+        self._checked_at = time.monotonic()
+        if self._check_task is None or self._check_task.done():
+            # Fresh context: the triggering request's deadline must not
+            # bound a full-catalog reload
+            self._check_task = asyncio.create_task(
+                self._check(), context=contextvars.Context()
+            )
+        else:
+            self._recheck = True
+    
+    async def _check(self) -> None:
+        """Reload while the data_version differs from the snapshot's."""
+        self._recheck = True
+        while self._recheck:
+            self._recheck = False
+            try:
+                version = await self.db.fetch_one(VERSION_QUERY)
+            except UndefinedTable:
+                logger.warning("⚠️ catalog_aggregates not installed; analytics snapshot disabled")
+                self._unavailable = True
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Analytics snapshot version check failed: {e}")
+                return
+            
+            if version is None:
+                return
+            if self._snapshot is None or self._snapshot.data_version != version["data_version"]:
+                await self.refresh(version)
+    
+    async def refresh(self, version: Optional[dict] = None) -> Optional[CatalogSnapshot]:
+        """
+        Reload the snapshot from the catalog.
+        
+        Args:
+            version: Already-read data_version row (read first when omitted).
+                It is read before the rows, so a concurrent write can only
+                make the snapshot newer than its label and trigger a reload.
+        
+        Returns:
+            The new snapshot, or None if loading failed
+        """
+        if self._loading:
+            return None
+        
+        self._loading = True
+        try:
+            start = time.perf_counter()
+            if version is None:
+                self._checked_at = time.monotonic()
+                version = await self.db.fetch_one(VERSION_QUERY)
+            
+            async with self.db.get_connection() as conn:
+                async with conn.cursor(row_factory=tuple_row) as cur:
+                    await cur.execute(SNAPSHOT_QUERY)
+                    rows = await cur.fetchall()
+            
+            # Building the arrays is CPU-bound; keep it off the event loop
+            self._snapshot = await asyncio.to_thread(
+                CatalogSnapshot.from_rows,
+                rows,
+                data_version=version["data_version"] if version else None,
+                refreshed_at=version["refreshed_at"] if version else None,
+            )
+            self._loads += 1
+            self._last_load_ms = round((time.perf_counter() - start) * 1000, 1)
+            logger.info(
+                f"✅ Analytics snapshot loaded: {len(self._snapshot):,} rows, "
+                f"{len(self._snapshot.categories)} categories ({self._last_load_ms:.0f}ms)"
+            )
+            return self._snapshot
+        except Exception as e:
+            logger.warning(f"⚠️ Analytics snapshot refresh failed: {e}")
+            return None
+        finally:
+            self._loading = False
+    
+    def invalidate(self, change=None) -> None:
+        """
+        Check the data_version now instead of after the check interval.
+        
+        Registered as a change-feed listener, so writes are picked up
+        immediately. Changes that only touch columns the snapshot does not
+        hold are ignored.
+        """
+        if self._unavailable or (change is not None and not change.touches(SNAPSHOT_COLUMNS)):
+            return
+        self._schedule_check()
+    
+    def stats(self) -> dict:
+        """Snapshot status for health reporting."""
+        snapshot = self._snapshot
+        return {
+            "rows": len(snapshot) if snapshot is not None else 0,
+            "data_version": snapshot.data_version if snapshot is not None else None,
+            "loads": self._loads,
+            "loading": self._loading,
+            "last_load_ms": self._last_load_ms,
+            "available": not self._unavailable,
+        }
+
+
+async def attach_descriptions(db_service, products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fill in ``product_description`` for snapshot results, in place.
+    
+    The snapshot leaves descriptions out; the handful of products a
+    question returns are read through the product cache (one query for
+    any misses).
+    
+    Args:
+        db_service: DatabaseService
+        products: Result dicts from CatalogSnapshot
+    
+    Returns:
+        The same list
+    """
+    if not products:
+        return products
+    rows = await get_product_cache(db_service).get_many(p["productId"] for p in products)
+    for product in products:
+        row = rows.get(product["productId"])
+        product["product_description"] = row["product_description"] if row else None
+    return products
+
+
+# Global snapshot manager (None when the snapshot is disabled)
+_snapshot_manager: Optional[CatalogSnapshotManager] = None
+
+
+def set_catalog_snapshot_manager(manager: Optional[CatalogSnapshotManager]) -> None:
+    """Install (or clear) the process-wide snapshot manager."""
+    global _snapshot_manager
+    _snapshot_manager = manager
+
+
+def get_catalog_snapshot_manager() -> Optional[CatalogSnapshotManager]:
+    """Return the process-wide snapshot manager, if enabled."""
+    return _snapshot_manager
+
+
+def get_catalog_snapshot() -> Optional[CatalogSnapshot]:
+    """
+    Return the current snapshot, or None when disabled or not yet loaded.
+    
+    Example:
+        ```python
+        snapshot = get_catalog_snapshot()
+        if snapshot is not None:
+            products = await attach_descriptions(db, snapshot.trending(10))
+        ```
+    """
+    if _snapshot_manager is None:
+        return None
+    return _snapshot_manager.current()
+
+
+def create_catalog_snapshot_manager(db_service) -> Optional[CatalogSnapshotManager]:
+    """Build and install a manager when ANALYTICS_SNAPSHOT_ENABLED is set."""
+    if not settings.ANALYTICS_SNAPSHOT_ENABLED:
+        return None
+    
+    manager = CatalogSnapshotManager(
+        db_service,
+        check_interval_ms=settings.ANALYTICS_SNAPSHOT_CHECK_INTERVAL_MS,
+    )
+    set_catalog_snapshot_manager(manager)
+    
+    # Re-check the data_version as soon as a relevant write lands
+    db_service.add_change_listener(manager.invalidate)
+    return manager
@@ -2,13 +2,28 @@
 Business Logic Layer for Blaize Bazaar
 Contains custom business logic for inventory, pricing, and trending analysis
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
+from datetime import datetime, timezone
 import json
+import time
+
+import numpy as np
+from psycopg.errors import UndefinedTable
+
+from services.analytics_snapshot import attach_descriptions, get_catalog_snapshot
+from services.pagination import decode_cursor, next_cursor
+from services.quantile_sketch import get_price_sketches
 
 
 def convert_decimals(obj):
-    """Convert Decimal objects to float for JSON serialization"""
+    """
+    Convert Decimal objects to float for JSON serialization.
+    
+    Pooled connections already load numeric columns as float (see
+    services.database.configure_connection); this is only needed for
+    rows read on connections configured elsewhere.
+    """
     if isinstance(obj, Decimal):
         return float(obj)
     elif isinstance(obj, dict):
@@ -18,9 +33,54 @@ def convert_decimals(obj):
     return obj
 
 
+# Product columns returned by inventory lists. The low/out-of-stock partial
+# indexes order and filter the page; wide columns come from the heap for
+# the page rows only
+INVENTORY_LIST_COLUMNS = """
+    "productId",
+    product_description,
+    imgurl,
+    producturl,
+    stars,
+    reviews,
+    price,
+    category_name,
+    quantity
+"""
+
+# Trending leaderboard. The WHERE and ORDER BY mirror the partial expression
+# index idx_product_trending, so this is an ordered top-N index read; keep
+# them in sync with the index definition
+# (benchmarks/trending_index_check.py checks the plan of this statement)
+TRENDING_QUERY = """
+    SELECT 
+        "productId",
+        product_description,
+        price,
+        stars,
+        reviews,
+        category_name,
+        quantity,
+        (reviews * stars) as trending_score
+    FROM bedrock_integration.product_catalog
+    WHERE quantity > 0 
+      AND stars >= 4.0
+      AND reviews > 50
+    ORDER BY (reviews * stars) DESC, stars DESC
+    LIMIT %s
+"""
+
+
 class BusinessLogic:
     """Business logic layer for custom analytics and operations"""
     
+    # Whether the trigger-maintained aggregate tables exist; None until the
+    # first lookup, shared because a BusinessLogic is built per request
+    _aggregates_available = None
+    
+    # Same for the inventory_history table written by restocks and sales
+    _history_available = None
+    
     def __init__(self, db_service):
         self.db = db_service
     
@@ -28,7 +88,8 @@ class BusinessLogic:
         """
         Get trending products based on reviews, ratings, and popularity.
         
-        Trending score = (reviews * stars) with high-rated products prioritized
+        Trending score = (reviews * stars) with high-rated products prioritized.
+        Served by idx_product_trending (see TRENDING_QUERY).
         
         Args:
             limit: Number of trending products to return
@@ -36,28 +97,19 @@ class BusinessLogic:
         Returns:
             Dictionary with trending products and metadata
         """
-        query = """
-            SELECT 
-                "productId",
-                product_description,
-                price,
-                stars,
-                reviews,
-                category_name,
-                quantity,
-                (reviews * stars) as trending_score
-            FROM bedrock_integration.product_catalog
-            WHERE quantity > 0 
-              AND stars >= 4.0
-              AND reviews > 50
-            ORDER BY trending_score DESC, stars DESC
-            LIMIT %s
-        """
+        snapshot = get_catalog_snapshot()
+        if snapshot is not None:
+            products = await attach_descriptions(self.db, snapshot.trending(limit))
+            return self._trending_response(products, limit)
         
-        results = await self.db.fetch_all(query, limit)
+        results = await self.db.fetch_all(TRENDING_QUERY, limit)
         
-        products = [convert_decimals(dict(row)) for row in results]
+        products = [dict(row) for row in results]
         
+        return self._trending_response(products, limit)
+    
+    def _trending_response(self, products: List[Dict], limit: int) -> Dict[str, Any]:
+        """Wrap trending products with their selection criteria"""
         return {
             "status": "success",
             "count": len(products),
@@ -72,23 +124,19 @@ class BusinessLogic:
         """
         Get overall inventory health statistics.
         
+        Reads the trigger-maintained aggregates table (a single-row lookup)
+        and falls back to scanning the catalog when it is not installed.
+        
         Returns:
-            Dictionary with inventory health metrics and alerts
+            Dictionary with inventory health metrics, alerts and freshness
         """
-        # Get inventory statistics
-        stats_query = """
-            SELECT 
-                COUNT(*) as total_products,
-                COUNT(CASE WHEN quantity = 0 THEN 1 END) as out_of_stock,
-                COUNT(CASE WHEN quantity > 0 AND quantity < 10 THEN 1 END) as low_stock,
-                COUNT(CASE WHEN quantity >= 10 THEN 1 END) as healthy_stock,
-                AVG(quantity) as avg_quantity,
-                SUM(quantity) as total_quantity
-            FROM bedrock_integration.product_catalog
-        """
-        
-        stats = await self.db.fetch_one(stats_query)
-        stats_dict = convert_decimals(dict(stats))
+        snapshot = get_catalog_snapshot()
+        if snapshot is not None:
+            return self._inventory_health_response(
+                snapshot.inventory_statistics(),
+                await attach_descriptions(self.db, snapshot.critical_items(10)),
+                snapshot.freshness,
+            )
         
         # Get critical items (low stock with high demand)
         critical_query = """
@@ -106,8 +154,47 @@ class BusinessLogic:
             LIMIT 10
         """
         
-        critical_items = await self.db.fetch_all(critical_query)
+        if BusinessLogic._aggregates_available is not False:
+            aggregates_query = """
+                SELECT 
+                    total_products,
+                    out_of_stock,
+                    low_stock,
+                    healthy_stock,
+                    total_quantity::numeric / NULLIF(quantity_rows, 0) as avg_quantity,
+                    total_quantity,
+                    data_version,
+                    refreshed_at
+                FROM bedrock_integration.catalog_aggregates
+            """
+            try:
+                stats_rows, critical_items = await self.db.pipeline([
+                    (aggregates_query, ()),
+                    (critical_query, ()),
+                ])
+                BusinessLogic._aggregates_available = bool(stats_rows)
+            except UndefinedTable:
+                BusinessLogic._aggregates_available = False
+        
+        if not BusinessLogic._aggregates_available:
+            stats_rows, critical_items = await self._scan_inventory_statistics(critical_query)
+        
+        stats_dict = dict(stats_rows[0])
+        freshness = self._freshness(stats_dict)
         
+        return self._inventory_health_response(
+            stats_dict,
+            [dict(row) for row in critical_items],
+            freshness,
+        )
+    
+    def _inventory_health_response(
+        self,
+        stats_dict: Dict,
+        critical_items: List[Dict],
+        freshness: Dict,
+    ) -> Dict[str, Any]:
+        """Score inventory health and attach alerts"""
         # Calculate health score (0-100)
         total = stats_dict['total_products']
         healthy = stats_dict['healthy_stock']
@@ -117,20 +204,130 @@ class BusinessLogic:
             "status": "success",
             "health_score": health_score,
             "statistics": stats_dict,
-            "critical_items": [convert_decimals(dict(row)) for row in critical_items],
-            "alerts": self._generate_inventory_alerts(stats_dict)
+            "critical_items": critical_items,
+            "alerts": self._generate_inventory_alerts(stats_dict),
+            "freshness": freshness
         }
     
-    async def get_price_statistics(self, category: str = None) -> Dict[str, Any]:
+    async def get_price_statistics(self, category: str = None, exact: bool = True) -> Dict[str, Any]:
         """
         Get price statistics by category or overall.
         
+        Reads per-category and overall aggregates maintained by triggers,
+        falling back to PERCENTILE_CONT scans when they are not installed.
+        The overall figures are recomputed shortly after writes rather than
+        by the writes themselves (see services.price_aggregates).
+        With ``exact=False`` the figures come from per-category t-digests
+        instead, which add p90/p99 and a rank error bound per percentile.
+        
         Args:
             category: Optional category filter
+            exact: Use exact aggregates (True) or approximate sketches (False)
             
         Returns:
-            Dictionary with price statistics and insights
+            Dictionary with price statistics, insights and freshness
+        """
+        if not exact:
+            sketches = await get_price_sketches(self.db)
+            categories, overall_dict = sketches.statistics(category)
+            response = self._price_statistics_response(
+                categories, overall_dict, category, sketches.freshness
+            )
+            response["approximate"] = True
+            return response
+        
+        snapshot = get_catalog_snapshot()
+        if snapshot is not None:
+            categories, overall_dict = snapshot.price_statistics(category)
+            return self._price_statistics_response(
+                categories, overall_dict, category, snapshot.freshness
+            )
+        
+        if BusinessLogic._aggregates_available is not False:
+            if category:
+                query = """
+                    SELECT category_name, product_count, min_price, max_price, avg_price, median_price
+                    FROM bedrock_integration.category_price_aggregates
+                    WHERE category_name ILIKE %s
+                """
+                params = (f"%{category}%",)
+            else:
+                query = """
+                    SELECT category_name, product_count, min_price, max_price, avg_price, median_price
+                    FROM bedrock_integration.category_price_aggregates
+                    ORDER BY product_count DESC
+                    LIMIT 10
+                """
+                params = ()
+            
+            overall_query = """
+                SELECT 
+                    in_stock_products as total_products,
+                    min_price,
+                    max_price,
+                    avg_price,
+                    median_price,
+                    data_version,
+                    prices_stale,
+                    refreshed_at
+                FROM bedrock_integration.catalog_aggregates
+            """
+            try:
+                results, overall_rows = await self.db.pipeline([
+                    (query, params),
+                    (overall_query, ()),
+                ])
+                BusinessLogic._aggregates_available = bool(overall_rows)
+            except UndefinedTable:
+                BusinessLogic._aggregates_available = False
+        
+        if not BusinessLogic._aggregates_available:
+            results, overall_rows = await self._scan_price_statistics(category)
+        
+        categories = [dict(row) for row in results]
+        overall_dict = dict(overall_rows[0])
+        
+        return self._price_statistics_response(
+            categories, overall_dict, category, self._freshness(overall_dict)
+        )
+    
+    def _price_statistics_response(
+        self,
+        categories: List[Dict],
+        overall_dict: Dict,
+        category: str,
+        freshness: Dict,
+    ) -> Dict[str, Any]:
+        """Assemble the price statistics payload"""
+        return {
+            "status": "success",
+            "overall": overall_dict,
+            "by_category": categories,
+            "filter": category if category else "all",
+            "freshness": freshness
+        }
+    
+    async def _scan_inventory_statistics(self, critical_query: str) -> List[List[Dict]]:
+        """Compute stock bands from a full catalog scan (no aggregates table)."""
+        stats_query = """
+            SELECT 
+                COUNT(*) as total_products,
+                COUNT(CASE WHEN quantity = 0 THEN 1 END) as out_of_stock,
+                COUNT(CASE WHEN quantity > 0 AND quantity < 10 THEN 1 END) as low_stock,
+                COUNT(CASE WHEN quantity >= 10 THEN 1 END) as healthy_stock,
+                AVG(quantity) as avg_quantity,
+                SUM(quantity) as total_quantity
+            FROM bedrock_integration.product_catalog
         """
+        
+        # Both queries share one connection and one round trip
+        return await self.db.pipeline([
+            (stats_query, ()),
+            (critical_query, ()),
+        ])
+    
+    async def _scan_price_statistics(self, category: str = None) -> List[List[Dict]]:
+        """Compute price statistics from a full catalog scan (no aggregates table)."""
         if category:
             query = """
                 SELECT 
@@ -145,7 +342,7 @@ class BusinessLogic:
                   AND quantity > 0
                 GROUP BY category_name
             """
-            results = await self.db.fetch_all(query, f"%{category}%")
+            params = (f"%{category}%",)
         else:
             query = """
                 SELECT 
@@ -161,9 +358,7 @@ class BusinessLogic:
                 ORDER BY product_count DESC
                 LIMIT 10
             """
-            results = await self.db.fetch_all(query)
-        
-        categories = [convert_decimals(dict(row)) for row in results]
+            params = ()
         
         # Calculate overall statistics
         overall_query = """
@@ -177,15 +372,30 @@ class BusinessLogic:
             WHERE quantity > 0
         """
         
-        overall = await self.db.fetch_one(overall_query)
-        overall_dict = convert_decimals(dict(overall))
+        return await self.db.pipeline([
+            (query, params),
+            (overall_query, ()),
+        ])
+    
+    @staticmethod
+    def _freshness(row: Dict) -> Dict[str, Any]:
+        """Pop aggregate bookkeeping columns off a row and describe its freshness."""
+        refreshed_at = row.pop('refreshed_at', None)
+        data_version = row.pop('data_version', None)
+        prices_stale = row.pop('prices_stale', None)
         
-        return {
-            "status": "success",
-            "overall": overall_dict,
-            "by_category": categories,
-            "filter": category if category else "all"
+        if refreshed_at is None:
+            return {"source": "live_scan", "as_of": datetime.now(timezone.utc).isoformat()}
+        
+        freshness = {
+            "source": "aggregates",
+            "as_of": refreshed_at.isoformat(),
+            "data_version": data_version
         }
+        if prices_stale is not None:
+            # Overall price figures trail writes until the deferred refresh runs
+            freshness["overall_prices_pending"] = prices_stale
+        return freshness
     
     async def restock_product(self, product_id: str, quantity: int) -> Dict[str, Any]:
         """
@@ -198,41 +408,419 @@ class BusinessLogic:
         Returns:
             Dictionary with restock confirmation
         """
-        # Get current product info
-        product_query = """
-            SELECT "productId", product_description, quantity
-            FROM bedrock_integration.product_catalog
-            WHERE "productId" = %s
-        """
+        result = await self.restock_products([(product_id, quantity)])
         
-        product = await self.db.fetch_one(product_query, product_id)
-        
-        if not product:
+        if not result["restocked"]:
             return {
                 "status": "error",
                 "message": f"Product {product_id} not found"
             }
         
-        old_quantity = product['quantity']
-        new_quantity = old_quantity + quantity
+        item = result["restocked"][0]
+        return {
+            "status": "success",
+            **item,
+            "message": f"✅ Added {quantity} units to {item['product_name']}"
+        }
+    
+    async def restock_products(self, items: List[Tuple[str, int]]) -> Dict[str, Any]:
+        """
+        Add stock to many products in one atomic statement.
+        
+        A single UPDATE ... FROM unnest(...) RETURNING applies every change
+        and reports quantities from the updated rows themselves, so old and
+        new quantities stay accurate under concurrent restocks. Repeated
+        product IDs are summed. Each change is logged to inventory_history
+        in the same statement.
+        
+        Args:
+            items: (product_id, quantity) pairs
+        
+        Returns:
+            Dictionary with per-product old/new quantities and unknown IDs
+        """
+        restock_query = """
+            UPDATE bedrock_integration.product_catalog p
+            SET quantity = p.quantity + r.added
+            FROM (
+                SELECT product_id, SUM(added)::int AS added
+                FROM unnest(%s::text[], %s::int[]) AS u(product_id, added)
+                GROUP BY product_id
+            ) r
+            WHERE p."productId" = r.product_id
+            RETURNING
+                p."productId" AS product_id,
+                p.product_description AS product_name,
+                p.quantity - r.added AS old_quantity,
+                r.added AS added_quantity,
+                p.quantity AS new_quantity
+        """
+        
+        product_ids = [product_id for product_id, _ in items]
+        quantities = [quantity for _, quantity in items]
+        
+        restocked = await self._write_stock_movements(
+            restock_query, "R", "added_quantity", product_ids, quantities
+        )
+        
+        found = {row["product_id"] for row in restocked}
+        not_found = sorted(set(product_ids) - found)
+        
+        return {
+            "status": "success" if not not_found else ("partial" if restocked else "error"),
+            "restocked_count": len(restocked),
+            "restocked": [dict(row) for row in restocked],
+            "not_found": not_found,
+            "total_added": sum(row["added_quantity"] for row in restocked)
+        }
+    
+    async def record_sales(self, items: List[Tuple[str, int]]) -> Dict[str, Any]:
+        """
+        Record units sold and decrement stock atomically.
+        
+        Products without enough stock for the requested units are left
+        untouched and reported, so stock never goes negative. Repeated
+        product IDs are summed.
+        
+        Args:
+            items: (product_id, units_sold) pairs
+        
+        Returns:
+            Dictionary with per-product quantities, unknown IDs and
+            products with insufficient stock
+        """
+        sale_query = """
+            UPDATE bedrock_integration.product_catalog p
+            SET quantity = p.quantity - s.sold
+            FROM (
+                SELECT product_id, SUM(sold)::int AS sold
+                FROM unnest(%s::text[], %s::int[]) AS u(product_id, sold)
+                GROUP BY product_id
+            ) s
+            WHERE p."productId" = s.product_id
+              AND p.quantity >= s.sold
+            RETURNING
+                p."productId" AS product_id,
+                p.product_description AS product_name,
+                p.quantity + s.sold AS old_quantity,
+                s.sold AS sold_quantity,
+                p.quantity AS new_quantity
+        """
+        
+        product_ids = [product_id for product_id, _ in items]
+        quantities = [quantity for _, quantity in items]
+        
+        sold = await self._write_stock_movements(
+            sale_query, "S", "sold_quantity", product_ids, quantities
+        )
+        
+        unsold = sorted(set(product_ids) - {row["product_id"] for row in sold})
+        insufficient = []
+        if unsold:
+            existing = await self.db.fetch_all(
+                """
+                SELECT "productId" AS product_id, quantity
+                FROM bedrock_integration.product_catalog
+                WHERE "productId" = ANY(%s)
+                """,
+                unsold,
+            )
+            insufficient = [dict(row) for row in existing]
+        
+        insufficient_ids = {row["product_id"] for row in insufficient}
+        
+        return {
+            "status": "success" if not unsold else ("partial" if sold else "error"),
+            "sold_count": len(sold),
+            "sold": [dict(row) for row in sold],
+            "insufficient_stock": insufficient,
+            "not_found": [product_id for product_id in unsold if product_id not in insufficient_ids],
+            "total_sold": sum(row["sold_quantity"] for row in sold)
+        }
+    
+    async def _write_stock_movements(
+        self,
+        update_query: str,
+        event_type: str,
+        delta_column: str,
+        product_ids: List[str],
+        quantities: List[int],
+    ) -> List[Dict]:
+        """
+        Run a stock UPDATE ... RETURNING and log each row to inventory_history.
+        
+        The history insert is a data-modifying CTE over the UPDATE's output,
+        so the change and its log entry commit together in one round trip.
+        Without the history table the update runs on its own.
+        """
+        if BusinessLogic._history_available is not False:
+            sign = -1 if event_type == "S" else 1
+            logged_query = f"""
+                WITH changed AS ({update_query}),
+                logged AS (
+                    INSERT INTO bedrock_integration.inventory_history
+                        ("productId", event_type, quantity_delta, quantity_after)
+                    SELECT product_id, '{event_type}', {sign} * {delta_column}, new_quantity
+                    FROM changed
+                )
+                SELECT * FROM changed
+            """
+            try:
+                rows = await self.db.execute_returning(logged_query, product_ids, quantities)
+                BusinessLogic._history_available = True
+                return rows
+            except UndefinedTable:
+                BusinessLogic._history_available = False
+        
+        return await self.db.execute_returning(update_query, product_ids, quantities)
+    
+    async def get_reorder_forecast(
+        self,
+        window_days: int = 30,
+        lead_time_days: int = 7,
+        cover_days: int = 30,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """
+        Forecast stock depletion from recorded sales.
+        
+        Sales are summed per product in SQL and joined to current stock, so
+        only products that sold in the window come back. Depletion rate,
+        days of cover and reorder quantity are then computed for all of them
+        in one vectorized pass, and descriptions are looked up for the
+        returned products only.
         
-        # Update quantity
-        update_query = """
-            UPDATE bedrock_integration.product_catalog
-            SET quantity = quantity + %s
-            WHERE "productId" = %s
+        Args:
+            window_days: Days of sales history to average over
+            lead_time_days: Days a reorder takes to arrive
+            cover_days: Days of stock a reorder should provide after arrival
+            limit: Number of products to return, soonest stock-out first
+        
+        Returns:
+            Dictionary with per-product forecasts and timing (compute_ms
+            covers the whole call, queries included)
         """
+        start = time.perf_counter()
         
-        await self.db.execute_query(update_query, quantity, product_id)
+        sales_query = """
+            SELECT s."productId", s.units::float8 AS units, COALESCE(p.quantity, 0)::float8 AS quantity
+            FROM (
+                SELECT "productId", SUM(-quantity_delta) AS units
+                FROM bedrock_integration.inventory_history
+                WHERE event_type = 'S'
+                  AND recorded_at >= NOW() - make_interval(days => %s)
+                GROUP BY "productId"
+            ) s
+            JOIN bedrock_integration.product_catalog p ON p."productId" = s."productId"
+        """
+        
+        span_query = """
+            SELECT EXTRACT(EPOCH FROM NOW() - MIN(recorded_at))::float8 AS age_seconds
+            FROM bedrock_integration.inventory_history
+            WHERE event_type = 'S'
+              AND recorded_at >= NOW() - make_interval(days => %s)
+        """
+        
+        try:
+            sales, span = await self.db.pipeline([
+                (sales_query, (window_days,)),
+                (span_query, (window_days,)),
+            ])
+        except UndefinedTable:
+            return {
+                "status": "error",
+                "message": "inventory_history is not installed; run the database setup script"
+            }
+        
+        oldest_sale = span[0]["age_seconds"] if span else None
+        if oldest_sale is None:
+            return {
+                "status": "success",
+                "products_with_sales": 0,
+                "forecast": [],
+                "message": "No sales recorded in the window yet",
+                "parameters": {"window_days": window_days, "lead_time_days": lead_time_days, "cover_days": cover_days}
+            }
+        
+        # Average over the observed span when history is younger than the window
+        span_days = min(float(window_days), max(oldest_sale / 86400, 1.0))
+        
+        units_sold = np.fromiter((row["units"] for row in sales), dtype=np.float64, count=len(sales))
+        quantity = np.fromiter((row["quantity"] for row in sales), dtype=np.float64, count=len(sales))
+        daily_rate = units_sold / span_days
+        
+        with np.errstate(divide="ignore"):
+            days_of_cover = np.where(daily_rate > 0, quantity / daily_rate, np.inf)
+        reorder_point = daily_rate * lead_time_days
+        suggested_order = np.ceil(np.maximum(daily_rate * (lead_time_days + cover_days) - quantity, 0))
+        
+        selling = np.flatnonzero(daily_rate > 0)
+        reorder_now = selling[quantity[selling] <= reorder_point[selling]]
+        order = selling[np.argsort(days_of_cover[selling], kind="stable")[:limit]]
+        
+        forecast = [
+            {
+                "productId": sales[i]["productId"],
+                "product_description": None,
+                "quantity": int(quantity[i]),
+                "units_sold": int(units_sold[i]),
+                "daily_rate": round(float(daily_rate[i]), 3),
+                "days_of_cover": round(float(days_of_cover[i]), 1),
+                "reorder_point": int(np.ceil(reorder_point[i])),
+                "suggested_order": int(suggested_order[i]),
+                "reorder_now": bool(quantity[i] <= reorder_point[i])
+            }
+            for i in order
+        ]
+        await attach_descriptions(self.db, forecast)
         
         return {
             "status": "success",
-            "product_id": product_id,
-            "product_name": product['product_description'],
-            "old_quantity": old_quantity,
-            "added_quantity": quantity,
-            "new_quantity": new_quantity,
-            "message": f"✅ Added {quantity} units to {product['product_description']}"
+            "products_with_sales": len(selling),
+            "reorder_now_count": len(reorder_now),
+            "forecast": forecast,
+            "parameters": {
+                "window_days": window_days,
+                "observed_days": round(span_days, 2),
+                "lead_time_days": lead_time_days,
+                "cover_days": cover_days
+            },
+            "compute_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    
+    async def get_low_stock_products(
+        self,
+        threshold: int = 10,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        In-stock products below a stock threshold, highest demand first.
+        
+        Served by idx_product_low_stock (partial on quantity < 10, ordered
+        by reviews, productId); the literal predicate must stay in the query
+        so the planner can use that index with any threshold up to 10.
+        
+        Args:
+            threshold: Upper bound on quantity (exclusive, at most 10)
+            limit: Page size
+            cursor: Cursor from the previous page's X-Next-Cursor
+        
+        Returns:
+            Tuple of (products, next cursor or None)
+        
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        after = decode_cursor(cursor, 2)
+        keyset = 'AND (reviews, "productId") < (%s, %s)' if after else ""
+        
+        query = f"""
+            SELECT {INVENTORY_LIST_COLUMNS}
+            FROM bedrock_integration.product_catalog
+            WHERE quantity < 10
+              AND quantity > 0
+              AND quantity < %s
+              {keyset}
+            ORDER BY reviews DESC, "productId" DESC
+            LIMIT %s
+        """
+        
+        rows = await self.db.fetch_all(query, threshold, *(after or ()), limit + 1)
+        return rows, next_cursor(rows, limit, ("reviews", "productId"))
+    
+    async def get_out_of_stock_products(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Products with no stock, highest demand first.
+        
+        Served by idx_product_out_of_stock (partial on quantity = 0).
+        
+        Args:
+            limit: Page size
+            cursor: Cursor from the previous page's X-Next-Cursor
+        
+        Returns:
+            Tuple of (products, next cursor or None)
+        
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        after = decode_cursor(cursor, 2)
+        keyset = 'AND (reviews, "productId") < (%s, %s)' if after else ""
+        
+        query = f"""
+            SELECT {INVENTORY_LIST_COLUMNS}
+            FROM bedrock_integration.product_catalog
+            WHERE quantity = 0
+              {keyset}
+            ORDER BY reviews DESC, "productId" DESC
+            LIMIT %s
+        """
+        
+        rows = await self.db.fetch_all(query, *(after or ()), limit + 1)
+        return rows, next_cursor(rows, limit, ("reviews", "productId"))
+    
+    async def analyze_inventory(self, threshold: int = 10, sample_size: int = 20) -> Dict[str, Any]:
+        """
+        Inventory summary with the top low-stock and out-of-stock products.
+        
+        Counts come from an index-only scan of the low-stock partial index;
+        catalog totals come from the aggregates table when installed.
+        
+        Args:
+            threshold: Low-stock threshold (exclusive, at most 10)
+            sample_size: Products to include in each list
+        
+        Returns:
+            Dictionary shaped like the frontend's InventoryAnalysis
+        """
+        counts_query = """
+            SELECT
+                COUNT(*) FILTER (WHERE quantity > 0 AND quantity < %s) as low_stock_count,
+                COUNT(*) FILTER (WHERE quantity = 0) as out_of_stock_count
+            FROM bedrock_integration.product_catalog
+            WHERE quantity < 10
+        """
+        
+        if BusinessLogic._aggregates_available is not False:
+            totals_query = """
+                SELECT
+                    total_products,
+                    total_quantity::numeric / NULLIF(quantity_rows, 0) as average_quantity
+                FROM bedrock_integration.catalog_aggregates
+            """
+        else:
+            totals_query = """
+                SELECT COUNT(*) as total_products, AVG(quantity) as average_quantity
+                FROM bedrock_integration.product_catalog
+            """
+        
+        try:
+            count_rows, total_rows = await self.db.pipeline([
+                (counts_query, (threshold,)),
+                (totals_query, ()),
+            ])
+        except UndefinedTable:
+            BusinessLogic._aggregates_available = False
+            return await self.analyze_inventory(threshold, sample_size)
+        
+        low_stock, _ = await self.get_low_stock_products(threshold, sample_size)
+        out_of_stock, _ = await self.get_out_of_stock_products(sample_size)
+        
+        totals = total_rows[0] if total_rows else {"total_products": 0, "average_quantity": None}
+        
+        return {
+            "total_products": totals["total_products"],
+            "low_stock_count": count_rows[0]["low_stock_count"],
+            "out_of_stock_count": count_rows[0]["out_of_stock_count"],
+            "average_quantity": round(totals["average_quantity"] or 0, 2),
+            "low_stock_threshold": threshold,
+            "low_stock_products": low_stock,
+            "out_of_stock_products": out_of_stock
         }
     
     async def list_custom_tools(self) -> Dict[str, Any]:
@@ -274,6 +862,33 @@ class BusinessLogic:
                 },
                 "returns": "Restock confirmation with old and new quantities"
             },
+            {
+                "name": "restock_products",
+                "description": "Add stock to many products atomically",
+                "parameters": {
+                    "items": "List of {product_id, quantity} pairs"
+                },
+                "returns": "Old and new quantities per product, plus unknown IDs"
+            },
+            {
+                "name": "record_sales",
+                "description": "Record units sold and decrement stock atomically",
+                "parameters": {
+                    "items": "List of {product_id, quantity} pairs"
+                },
+                "returns": "Old and new quantities, plus products with insufficient stock"
+            },
+            {
+                "name": "get_reorder_forecast",
+                "description": "Forecast depletion rate and days of cover from sales history",
+                "parameters": {
+                    "window_days": "Days of sales history to use (default: 30)",
+                    "lead_time_days": "Reorder lead time in days (default: 7)",
+                    "cover_days": "Days of stock a reorder should cover after arrival (default: 30)",
+                    "limit": "Number of products to return (default: 20)"
+                },
+                "returns": "Products closest to stock-out with suggested reorder quantities"
+            },
             {
                 "name": "list_custom_tools",
                 "description": "List all available custom MCP tools",
@@ -0,0 +1,100 @@
+"""
+Category centroid routing for Blaize Bazaar
+
+bedrock_integration.category_centroids holds one embedding per category
+(the normalized mean of its normalized product embeddings), rebuilt by the
+refresh_category_centroids() batch job. Comparing a query embedding with a
+few hundred centroids tells which categories a query is about for the cost
+of a small table scan.
+
+Search uses this to prune: candidates are restricted to the nearest
+categories and read through the category btree index, then ranked exactly,
+instead of walking the whole HNSW graph. The agents use it for intent
+routing.
+"""
+
+import logging
+from typing import Any, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+NEAREST_CATEGORIES_QUERY = """
+    SELECT
+        category_name,
+        1 - (centroid <=> %(embedding)s::vector) AS score,
+        product_count
+    FROM bedrock_integration.category_centroids
+    ORDER BY centroid <=> %(embedding)s::vector
+    LIMIT %(categories)s
+"""
+
+# SearchFilters predicate restricting candidates to the nearest categories;
+# the search statement supplies %(embedding)s
+NEAREST_CATEGORIES_CLAUSE = """category_name IN (
+                  SELECT category_name FROM bedrock_integration.category_centroids
+                  ORDER BY centroid <=> %(embedding)s::vector
+                  LIMIT %(filter_nearest_categories)s
+              )"""
+
+REFRESH_QUERY = "SELECT bedrock_integration.refresh_category_centroids() AS categories"
+
+
+def routing_statements(embedding: Any, categories: int) -> List[Tuple[str, Any]]:
+    """
+    Pipeline prefix for a search restricted to the nearest categories.
+    
+    The first statement reports the chosen categories. The second turns off
+    plain index scans for the transaction, so the planner reads the routed
+    categories through a bitmap scan of the category index and ranks them
+    exactly, rather than post-filtering an HNSW scan (HNSW has no bitmap
+    scan, so it is out of the plan).
+    
+    Args:
+        embedding: Query embedding
+        categories: Number of nearest categories
+    
+    Returns:
+        (query, params) pairs to put before the search statement(s)
+    """
+    return [
+        (NEAREST_CATEGORIES_QUERY, {"embedding": embedding, "categories": categories}),
+        ("SELECT set_config('enable_indexscan', 'off', true)", ()),
+    ]
+
+
+def shape_routes(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Routed categories for a response, nearest first."""
+    return [
+        {
+            "category": row["category_name"],
+            "score": round(row["score"], 4),
+            "product_count": row["product_count"],
+        }
+        for row in rows
+    ]
+
+
+async def nearest_categories(db_service, embedding: Any, categories: int = 3) -> List[Dict[str, Any]]:
+    """
+    Categories whose centroids are nearest to an embedding.
+    
+    Args:
+        db_service: DatabaseService
+        embedding: Query embedding
+        categories: Number of categories to return
+    
+    Returns:
+        List of {"category", "score", "product_count"}, nearest first
+    """
+    (rows,) = await db_service.pipeline([
+        (NEAREST_CATEGORIES_QUERY, {"embedding": embedding, "categories": categories}),
+    ])
+    return shape_routes(rows)
+
+
+async def refresh_category_centroids(db_service) -> int:
+    """Recompute every category centroid; returns the number of categories."""
+    # execute_returning commits; the function writes
+    (row,) = await db_service.execute_returning(REFRESH_QUERY)
+    logger.info(f"✅ Category centroids refreshed: {row['categories']} categories")
+    return row["categories"]
@@ -0,0 +1,195 @@
+"""
+In-memory category dictionary for Blaize Bazaar
+
+Holds the catalog's distinct category names (a few hundred strings) so a
+browse term can be resolved to categories without touching the table:
+exact, substring, then fuzzy matching with the same trigram similarity
+pg_trgm uses. Resolved categories are read through the ordered
+(category_name, stars, reviews) index; only unresolved free-text terms
+fall back to the trigram GIN index on product descriptions.
+
+The dictionary reloads lazily after the change feed reports a category
+change.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES_QUERY = """
+    SELECT DISTINCT category_name
+    FROM bedrock_integration.product_catalog
+    WHERE category_name IS NOT NULL
+"""
+
+# pg_trgm's default similarity threshold (pg_trgm.similarity_threshold)
+SIMILARITY_THRESHOLD = 0.3
+MAX_FUZZY_MATCHES = 3
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase alphanumeric words joined by single spaces."""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Trigram set of ``text`` as pg_trgm builds it (words padded '  w ')."""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """pg_trgm similarity(): shared trigrams over all distinct trigrams."""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+@dataclass(frozen=True)
+class CategoryMatch:
+    """
+    Result of resolving a browse term.
+    
+    ``match`` is "exact", "substring", "fuzzy" or "none"; ``categories`` is
+    empty for "none" (treat the term as free text).
+    """
+    
+    match: str
+    categories: Tuple[str, ...] = ()
+    scores: Tuple[float, ...] = field(default=(), compare=False)
+
+
+class CategoryDictionary:
+    """
+    Distinct category names with their normalized forms and trigram sets.
+    
+    Example:
+        ```python
+        dictionary = get_category_dictionary(db)
+        resolved = await dictionary.resolve("vacum cleaners")
+        # CategoryMatch(match="fuzzy", categories=("Vacuum Cleaners",))
+        ```
+    """
+    
+    def __init__(self, db_service):
+        self.db = db_service
+        self._names: List[str] = []
+        self._keys: List[str] = []
+        self._normalized: Dict[str, List[str]] = {}
+        self._trigrams: List[FrozenSet[str]] = []
+        self._stale = True
+        self._lock = asyncio.Lock()
+        self._loads = 0
+    
+    async def _ensure_loaded(self) -> None:
+        if not self._stale:
+            return
+        async with self._lock:
+            if not self._stale:
+                return
+            # Cleared before reading, so a change during the load marks it again
+            self._stale = False
+            try:
+                rows = await self.db.fetch_all(CATEGORIES_QUERY)
+            except Exception:
+                self._stale = True
+                raise
+            
+            names = sorted(row["category_name"] for row in rows)
+            normalized: Dict[str, List[str]] = {}
+            for name in names:
+                normalized.setdefault(normalize(name), []).append(name)
+            
+            self._names = names
+            self._keys = [normalize(name) for name in names]
+            self._normalized = normalized
+            self._trigrams = [trigrams(name) for name in names]
+            self._loads += 1
+            logger.info(f"✅ Category dictionary loaded: {len(names)} categories")
+    
+    def on_change(self, change) -> None:
+        """Change-feed listener: reload on next use if categories may have changed."""
+        if change.touches({"category_name"}):
+            self._stale = True
+    
+    async def resolve(self, term: str) -> CategoryMatch:
+        """
+        Resolve a browse term to catalog categories.
+        
+        Tries, in order: exact match ignoring case and punctuation
+        ("shaving grooming" -> "Shaving & Grooming"), categories containing
+        the term, then the most trigram-similar categories above pg_trgm's
+        default threshold.
+        
+        Args:
+            term: User's browse term
+        
+        Returns:
+            CategoryMatch with the matched category names
+        """
+        await self._ensure_loaded()
+        key = normalize(term)
+        if not key:
+            return CategoryMatch("none")
+        
+        exact = self._normalized.get(key)
+        if exact:
+            return CategoryMatch("exact", tuple(exact))
+        
+        contained = tuple(name for name, name_key in zip(self._names, self._keys) if key in name_key)
+        if contained:
+            return CategoryMatch("substring", contained)
+        
+        query_grams = trigrams(term)
+        scored = sorted(
+            (
+                (similarity(query_grams, grams), name)
+                for name, grams in zip(self._names, self._trigrams)
+            ),
+            reverse=True,
+        )
+        fuzzy = [(score, name) for score, name in scored[:MAX_FUZZY_MATCHES] if score >= SIMILARITY_THRESHOLD]
+        if fuzzy:
+            return CategoryMatch(
+                "fuzzy",
+                tuple(name for _, name in fuzzy),
+                tuple(round(score, 3) for score, _ in fuzzy),
+            )
+        
+        return CategoryMatch("none")
+    
+    def stats(self) -> dict:
+        """Dictionary status for health reporting."""
+        return {
+            "categories": len(self._names),
+            "stale": self._stale,
+            "loads": self._loads,
+        }
+
+
+# Global dictionary, loaded on first browse
+_category_dictionary: Optional[CategoryDictionary] = None
+
+
+def get_category_dictionary(db_service) -> CategoryDictionary:
+    """
+    Return the process-wide CategoryDictionary, creating it on first use.
+    
+    The dictionary subscribes to the catalog change feed; names are loaded
+    on the first resolve().
+    """
+    global _category_dictionary
+    if _category_dictionary is None:
+        _category_dictionary = CategoryDictionary(db_service)
+        db_service.add_change_listener(_category_dictionary.on_change)
+    return _category_dictionary
@@ -0,0 +1,208 @@
+"""
+Catalog change feed for DAT406 Workshop
+
+Statement-level triggers on product_catalog publish compact NOTIFY payloads
+(operation, product ids, changed columns) on the catalog_changes channel.
+One dedicated LISTEN connection per process fans them out to subscribers,
+so caches and snapshots in every worker can invalidate exactly what changed
+instead of relying on TTLs.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+import psycopg
+from psycopg import sql
+
+logger = logging.getLogger(__name__)
+
+# Queue depth per subscriber before it is told to resync instead
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Fixed by notify_catalog_changes() in deployment/setup-database-dat406.sh;
+# change both together
+CHANGE_FEED_CHANNEL = "catalog_changes"
+
+
+@dataclass(frozen=True)
+class CatalogChange:
+    """
+    One statement's worth of catalog changes.
+    
+    ``ids`` is None when the payload was truncated or after a reconnect
+    (anything may have changed); ``columns`` is None when whole rows
+    changed (insert, delete, truncate, primary key update).
+    """
+    
+    op: str
+    ids: Optional[tuple[str, ...]] = None
+    columns: Optional[frozenset[str]] = None
+    count: Optional[int] = None
+    
+    @property
+    def is_full_invalidation(self) -> bool:
+        """True when listeners cannot tell which products changed."""
+        return self.ids is None
+    
+    def touches(self, columns: Iterable[str]) -> bool:
+        """
+        Check whether the change may affect any of the given columns.
+        
+        Example:
+            ```python
+            if change.touches({"price", "quantity"}):
+                cache.invalidate(change.ids)
+            ```
+        """
+        return self.columns is None or not self.columns.isdisjoint(columns)
+    
+    @classmethod
+    def from_payload(cls, payload: str) -> "CatalogChange":
+        """Parse a NOTIFY payload published by notify_catalog_changes()."""
+        data = json.loads(payload)
+        ids = data.get("ids")
+        columns = data.get("columns")
+        return cls(
+            op=data.get("op", "unknown"),
+            ids=tuple(ids) if ids is not None else None,
+            columns=frozenset(columns) if columns is not None else None,
+            count=data.get("count"),
+        )
+
+
+# Sent to subscribers when notifications may have been missed
+RESYNC = CatalogChange(op="resync")
+
+
+class ChangeFeed:
+    """
+    Shared LISTEN connection that fans catalog changes out to subscribers.
+    
+    The connection is opened on first subscription and re-established with
+    backoff if it drops; subscribers then receive RESYNC, since NOTIFYs
+    sent while disconnected are lost.
+    """
+    
+    def __init__(self, conninfo: str, channel: str = CHANGE_FEED_CHANNEL):
+        """
+        Args:
+            conninfo: PostgreSQL connection string
+            channel: NOTIFY channel to listen on
+        """
+        self._conninfo = conninfo
+        self._channel = channel
+        self._queues: set[asyncio.Queue] = set()
+        self._listeners: list[Callable[[CatalogChange], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._notifications = 0
+        self._reconnects = 0
+    
+    def start(self) -> None:
+        """Start the listener task if it is not running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen_forever())
+    
+    async def stop(self) -> None:
+        """Stop listening and close the dedicated connection."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """
+        Register a queue that receives every CatalogChange.
+        
+        Example:
+            ```python
+            async with feed.subscribe() as changes:
+                change = await changes.get()
+            ```
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._queues.add(queue)
+        self.start()
+        try:
+            yield queue
+        finally:
+            self._queues.discard(queue)
+    
+    def add_listener(self, callback: Callable[[CatalogChange], None]) -> Callable[[], None]:
+        """
+        Call ``callback`` synchronously for every change.
+        
+        Callbacks run on the event loop and must be quick (e.g. drop cache
+        entries); use subscribe() for anything that awaits.
+        
+        Returns:
+            Function that removes the listener
+        """
+        self._listeners.append(callback)
+        self.start()
+        return lambda: self._listeners.remove(callback)
+    
+    def _publish(self, change: CatalogChange) -> None:
+        """Deliver a change to every listener and subscriber queue."""
+        for callback in list(self._listeners):
+            try:
+                callback(change)
+            except Exception as e:
+                logger.warning(f"Change listener failed: {e}")
+        
+        for queue in list(self._queues):
+            try:
+                queue.put_nowait(change)
+            except asyncio.QueueFull:
+                # A slow subscriber loses detail, not correctness
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+    
+    async def _listen_forever(self) -> None:
+        """Hold the LISTEN connection open, reconnecting with backoff."""
+        backoff = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self._conninfo, autocommit=True
+                ) as conn:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._channel)))
+                    logger.info(f"✅ Listening for catalog changes on '{self._channel}'")
+                    
+                    if self._reconnects:
+                        self._publish(RESYNC)
+                    backoff = 1.0
+                    
+                    async for notify in conn.notifies():
+                        self._notifications += 1
+                        try:
+                            change = CatalogChange.from_payload(notify.payload)
+                        except (ValueError, TypeError):
+                            logger.warning(f"Unparseable change payload: {notify.payload[:200]}")
+                            change = RESYNC
+                        self._publish(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._reconnects += 1
+                logger.warning(f"⚠️ Change feed connection lost ({e}); retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+    
+    def stats(self) -> dict:
+        """Feed status for health reporting."""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "subscribers": len(self._queues),
+            "listeners": len(self._listeners),
+            "notifications": self._notifications,
+            "reconnects": self._reconnects,
+        }
@@ -13,25 +13,19 @@ import sys
 from typing import List, Dict, Any, Optional
 import re
 
-import boto3
-
-# Configure logging levels - show agent activity
-logging.getLogger("strands").setLevel(logging.INFO)  # Show agent activity
-logging.getLogger("strands.models.bedrock").setLevel(logging.INFO)  # Show bedrock calls
-logging.getLogger("strands.tools.mcp").setLevel(logging.INFO)  # Show tool calls
-logging.getLogger("strands.tools.registry").setLevel(logging.INFO)  # Show registry
-logging.getLogger("strands.agent").setLevel(logging.INFO)  # Show agent logs
-logging.getLogger("strands.event_loop").setLevel(logging.INFO)  # Show event loop
-logging.getLogger("botocore").setLevel(logging.WARNING)  # Reduce AWS noise
-logging.getLogger("urllib3").setLevel(logging.WARNING)  # Reduce HTTP noise
+logger = logging.getLogger(__name__)
 
-logging.basicConfig(
-    format="%(levelname)s | %(name)s | %(message)s",
-    handlers=[logging.StreamHandler()],
-    level=logging.INFO
-)
 
-logger = logging.getLogger(__name__)
+def _configure_agent_logging() -> None:
+    """Configure logging levels - show agent activity"""
+    logging.getLogger("strands").setLevel(logging.INFO)  # Show agent activity
+    logging.getLogger("strands.models.bedrock").setLevel(logging.INFO)  # Show bedrock calls
+    logging.getLogger("strands.tools.mcp").setLevel(logging.INFO)  # Show tool calls
+    logging.getLogger("strands.tools.registry").setLevel(logging.INFO)  # Show registry
+    logging.getLogger("strands.agent").setLevel(logging.INFO)  # Show agent logs
+    logging.getLogger("strands.event_loop").setLevel(logging.INFO)  # Show event loop
+    logging.getLogger("botocore").setLevel(logging.WARNING)  # Reduce AWS noise
+    logging.getLogger("urllib3").setLevel(logging.WARNING)  # Reduce HTTP noise
 
 
 class EnhancedChatService:
@@ -41,9 +35,10 @@ class EnhancedChatService:
         """Initialize with Strands and MCP configuration"""
         from config import settings
         
+        _configure_agent_logging()
+        
         self.model_id = settings.BEDROCK_CHAT_MODEL
         self.region = settings.AWS_REGION
-        self.bedrock = boto3.client('bedrock-runtime', region_name=self.region)
         
         # MCP Server configuration - REQUIRED
         self.db_cluster_arn = getattr(settings, 'DB_CLUSTER_ARN', None)
@@ -5,19 +5,99 @@ Manages PostgreSQL connections using psycopg 3 with connection pooling.
 Provides async context managers for safe database access.
 """
 
+import asyncio
 import logging
-from contextlib import asynccontextmanager
-from typing import AsyncIterator, Optional, Any
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Any, Sequence
 
 import psycopg
-from psycopg import AsyncConnection
+from psycopg import AsyncConnection, sql
 from psycopg.rows import dict_row
-from psycopg_pool import AsyncConnectionPool
+from psycopg.types.numeric import FloatLoader
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 
 from config import settings
+from services.change_feed import CatalogChange, ChangeFeed
 
 logger = logging.getLogger(__name__)
 
+# Binary COPY needs exact wire types; floats must become Decimal for numeric
+NUMERIC_OID = 1700
+
+# A checkout whose remaining budget is within this of the pooled session's
+# statement_timeout (REQUEST_TIMEOUT_MS) keeps the session value rather than
+# paying a round trip to set it; a statement may overrun by at most this much
+STATEMENT_TIMEOUT_SLACK_MS = 250
+
+# Monotonic deadline (seconds) for queries issued in the current request
+_query_deadline: ContextVar[Optional[float]] = ContextVar("query_deadline", default=None)
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a query cannot finish before the active request deadline."""
+
+
+@contextmanager
+def request_deadline(timeout_ms: Optional[float]) -> Iterator[None]:
+    """
+    Bound every query issued inside the block by a shared deadline.
+    
+    The deadline is stored in a context variable, so it follows the
+    request through awaits and tasks spawned from it. Nested deadlines
+    can only shorten the one already in effect.
+    
+    Args:
+        timeout_ms: Time budget in milliseconds (None or 0 disables it)
+    
+    Example:
+        ```python
+        with request_deadline(5000):
+            rows = await db.fetch_all("SELECT ...")
+        ```
+    """
+    deadline = _query_deadline.get()
+    if timeout_ms:
+        candidate = time.monotonic() + timeout_ms / 1000
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    
+    token = _query_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _query_deadline.reset(token)
+
+
+async def configure_connection(conn: AsyncConnection) -> None:
+    """
+    Set up a new pooled connection once, before its first checkout.
+    
+    Registers pgvector types and loads ``numeric`` columns straight to
+    float (psycopg's C FloatLoader), so rows are JSON-ready without a
+    Decimal-to-float walk. Doing this here instead of on every checkout
+    also saves pgvector's type lookups per query. The session
+    statement_timeout starts at the default request budget, so most
+    request checkouts need no per-transaction override.
+    
+    Args:
+        conn: Freshly opened connection
+    """
+    from pgvector.psycopg import register_vector_async
+    await register_vector_async(conn)
+    
+    conn.adapters.register_loader("numeric", FloatLoader)
+    
+    if settings.REQUEST_TIMEOUT_MS:
+        await conn.execute(
+            "SELECT set_config('statement_timeout', %s, false)",
+            (f"{settings.REQUEST_TIMEOUT_MS}ms",),
+        )
+    
+    # The type lookups opened a transaction; the pool requires an idle connection
+    await conn.commit()
+
 
 class DatabaseService:
     """
@@ -31,6 +111,8 @@ class DatabaseService:
         """Initialize database service (pool created on connect)."""
         self._pool: Optional[AsyncConnectionPool] = None
         self._is_connected = False
+        self._timed_out_queries = 0
+        self._change_feed: Optional[ChangeFeed] = None
     
     async def connect(self) -> None:
         """
@@ -57,6 +139,7 @@ class DatabaseService:
                 max_size=settings.DB_POOL_MAX_SIZE,
                 timeout=settings.DB_POOL_TIMEOUT,
                 open=False,  # Open manually after configuration
+                configure=configure_connection,  # Once per new connection
                 kwargs={
                     "row_factory": dict_row,  # Return rows as dictionaries
                     "autocommit": False,  # Explicit transaction control
@@ -86,50 +169,47 @@ class DatabaseService:
         """
         Test database connection and verify pgvector extension.
         
+        Runs a single lightweight query so startup cost does not grow
+        with the size of the catalog.
+        
         Raises:
             Exception: If connection test fails
         """
         try:
-            async with self.get_connection() as conn:
-                async with conn.cursor() as cur:
-                    # Test basic connectivity
-                    await cur.execute("SELECT version();")
-                    version = await cur.fetchone()
-                    logger.info(f"PostgreSQL version: {version['version'].split(',')[0]}")
-                    
-                    # Verify pgvector extension
-                    await cur.execute(
-                        "SELECT * FROM pg_extension WHERE extname = 'vector';"
-                    )
-                    vector_ext = await cur.fetchone()
-                    
-                    if vector_ext:
-                        logger.info("✅ pgvector extension is available")
-                    else:
-                        logger.warning("⚠️ pgvector extension not found")
-                    
-                    # Verify product_catalog table exists
-                    await cur.execute("""
-                        SELECT EXISTS (
-                            SELECT FROM information_schema.tables 
-                            WHERE table_schema = 'bedrock_integration'
-                            AND table_name = 'product_catalog'
-                        );
-                    """)
-                    table_exists = await cur.fetchone()
-                    
-                    if table_exists and table_exists['exists']:
-                        logger.info("✅ product_catalog table found")
-                        
-                        # Get row count
-                        await cur.execute(
-                            "SELECT COUNT(*) as count FROM bedrock_integration.product_catalog;"
-                        )
-                        count_result = await cur.fetchone()
-                        logger.info(f"📊 Products in catalog: {count_result['count']:,}")
-                    else:
-                        logger.warning("⚠️ product_catalog table not found")
-                        
+            # One round trip; the row count comes from planner statistics
+            # (pg_class.reltuples) instead of a COUNT(*) over the catalog
+            result = await self.fetch_one("""
+                SELECT
+                    version() AS version,
+                    EXISTS (
+                        SELECT 1 FROM pg_extension WHERE extname = 'vector'
+                    ) AS has_vector,
+                    to_regclass('bedrock_integration.product_catalog') IS NOT NULL AS has_catalog,
+                    (
+                        SELECT c.reltuples::bigint
+                        FROM pg_class c
+                        WHERE c.oid = to_regclass('bedrock_integration.product_catalog')
+                    ) AS estimated_rows
+            """)
+            
+            logger.info(f"PostgreSQL version: {result['version'].split(',')[0]}")
+            
+            if result['has_vector']:
+                logger.info("✅ pgvector extension is available")
+            else:
+                logger.warning("⚠️ pgvector extension not found")
+            
+            if result['has_catalog']:
+                logger.info("✅ product_catalog table found")
+                
+                estimated = result['estimated_rows']
+                if estimated is not None and estimated >= 0:
+                    logger.info(f"📊 Products in catalog (estimate): {estimated:,}")
+                else:
+                    logger.info("📊 Products in catalog: unknown (table not analyzed yet)")
+            else:
+                logger.warning("⚠️ product_catalog table not found")
+        
         except Exception as e:
             logger.error(f"Connection test failed: {e}")
             raise
@@ -140,6 +220,9 @@ class DatabaseService:
         
         This should be called during application shutdown.
         """
+        if self._change_feed:
+            await self._change_feed.stop()
+        
         if self._pool:
             logger.info("Closing database connection pool...")
             await self._pool.close()
@@ -166,23 +249,111 @@ class DatabaseService:
         
         Raises:
             RuntimeError: If database service not connected
+            QueryTimeoutError: If the request deadline expires first
         """
         if not self._is_connected or not self._pool:
             raise RuntimeError(
                 "Database service not connected. Call connect() first."
             )
         
-        async with self._pool.connection() as conn:
-            try:
-                # Register pgvector for this connection (async version)
-                from pgvector.psycopg import register_vector_async
-                await register_vector_async(conn)
-                yield conn
-            except Exception as e:
-                # Rollback on error
-                await conn.rollback()
+        deadline = _query_deadline.get()
+        checkout_timeout = float(settings.DB_POOL_TIMEOUT)
+        if deadline is not None:
+            checkout_timeout = min(checkout_timeout, self._remaining_seconds(deadline))
+        
+        try:
+            async with self._pool.connection(timeout=checkout_timeout) as conn:
+                async with self._guard_connection(conn, deadline):
+                    yield conn
+        except PoolTimeout as e:
+            if deadline is None:
+                raise
+            self._timed_out_queries += 1
+            raise QueryTimeoutError(
+                "Request deadline exceeded while waiting for a database connection"
+            ) from e
+    
+    @asynccontextmanager
+    async def _guard_connection(
+        self,
+        conn: AsyncConnection,
+        deadline: Optional[float],
+    ) -> AsyncIterator[None]:
+        """
+        Prepare a checked-out connection and translate failures on it.
+        
+        Applies the request deadline as a transaction-local statement_timeout
+        when it differs from the session default, cancels the running
+        statement when the request task is cancelled (client disconnect),
+        and rolls back on any error.
+        """
+        try:
+            timeout_ms = self._statement_timeout_ms(deadline)
+            if timeout_ms is not None:
+                # Transaction-local, so it never leaks to the next borrower
+                await conn.execute(
+                    "SELECT set_config('statement_timeout', %s, true)",
+                    (f"{timeout_ms}ms",),
+                )
+            
+            yield
+        except psycopg.errors.QueryCanceled as e:
+            await conn.rollback()
+            if deadline is None:
                 logger.error(f"Database error (rolled back): {e}")
                 raise
+            self._timed_out_queries += 1
+            logger.warning(f"Query cancelled at request deadline: {e}")
+            raise QueryTimeoutError(
+                "Query exceeded the request deadline and was cancelled"
+            ) from e
+        except asyncio.CancelledError:
+            # The client went away: stop the statement on the server too
+            try:
+                await conn.cancel_safe()
+                await conn.rollback()
+            except Exception as cancel_error:
+                logger.warning(f"Failed to cancel abandoned query: {cancel_error}")
+            raise
+        except QueryTimeoutError:
+            await conn.rollback()
+            raise
+        except Exception as e:
+            # Rollback on error
+            await conn.rollback()
+            logger.error(f"Database error (rolled back): {e}")
+            raise
+    
+    def _statement_timeout_ms(self, deadline: Optional[float]) -> Optional[int]:
+        """
+        statement_timeout a checkout must set, or None to keep the session's.
+        
+        Pooled sessions default to REQUEST_TIMEOUT_MS. A request's first
+        checkouts fall within STATEMENT_TIMEOUT_SLACK_MS of that and skip
+        the extra round trip; later ones, custom budgets, and work outside
+        any request (no limit) set their own.
+        """
+        default_ms = settings.REQUEST_TIMEOUT_MS
+        if deadline is None:
+            return 0 if default_ms else None
+        
+        remaining_ms = max(1, int(self._remaining_seconds(deadline) * 1000))
+        if default_ms and default_ms - STATEMENT_TIMEOUT_SLACK_MS <= remaining_ms <= default_ms:
+            return None
+        return remaining_ms
+    
+    def _remaining_seconds(self, deadline: float) -> float:
+        """
+        Time left before a request deadline, failing fast once it passed.
+        
+        Raises:
+            QueryTimeoutError: If the deadline has already expired
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._timed_out_queries += 1
+            raise QueryTimeoutError("Request deadline exceeded before the query started")
+        return remaining
     
     async def fetch_all(self, query: str, *params: Any) -> list[dict]:
         """
@@ -217,6 +388,48 @@ class DatabaseService:
                 await cur.execute(query, params)
                 return await cur.fetchone()
     
+    async def pipeline(
+        self,
+        statements: Sequence[tuple[str, Sequence[Any]]],
+    ) -> list[list[dict]]:
+        """
+        Execute several queries on one connection using pipeline mode.
+
+        All statements are sent to the server before any result is read,
+        so N queries cost one pool checkout and a single network round
+        trip instead of N of each.
+
+        Args:
+            statements: Sequence of (query, params) pairs
+
+        Returns:
+            One list of result rows per statement, in the same order
+
+        Example:
+            ```python
+            stats, items = await db.pipeline([
+                ("SELECT COUNT(*) AS total FROM products", ()),
+                ("SELECT * FROM products WHERE quantity < %s", (10,)),
+            ])
+            ```
+        """
+        async with self.get_connection() as conn:
+            cursors = []
+            try:
+                async with conn.pipeline():
+                    for query, params in statements:
+                        cur = conn.cursor()
+                        cursors.append(cur)
+                        await cur.execute(query, params if params else None)
+                # Leaving the pipeline block syncs, so every result is ready
+                return [
+                    await cur.fetchall() if cur.description else []
+                    for cur in cursors
+                ]
+            finally:
+                for cur in cursors:
+                    await cur.close()
+
     async def execute_query(self, query: str, *params: Any) -> None:
         """
         Execute query without returning results.
@@ -230,6 +443,27 @@ class DatabaseService:
                 await cur.execute(query, params)
                 await conn.commit()
     
+    async def execute_returning(self, query: str, *params: Any) -> list[dict]:
+        """
+        Execute a write with a RETURNING clause and commit.
+        
+        The rows come back from the same statement that changed them, so
+        callers never need a separate read (and its race) to report results.
+        
+        Args:
+            query: SQL INSERT/UPDATE/DELETE ... RETURNING
+            *params: Query parameters
+        
+        Returns:
+            list[dict]: Rows produced by RETURNING
+        """
+        async with self.get_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                rows = await cur.fetchall()
+                await conn.commit()
+                return rows
+    
     async def execute_many(
         self,
         query: str,
@@ -238,7 +472,8 @@ class DatabaseService:
         """
         Execute a query multiple times with different parameters.
         
-        Useful for batch inserts/updates.
+        Useful for small batch inserts/updates. For bulk loads prefer
+        copy_rows(), which streams rows with binary COPY.
         
         Args:
             query: SQL query to execute
@@ -249,11 +484,201 @@ class DatabaseService:
                 await cur.executemany(query, params_list)
                 await conn.commit()
     
+    async def copy_rows(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        *,
+        upsert_on: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+    ) -> int:
+        """
+        Bulk-write rows using binary COPY.
+        
+        Rows are streamed to the server in a single COPY instead of one
+        INSERT round trip per row. Column types are read from the catalog,
+        so pgvector columns accept lists, numpy arrays or Vector values.
+        
+        With ``upsert_on`` the rows are copied into a temporary staging
+        table first and then merged with ``INSERT ... ON CONFLICT``.
+        
+        Args:
+            table: Target table, optionally schema-qualified
+            columns: Column names, in the order values appear in each row
+            rows: Iterable of row value sequences
+            upsert_on: Conflict target columns; enables staging-table merge
+            update_columns: Columns overwritten on conflict (defaults to all
+                non-key columns; an empty list means DO NOTHING)
+        
+        Returns:
+            Number of rows copied (or inserted/updated when merging)
+        
+        Example:
+            ```python
+            await db.copy_rows(
+                "bedrock_integration.product_catalog",
+                ["productId", "quantity"],
+                [("B07XYZ1234", 25), ("B08ABC5678", 40)],
+                upsert_on=["productId"],
+                update_columns=["quantity"],
+            )
+            ```
+        """
+        target = sql.Identifier(*table.split("."))
+        column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+        
+        async with self.get_connection() as conn:
+            type_oids = await self._column_type_oids(conn, target, columns)
+            numeric_positions = [
+                i for i, oid in enumerate(type_oids) if oid == NUMERIC_OID
+            ]
+            
+            copy_target = target
+            if upsert_on:
+                # Only the copied columns, without the target's constraints
+                copy_target = sql.Identifier("_copy_staging")
+                await conn.execute(
+                    sql.SQL(
+                        "CREATE TEMP TABLE {} ON COMMIT DROP AS "
+                        "SELECT {} FROM {} WITH NO DATA"
+                    ).format(copy_target, column_list, target)
+                )
+            
+            copied = 0
+            async with conn.cursor() as cur:
+                copy_sql = sql.SQL("COPY {} ({}) FROM STDIN (FORMAT BINARY)").format(
+                    copy_target, column_list
+                )
+                async with cur.copy(copy_sql) as copy:
+                    copy.set_types(type_oids)
+                    for row in rows:
+                        if numeric_positions:
+                            row = list(row)
+                            for i in numeric_positions:
+                                if isinstance(row[i], float):
+                                    row[i] = Decimal(repr(row[i]))
+                        await copy.write_row(row)
+                        copied += 1
+                
+                if upsert_on:
+                    await cur.execute(
+                        self._merge_statement(target, copy_target, columns, upsert_on, update_columns)
+                    )
+                    copied = cur.rowcount
+            
+            await conn.commit()
+        
+        logger.info(f"Copied {copied:,} rows into {table}")
+        return copied
+    
+    async def _column_type_oids(
+        self,
+        conn: AsyncConnection,
+        target: sql.Identifier,
+        columns: Sequence[str],
+    ) -> list[int]:
+        """Look up the type OID of each column, in the given order."""
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT attname, atttypid
+                FROM pg_attribute
+                WHERE attrelid = %s::regclass
+                  AND attname = ANY(%s)
+                  AND attnum > 0
+                  AND NOT attisdropped
+                """,
+                (target.as_string(conn), list(columns)),
+            )
+            oids = {row["attname"]: row["atttypid"] for row in await cur.fetchall()}
+        
+        missing = [column for column in columns if column not in oids]
+        if missing:
+            raise ValueError(f"Unknown columns for {target.as_string(conn)}: {missing}")
+        return [oids[column] for column in columns]
+    
+    @staticmethod
+    def _merge_statement(
+        target: sql.Identifier,
+        staging: sql.Identifier,
+        columns: Sequence[str],
+        upsert_on: Sequence[str],
+        update_columns: Optional[Sequence[str]],
+    ) -> sql.Composed:
+        """Build the INSERT ... ON CONFLICT that merges staged rows."""
+        if update_columns is None:
+            update_columns = [column for column in columns if column not in upsert_on]
+        
+        if update_columns:
+            action = sql.SQL("DO UPDATE SET {}").format(
+                sql.SQL(", ").join(
+                    sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(c), sql.Identifier(c))
+                    for c in update_columns
+                )
+            )
+        else:
+            action = sql.SQL("DO NOTHING")
+        
+        column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+        return sql.SQL(
+            "INSERT INTO {target} ({columns}) SELECT {columns} FROM {staging} "
+            "ON CONFLICT ({keys}) {action}"
+        ).format(
+            target=target,
+            columns=column_list,
+            staging=staging,
+            keys=sql.SQL(", ").join(map(sql.Identifier, upsert_on)),
+            action=action,
+        )
+    
+    def _get_change_feed(self) -> ChangeFeed:
+        """Create the shared change feed on first use."""
+        if self._change_feed is None:
+            self._change_feed = ChangeFeed(settings.database_url)
+        return self._change_feed
+    
+    async def subscribe_changes(self) -> AsyncIterator[CatalogChange]:
+        """
+        Stream catalog changes published by the product_catalog triggers.
+        
+        All subscribers in the process share one LISTEN connection. A
+        change with ``ids=None`` (truncated payload, reconnect, or a
+        subscriber that fell behind) means "invalidate everything".
+        
+        Yields:
+            CatalogChange: One per writing statement
+        
+        Example:
+            ```python
+            async for change in db.subscribe_changes():
+                if change.touches({"price"}):
+                    cache.invalidate(change.ids)
+            ```
+        """
+        async with self._get_change_feed().subscribe() as queue:
+            while True:
+                yield await queue.get()
+    
+    def add_change_listener(self, callback: Callable[[CatalogChange], None]) -> Callable[[], None]:
+        """
+        Call ``callback`` for every catalog change (must not block).
+        
+        Must be called from the event loop. Returns a function that
+        removes the listener.
+        """
+        return self._get_change_feed().add_listener(callback)
+    
     @property
     def is_connected(self) -> bool:
         """Check if database service is connected."""
         return self._is_connected
     
+    @property
+    def timed_out_queries(self) -> int:
+        """Number of queries stopped by a request deadline since startup."""
+        return self._timed_out_queries
+    
     async def health_check(self) -> dict:
         """
         Check database health status.
@@ -276,6 +701,8 @@ class DatabaseService:
                 "status": "healthy" if result else "unhealthy",
                 "pool_size": self._pool.get_stats().pool_size if self._pool else 0,
                 "pool_available": self._pool.get_stats().pool_available if self._pool else 0,
+                "timed_out_queries": self._timed_out_queries,
+                "change_feed": self._change_feed.stats() if self._change_feed else "not_started",
             }
             
             return pool_stats
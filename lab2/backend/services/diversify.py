@@ -0,0 +1,80 @@
+"""
+Near-duplicate collapsing for search results
+
+Colour and size variants of one product have nearly identical description
+embeddings and crowd a result page. The search query over-fetches
+candidates together with their stored embeddings; candidates are then
+grouped greedily in rank order: each candidate not yet claimed becomes a
+group representative and claims every later candidate whose cosine
+similarity to it is at least the threshold. One vectorized row of a
+similarity matrix is computed per representative, so grouping costs a
+few milliseconds for hundreds of candidates.
+"""
+
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+# Candidates fetched per requested result, and the most ever fetched
+OVERFETCH_FACTOR = 4
+MAX_CANDIDATES = 1000
+# Titan embeddings of variants ("... Black" / "... Blue") score above this
+DEFAULT_THRESHOLD = 0.95
+
+
+@dataclass
+class ResultGroup:
+    """A representative candidate and the positions of its near-duplicates."""
+    
+    representative: int
+    variants: List[int]
+
+
+def candidate_count(limit: int, attempt: int = 0) -> int:
+    """Candidates to fetch for ``limit`` groups; doubles on each retry."""
+    return min(MAX_CANDIDATES, limit * OVERFETCH_FACTOR * 2 ** attempt)
+
+
+def group_near_duplicates(
+    embeddings: Sequence[np.ndarray],
+    threshold: float = DEFAULT_THRESHOLD,
+    limit: int = 10,
+) -> List[ResultGroup]:
+    """
+    Collapse near-duplicate candidates into groups.
+    
+    Args:
+        embeddings: Candidate embeddings, best match first
+        threshold: Cosine similarity at which a candidate is a variant
+        limit: Groups to return
+    
+    Returns:
+        Up to ``limit`` groups in rank order of their representatives
+    
+    Example:
+        ```python
+        groups = group_near_duplicates([row["embedding"] for row in rows], 0.95, 10)
+        page = [rows[group.representative] for group in groups]
+        ```
+    """
+    if len(embeddings) == 0:
+        return []
+    
+    vectors = np.asarray(np.stack(embeddings), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1.0, norms)
+    
+    unclaimed = np.ones(len(vectors), dtype=bool)
+    groups: List[ResultGroup] = []
+    for position in range(len(vectors)):
+        if not unclaimed[position]:
+            continue
+        unclaimed[position] = False
+        similar = (vectors @ vectors[position]) >= threshold
+        variants = np.flatnonzero(similar & unclaimed)
+        unclaimed[variants] = False
+        groups.append(ResultGroup(position, variants.tolist()))
+        if len(groups) == limit:
+            break
+    return groups
@@ -0,0 +1,159 @@
+"""
+Search facets for Blaize Bazaar
+
+Category, price-bucket and star-bucket counts over a search's top-N
+candidates, computed in the same statement as the result page: the
+candidates are materialized once, the page is read from them, and a single
+GROUP BY GROUPING SETS pass produces all three facets. The statement
+timestamps the last candidate row and the end of the grouping with
+clock_timestamp(), so facet cost is reported separately from the search.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from services.query_parser import FILTERED_EF_SEARCH, SearchFilters
+
+# Upper bounds of the price buckets: < 25, 25-50, 50-100, 100-200, 200-500, 500+
+PRICE_BUCKET_BOUNDS = (25.0, 50.0, 100.0, 200.0, 500.0)
+
+# pgvector's default hnsw.ef_search; larger candidate sets need it raised
+DEFAULT_EF_SEARCH = 40
+
+FACETED_SEARCH_QUERY = """
+    WITH candidates AS MATERIALIZED (
+        SELECT
+            {columns},
+            1 - (embedding <=> %(embedding)s::vector) AS similarity_score,
+            category_name AS facet_category,
+            price AS facet_price,
+            stars AS facet_stars,
+            embedding <=> %(embedding)s::vector AS distance,
+            clock_timestamp() AS fetched_at
+        FROM bedrock_integration.product_catalog
+        WHERE 1 - (embedding <=> %(embedding)s::vector) >= %(min_similarity)s{filters}
+        ORDER BY embedding <=> %(embedding)s::vector
+        LIMIT %(candidates)s
+    ),
+    facet_counts AS (
+        SELECT
+            json_agg(json_build_object('facet', facet, 'value', value, 'count', n)) AS facets,
+            clock_timestamp() AS faceted_at
+        FROM (
+            SELECT
+                CASE
+                    WHEN GROUPING(facet_category) = 0 THEN 'category'
+                    WHEN GROUPING(price_bucket) = 0 THEN 'price'
+                    ELSE 'stars'
+                END AS facet,
+                CASE
+                    WHEN GROUPING(facet_category) = 0 THEN to_json(facet_category)
+                    WHEN GROUPING(price_bucket) = 0 THEN to_json(price_bucket)
+                    ELSE to_json(star_bucket)
+                END AS value,
+                COUNT(*) AS n
+            FROM (
+                SELECT
+                    facet_category,
+                    width_bucket(facet_price::float8, %(price_bounds)s::float8[]) AS price_bucket,
+                    floor(facet_stars)::int AS star_bucket
+                FROM candidates
+            ) bucketed
+            GROUP BY GROUPING SETS ((facet_category), (price_bucket), (star_bucket))
+        ) grouped
+    )
+    SELECT
+        page.*,
+        CASE WHEN page.result_rank = 1 THEN f.facets END AS facets,
+        CASE WHEN page.result_rank = 1 THEN
+            extract(epoch FROM f.faceted_at - (SELECT max(fetched_at) FROM candidates)) * 1000
+        END AS facet_time_ms
+    FROM (
+        SELECT *, row_number() OVER (ORDER BY distance) AS result_rank
+        FROM candidates
+        ORDER BY distance
+        LIMIT %(limit)s
+    ) page
+    CROSS JOIN facet_counts f
+    ORDER BY page.result_rank
+"""
+
+
+def faceted_search_statements(
+    columns: str,
+    embedding: Any,
+    min_similarity: float,
+    limit: int,
+    candidates: int,
+    filters: SearchFilters = SearchFilters(),
+) -> List[Tuple[str, Any]]:
+    """
+    Statements for one pipelined round trip: widen the HNSW candidate list
+    if needed (transaction-local), then run the faceted search.
+    
+    Args:
+        columns: SELECT list for the requested product columns
+        embedding: Query embedding
+        min_similarity: Minimum cosine similarity
+        limit: Result page size
+        candidates: Top-N candidates the facets are counted over (>= limit)
+        filters: Structured filters applied to the candidates
+    
+    Returns:
+        (query, params) pairs for DatabaseService.pipeline; the last one
+        returns the page rows
+    """
+    candidates = max(candidates, limit)
+    params = {
+        "embedding": embedding,
+        "min_similarity": min_similarity,
+        "candidates": candidates,
+        "limit": limit,
+        "price_bounds": list(PRICE_BUCKET_BOUNDS),
+        **filters.params(),
+    }
+    ef_search = max(DEFAULT_EF_SEARCH, candidates, FILTERED_EF_SEARCH if filters else 0)
+    return [
+        ("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),)),
+        (FACETED_SEARCH_QUERY.format(columns=columns, filters=filters.sql()), params),
+    ]
+
+
+def price_bucket_label(bucket: Optional[int]) -> str:
+    """Label for a width_bucket() index over PRICE_BUCKET_BOUNDS."""
+    if bucket is None:
+        return "Unknown"
+    if bucket == 0:
+        return f"Under ${PRICE_BUCKET_BOUNDS[0]:,.0f}"
+    if bucket >= len(PRICE_BUCKET_BOUNDS):
+        return f"${PRICE_BUCKET_BOUNDS[-1]:,.0f}+"
+    return f"${PRICE_BUCKET_BOUNDS[bucket - 1]:,.0f} - ${PRICE_BUCKET_BOUNDS[bucket]:,.0f}"
+
+
+def star_bucket_label(bucket: Optional[int]) -> str:
+    """Label for a floor(stars) bucket."""
+    if bucket is None:
+        return "Unrated"
+    return "5 stars" if bucket >= 5 else f"{bucket} - {bucket}.9 stars"
+
+
+def shape_facets(raw: Optional[Sequence[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Group the statement's (facet, value, count) rows for the response.
+    
+    Categories are ordered by count; price and star buckets by value,
+    each with a display label.
+    """
+    facets: Dict[str, List[Dict[str, Any]]] = {"category": [], "price": [], "stars": []}
+    for entry in raw or ():
+        facet, value, count = entry["facet"], entry["value"], entry["count"]
+        if facet == "category":
+            facets["category"].append({"value": value, "count": count})
+        elif facet == "price":
+            facets["price"].append({"value": value, "label": price_bucket_label(value), "count": count})
+        else:
+            facets["stars"].append({"value": value, "label": star_bucket_label(value), "count": count})
+    
+    facets["category"].sort(key=lambda item: (-item["count"], item["value"] or ""))
+    for name in ("price", "stars"):
+        facets[name].sort(key=lambda item: (item["value"] is None, item["value"] or 0))
+    return facets
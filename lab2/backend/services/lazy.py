@@ -0,0 +1,98 @@
+"""
+Lazy loading for optional subsystems
+
+Heavy optional stacks (Strands agents, MCP, the chat service) are imported
+and constructed on first use, so workers that only serve catalog and search
+traffic start without paying for them.
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# boto3's default session is not thread-safe and imports hold the import
+# lock anyway, so subsystems are constructed one at a time
+_construction_lock = threading.Lock()
+
+
+class LazyService:
+    """
+    Import a module and build a service from it on first access.
+    
+    Example:
+        ```python
+        chat = LazyService("chat", "services.chat", "ChatService")
+        
+        service = await chat.aget()  # imported and constructed once
+        ```
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        attribute: Optional[str] = None,
+        setup: Optional[Callable[[Any], None]] = None,
+    ):
+        """
+        Describe a subsystem without importing it.
+        
+        Args:
+            name: Short name used in logs and stats
+            module: Dotted module path to import
+            attribute: Factory in the module to call; the module itself is
+                the service when omitted
+            setup: Optional hook called once with the loaded service
+        """
+        self.name = name
+        self._module = module
+        self._attribute = attribute
+        self._setup = setup
+        self._instance: Any = None
+        self._loaded = False
+        self._load_ms: Optional[float] = None
+    
+    def get(self) -> Any:
+        """
+        Return the service, importing and constructing it if needed.
+        
+        Raises:
+            ImportError: If the subsystem's dependencies are not installed
+        """
+        if self._loaded:
+            return self._instance
+        
+        with _construction_lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                module = importlib.import_module(self._module)
+                instance = getattr(module, self._attribute)() if self._attribute else module
+                if self._setup:
+                    self._setup(instance)
+                
+                self._instance = instance
+                self._load_ms = round((time.perf_counter() - start) * 1000, 1)
+                self._loaded = True
+                logger.info(f"✅ Loaded {self.name} subsystem on first use ({self._load_ms:.0f}ms)")
+        
+        return self._instance
+    
+    async def aget(self) -> Any:
+        """Async variant of get() that loads off the event loop."""
+        if self._loaded:
+            return self._instance
+        return await asyncio.to_thread(self.get)
+    
+    @property
+    def loaded(self) -> bool:
+        """Check if the subsystem has been loaded."""
+        return self._loaded
+    
+    def stats(self) -> dict:
+        """Load status for health and startup reporting."""
+        return {"loaded": self._loaded, "load_ms": self._load_ms}
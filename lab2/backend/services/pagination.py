@@ -0,0 +1,76 @@
+"""
+Keyset pagination helpers
+
+List endpoints page with opaque cursors that encode the sort key of the last
+row returned, so the next page is an index range read (WHERE (key) < cursor)
+instead of an OFFSET that rescans every skipped row. Cursors are returned in
+the X-Next-Cursor response header so list bodies keep their shape.
+"""
+
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor this API did not issue."""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode a row's sort key as an opaque, URL-safe cursor.
+    
+    Args:
+        values: Sort key of the last row on the page, in ORDER BY order
+    
+    Returns:
+        str: Cursor to send back as ``cursor=``
+    """
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], arity: int) -> Optional[List[Any]]:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Cursor from the request (None for the first page)
+        arity: Number of sort key values the endpoint expects
+    
+    Returns:
+        Sort key values, or None for the first page
+    
+    Raises:
+        InvalidCursorError: If the cursor is malformed or has the wrong shape
+    """
+    if not cursor:
+        return None
+    
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor[:40]}") from e
+    
+    if not isinstance(values, list) or len(values) != arity:
+        raise InvalidCursorError(f"Invalid cursor: {cursor[:40]}")
+    return values
+
+
+def next_cursor(rows: List[dict], limit: int, key_columns: Sequence[str]) -> Optional[str]:
+    """
+    Cursor for the page after ``rows``, fetched with LIMIT limit + 1.
+    
+    Trims the look-ahead row from ``rows`` in place.
+    
+    Returns:
+        Cursor string, or None when this is the last page
+    """
+    if len(rows) <= limit:
+        return None
+    
+    del rows[limit:]
+    return encode_cursor([rows[-1][column] for column in key_columns])
@@ -0,0 +1,95 @@
+"""
+Deferred overall price statistics for Blaize Bazaar
+
+The catalog triggers keep stock bands and per-category price statistics
+current, but the overall in-stock median needs a scan of every in-stock
+price, too slow for the write path. Writes that change the in-stock price
+set only mark it stale; PriceAggregateRefresher recomputes it shortly after,
+once per burst of writes, from the change feed.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from psycopg.errors import UndefinedFunction
+
+logger = logging.getLogger(__name__)
+
+REFRESH_QUERY = "SELECT bedrock_integration.refresh_stale_price_aggregates() AS refreshed"
+
+# Columns whose change can alter the in-stock price set
+PRICE_COLUMNS = frozenset({"price", "quantity", "category_name"})
+
+REFRESH_DELAY_SECONDS = 2.0
+
+
+class PriceAggregateRefresher:
+    """
+    Recomputes the overall price row after relevant writes (coalesced).
+    
+    Writes that land while a refresh runs schedule one more refresh rather
+    than being dropped.
+    """
+    
+    def __init__(self, db_service, delay: float = REFRESH_DELAY_SECONDS):
+        self.db = db_service
+        self.delay = delay
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._disabled = False
+        self._refreshes = 0
+    
+    def on_change(self, change) -> None:
+        """Change-feed listener: refresh shortly after price-set changes."""
+        if self._disabled or not change.touches(PRICE_COLUMNS):
+            return
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def _run(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.delay)
+            self._dirty = False
+            try:
+                await self.refresh()
+            except UndefinedFunction:
+                logger.warning("⚠️ refresh_stale_price_aggregates not installed; overall price refresh disabled")
+                self._disabled = True
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Overall price refresh failed: {e}")
+    
+    async def refresh(self) -> bool:
+        """Recompute the overall price row if stale; returns True if it did."""
+        # execute_returning commits; the function writes
+        (row,) = await self.db.execute_returning(REFRESH_QUERY)
+        if row["refreshed"]:
+            self._refreshes += 1
+        return row["refreshed"]
+    
+    def stats(self) -> dict:
+        """Refresher status for health reporting."""
+        return {
+            "pending": self._dirty or (self._task is not None and not self._task.done()),
+            "refreshes": self._refreshes,
+        }
+
+
+# Global refresher
+_price_refresher: Optional[PriceAggregateRefresher] = None
+
+
+def get_price_aggregate_refresher() -> Optional[PriceAggregateRefresher]:
+    """Return the process-wide PriceAggregateRefresher, if started."""
+    return _price_refresher
+
+
+def start_price_aggregate_refresher(db_service) -> PriceAggregateRefresher:
+    """Create the process-wide refresher and subscribe it to the change feed."""
+    global _price_refresher
+    refresher = PriceAggregateRefresher(db_service)
+    _price_refresher = refresher
+    db_service.add_change_listener(refresher.on_change)
+    return refresher
@@ -0,0 +1,182 @@
+"""
+Read-through product cache for Blaize Bazaar
+
+Product cards, the cart and chat hydration fetch the same rows over and
+over. ProductCache keeps recently used product rows in an in-process LRU,
+fetches misses for a whole batch with one ``= ANY(%s)`` query, and drops
+entries as soon as the catalog change feed reports a write to them.
+CACHE_TTL bounds staleness if a notification is ever missed.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_COLUMNS = (
+    "productId", "product_description", "imgurl", "producturl", "stars", "reviews",
+    "price", "category_id", "isbestseller", "boughtinlastmonth", "category_name", "quantity",
+)
+
+PRODUCTS_QUERY = """
+    SELECT
+        "productId",
+        product_description,
+        imgurl,
+        producturl,
+        stars,
+        reviews,
+        price,
+        category_id,
+        isbestseller,
+        boughtinlastmonth,
+        category_name,
+        quantity
+    FROM bedrock_integration.product_catalog
+    WHERE "productId" = ANY(%s)
+"""
+
+
+def rows_etag(rows: Iterable[Optional[dict]]) -> str:
+    """Weak ETag over the given rows (None for a missing product)."""
+    digest = hashlib.blake2b(
+        json.dumps(list(rows), sort_keys=True, default=str).encode(), digest_size=12
+    )
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (list or "*") against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class ProductCache:
+    """
+    LRU of product rows keyed by productId.
+    
+    Example:
+        ```python
+        cache = get_product_cache(db)
+        rows = await cache.get_many(["B0001", "B0002"])  # {id: row}
+        ```
+    """
+    
+    def __init__(self, db_service, max_size: int = 5000, ttl_seconds: float = 300):
+        """
+        Args:
+            db_service: DatabaseService used for misses
+            max_size: Maximum number of cached rows
+            ttl_seconds: Age after which a row is re-read even without a change
+        """
+        self.db = db_service
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._rows: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        # Bumped on every invalidation; fetches that overlap one are not stored
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+    
+    async def get_many(self, product_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Look up products, fetching all misses in one query.
+        
+        Args:
+            product_ids: Product IDs (duplicates are fine)
+        
+        Returns:
+            Dict of productId -> row for the products that exist
+        """
+        found: Dict[str, dict] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+        
+        for product_id in dict.fromkeys(product_ids):
+            entry = self._rows.get(product_id)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._rows.move_to_end(product_id)
+                found[product_id] = entry[1]
+                self._hits += 1
+            else:
+                missing.append(product_id)
+        
+        if missing:
+            self._misses += len(missing)
+            generation = self._generation
+            rows = await self.db.fetch_all(PRODUCTS_QUERY, missing)
+            
+            for row in rows:
+                found[row["productId"]] = dict(row)
+            # A write may have landed while the query ran; serve but don't keep
+            if generation == self._generation:
+                for row in rows:
+                    self._store(row["productId"], found[row["productId"]], now)
+        
+        return found
+    
+    async def get(self, product_id: str) -> Optional[dict]:
+        """Look up a single product (None if it does not exist)."""
+        return (await self.get_many([product_id])).get(product_id)
+    
+    def _store(self, product_id: str, row: dict, now: float) -> None:
+        self._rows[product_id] = (now, row)
+        self._rows.move_to_end(product_id)
+        while len(self._rows) > self.max_size:
+            self._rows.popitem(last=False)
+    
+    def on_change(self, change) -> None:
+        """Change-feed listener: drop the rows a write touched."""
+        if not change.touches(PRODUCT_COLUMNS):
+            return
+        self._generation += 1
+        self._invalidations += 1
+        if change.is_full_invalidation:
+            self._rows.clear()
+        else:
+            for product_id in change.ids:
+                self._rows.pop(product_id, None)
+    
+    def stats(self) -> dict:
+        """Cache status and hit rate for /api/cache/stats."""
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._rows),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+            "invalidations": self._invalidations,
+        }
+
+
+# Global product cache, created on first use
+_product_cache: Optional[ProductCache] = None
+
+
+def get_product_cache(db_service) -> ProductCache:
+    """Return the process-wide ProductCache, subscribing it to the change feed."""
+    global _product_cache
+    if _product_cache is None:
+        _product_cache = ProductCache(
+            db_service,
+            max_size=settings.PRODUCT_CACHE_SIZE,
+            ttl_seconds=settings.CACHE_TTL,
+        )
+        db_service.add_change_listener(_product_cache.on_change)
+    return _product_cache
+
+
+def peek_product_cache() -> Optional[ProductCache]:
+    """Return the product cache if it has been created (for stats)."""
+    return _product_cache
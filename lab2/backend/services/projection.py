@@ -0,0 +1,92 @@
+"""
+Field projection for catalog and search endpoints
+
+``fields=`` lets compact list views ask for just the columns they render
+(e.g. productId, price, similarity_score) instead of the full row with its
+multi-kilobyte description and URLs. Requested names are checked against
+an allow-list and mapped to fixed SQL column expressions, so the narrower
+SELECT list shrinks what Aurora reads and sends as well as the HTTP body.
+"""
+
+from typing import Dict, Iterable, Sequence, Tuple, Union
+
+# Selectable product columns and their SQL expressions (never user text)
+PRODUCT_COLUMNS: Dict[str, str] = {
+    "productId": '"productId"',
+    "product_description": "product_description",
+    "imgurl": "imgurl",
+    "producturl": "producturl",
+    "stars": "stars",
+    "reviews": "reviews",
+    "price": "price",
+    "category_id": "category_id",
+    "isbestseller": "isbestseller",
+    "boughtinlastmonth": "boughtinlastmonth",
+    "category_name": "category_name",
+    "quantity": "quantity",
+}
+
+# Every projected response identifies its products
+REQUIRED_FIELDS = ("productId",)
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when ``fields=`` names a field the endpoint does not offer."""
+
+
+def parse_fields(
+    fields: Union[None, str, Iterable[str]],
+    allowed: Iterable[str],
+    default: Sequence[str],
+) -> Tuple[str, ...]:
+    """
+    Validate a ``fields=`` request against an endpoint's allow-list.
+    
+    Args:
+        fields: Comma-separated string, list of names (either may repeat
+            or mix), or None for the endpoint's default fields
+        allowed: Field names the endpoint can return
+        default: Fields returned when nothing is requested
+    
+    Returns:
+        Requested field names in request order, productId first
+    
+    Raises:
+        InvalidFieldsError: If a name is not in the allow-list
+    """
+    if fields is None:
+        return tuple(default)
+    if isinstance(fields, str):
+        fields = [fields]
+    
+    names = [name.strip() for value in fields for name in value.split(",") if name.strip()]
+    if not names:
+        return tuple(default)
+    
+    allowed = set(allowed)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise InvalidFieldsError(
+            f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}"
+        )
+    return tuple(dict.fromkeys((*REQUIRED_FIELDS, *names)))
+
+
+def select_list(fields: Sequence[str], always: Sequence[str] = ()) -> str:
+    """
+    SQL SELECT list for the requested product columns.
+    
+    Args:
+        fields: Validated field names; names that are not table columns
+            (computed ones such as similarity_score) are skipped
+        always: Columns the query needs regardless (sort and cursor keys)
+    
+    Example:
+        ```python
+        columns = select_list(fields, always=("reviews",))
+        query = f"SELECT {columns} FROM bedrock_integration.product_catalog ..."
+        ```
+    """
+    names = dict.fromkeys((*fields, *always))
+    return ",\n".join(PRODUCT_COLUMNS[name] for name in names if name in PRODUCT_COLUMNS)
+
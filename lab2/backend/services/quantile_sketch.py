@@ -0,0 +1,415 @@
+"""
+Mergeable quantile sketches for price statistics
+
+A compact t-digest (merging variant, k1 scale function) summarises each
+category's in-stock prices in at most a few hundred centroids. Digests
+answer p50/p90/p99 without sorting, absorb new values incrementally and
+merge across categories for catalog-wide percentiles.
+
+PriceSketchIndex keeps one digest per category in step with the catalog
+through the change feed. t-digests cannot forget values, so the index also
+keeps each product's (category, price) and rebuilds only the categories a
+change moved prices out of; pure additions are folded in incrementally.
+"""
+
+import asyncio
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPRESSION = 100.0
+REPORTED_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class TDigest:
+    """
+    Merging t-digest over float values.
+    
+    Centroids are formed so each spans at most one unit of the k1 scale
+    function, which keeps them small near the tails (accurate p99) and
+    larger around the median.
+    
+    Example:
+        ```python
+        digest = TDigest()
+        digest.update(prices)
+        p50, p99 = digest.quantile(0.5), digest.quantile(0.99)
+        ```
+    """
+    
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        """
+        Args:
+            compression: Scale parameter (delta); roughly the number of
+                centroids kept, trading size for accuracy
+        """
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+        self.sum = 0.0
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+    
+    def __len__(self) -> int:
+        return int(self.total) + self._buffered
+    
+    def update(self, values: Iterable[float]) -> "TDigest":
+        """Add values; they are compressed in batches."""
+        if not isinstance(values, np.ndarray):
+            values = np.fromiter(values, dtype=np.float64)
+        values = values.astype(np.float64, copy=False).ravel()
+        if values.size:
+            self._buffer.append(values)
+            self._buffered += values.size
+            if self._buffered >= 5 * self.compression:
+                self._compress()
+        return self
+    
+    @classmethod
+    def merge(cls, digests: Iterable["TDigest"], compression: Optional[float] = None) -> "TDigest":
+        """
+        Merge digests into a new one (inputs are left untouched).
+        
+        Args:
+            digests: Digests to combine
+            compression: Compression of the result (defaults to the first input's)
+        """
+        digests = [d for d in digests if len(d)]
+        merged = cls(compression or (digests[0].compression if digests else DEFAULT_COMPRESSION))
+        if not digests:
+            return merged
+        
+        for digest in digests:
+            digest._compress()
+        merged._compress(
+            np.concatenate([d.means for d in digests]),
+            np.concatenate([d.weights for d in digests]),
+        )
+        merged.min = min(d.min for d in digests)
+        merged.max = max(d.max for d in digests)
+        merged.sum = sum(d.sum for d in digests)
+        return merged
+    
+    def _compress(self, means: Optional[np.ndarray] = None, weights: Optional[np.ndarray] = None) -> None:
+        """Fold buffered values (or given centroids) into the centroid set."""
+        if means is None:
+            if not self._buffer:
+                return
+            buffered = np.concatenate(self._buffer)
+            self._buffer, self._buffered = [], 0
+            self.min = min(self.min, float(buffered.min()))
+            self.max = max(self.max, float(buffered.max()))
+            self.sum += float(buffered.sum())
+            means = np.concatenate([self.means, buffered])
+            weights = np.concatenate([self.weights, np.ones(buffered.size)])
+        
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        
+        # Bucket each point by the k1 scale value at its left edge: every
+        # centroid then covers at most one unit of k
+        q_left = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q_left - 1)
+        bucket = np.floor(k - k[0]).astype(np.int64)
+        
+        starts = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+        new_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / new_weights
+        self.weights = new_weights
+        self.total = float(total)
+    
+    def _centroid_positions(self) -> np.ndarray:
+        """Rank of each centroid's center."""
+        return np.cumsum(self.weights) - self.weights / 2
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the value at quantile ``q`` (0..1).
+        
+        Returns:
+            Estimated value, or None for an empty digest
+        """
+        self._compress()
+        if self.total == 0:
+            return None
+        if self.means.size == self.total:
+            # Every centroid is a single value: interpolate exactly as
+            # PERCENTILE_CONT does, so small categories match exact mode
+            return float(np.interp(q * (self.total - 1), np.arange(self.means.size), self.means))
+        
+        rank = q * self.total
+        positions = self._centroid_positions()
+        # Interpolate between centroid centers, anchored at the exact extremes
+        xs = np.concatenate([[0.0], positions, [self.total]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(rank, xs, ys))
+    
+    def rank_error(self, q: float) -> float:
+        """
+        Rank error bound (as a fraction of the count) at quantile ``q``.
+        
+        The estimate interpolates within the centroid that holds rank q*n,
+        so its rank is off by at most half that centroid's weight. Exact for
+        singleton centroids; an estimate once digests with overlapping
+        centroids have been merged.
+        """
+        self._compress()
+        if self.total == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.weights), q * self.total))
+        index = min(index, self.weights.size - 1)
+        return float(self.weights[index] / 2 / self.total)
+    
+    @property
+    def mean(self) -> Optional[float]:
+        self._compress()
+        return self.sum / self.total if self.total else None
+    
+    @property
+    def centroid_count(self) -> int:
+        self._compress()
+        return int(self.means.size)
+
+
+class PriceSketchIndex:
+    """
+    Per-category t-digests of in-stock prices, kept current by the change feed.
+    """
+    
+    LOAD_QUERY = """
+        SELECT "productId", category_name, price::float8 AS price
+        FROM bedrock_integration.product_catalog
+        WHERE quantity > 0
+          AND price IS NOT NULL
+          AND category_name IS NOT NULL
+    """
+    
+    REFRESH_QUERY = """
+        SELECT "productId", category_name, price::float8 AS price, quantity
+        FROM bedrock_integration.product_catalog
+        WHERE "productId" = ANY(%s)
+    """
+    
+    # Columns whose change can move a product between digests
+    TRACKED_COLUMNS = frozenset({"price", "quantity", "category_name"})
+    
+    def __init__(self, db_service, compression: float = DEFAULT_COMPRESSION):
+        self.db = db_service
+        self.compression = compression
+        self._by_category: Dict[str, Dict[str, float]] = {}
+        self._category_of: Dict[str, str] = {}
+        self._digests: Dict[str, TDigest] = {}
+        self._overall: Optional[TDigest] = None
+        self._pending_ids: set = set()
+        self._reload_pending = False
+        self._drain_task: Optional[asyncio.Task] = None
+        self._loaded = False
+        self._updated_at: Optional[datetime] = None
+        self._incremental_updates = 0
+        self._rebuilt_categories = 0
+    
+    async def load(self) -> None:
+        """Build every category digest from the catalog."""
+        rows = await self.db.fetch_all(self.LOAD_QUERY)
+        
+        by_category: Dict[str, Dict[str, float]] = {}
+        for row in rows:
+            by_category.setdefault(row["category_name"], {})[row["productId"]] = row["price"]
+        
+        self._by_category = by_category
+        self._category_of = {pid: cat for cat, members in by_category.items() for pid in members}
+        self._digests = {cat: self._build(members.values()) for cat, members in by_category.items()}
+        self._overall = None
+        self._loaded = True
+        self._updated_at = datetime.now(timezone.utc)
+        logger.info(f"✅ Price sketches built: {len(rows):,} prices, {len(self._digests)} categories")
+    
+    def _build(self, prices: Iterable[float]) -> TDigest:
+        digest = TDigest(self.compression).update(prices)
+        digest._compress()
+        return digest
+    
+    def on_change(self, change) -> None:
+        """Change-feed listener: queue a targeted refresh (coalesced)."""
+        if not self._loaded or not change.touches(self.TRACKED_COLUMNS):
+            return
+        if change.is_full_invalidation:
+            self._reload_pending = True
+        else:
+            self._pending_ids.update(change.ids)
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain())
+    
+    async def _drain(self) -> None:
+        """
+        Apply queued work until none is left, one refresh at a time.
+        
+        A single drain keeps reads and digest updates in order, so an older
+        read can never overwrite a newer one; changes that arrive during a
+        refresh are picked up by the next round.
+        """
+        while self._reload_pending or self._pending_ids:
+            if self._reload_pending:
+                # A full load re-reads every product too
+                self._reload_pending = False
+                self._pending_ids.clear()
+                try:
+                    await self.load()
+                except Exception as e:
+                    logger.warning(f"⚠️ Price sketch reload failed, keeping previous sketches: {e}")
+            else:
+                product_ids, self._pending_ids = self._pending_ids, set()
+                try:
+                    await self.apply(product_ids)
+                except Exception as e:
+                    logger.warning(f"⚠️ Price sketch update failed, reloading: {e}")
+                    self._reload_pending = True
+    
+    async def apply(self, product_ids: Iterable[str]) -> None:
+        """
+        Re-read the given products and update the affected digests.
+        
+        Newly in-stock products are added to their digest incrementally;
+        categories that lost a price are rebuilt from their members.
+        """
+        product_ids = list(product_ids)
+        rows = {row["productId"]: row for row in await self.db.fetch_all(self.REFRESH_QUERY, product_ids)}
+        
+        additions: Dict[str, List[float]] = {}
+        dirty: set = set()
+        for pid in product_ids:
+            row = rows.get(pid)
+            in_stock = bool(row and (row["quantity"] or 0) > 0
+                            and row["price"] is not None and row["category_name"] is not None)
+            old_category = self._category_of.pop(pid, None)
+            old_price = self._by_category[old_category].pop(pid, None) if old_category else None
+            
+            if in_stock:
+                category, price = row["category_name"], row["price"]
+                self._by_category.setdefault(category, {})[pid] = price
+                self._category_of[pid] = category
+                if old_category is None:
+                    additions.setdefault(category, []).append(price)
+                elif (old_category, old_price) != (category, price):
+                    dirty.update((old_category, category))
+            elif old_category is not None:
+                dirty.add(old_category)
+        
+        for category, prices in additions.items():
+            if category in dirty:
+                continue
+            self._digests.setdefault(category, TDigest(self.compression)).update(prices)
+            self._incremental_updates += len(prices)
+        
+        for category in dirty:
+            members = self._by_category.get(category)
+            if members:
+                self._digests[category] = self._build(members.values())
+            else:
+                self._by_category.pop(category, None)
+                self._digests.pop(category, None)
+            self._rebuilt_categories += 1
+        
+        self._overall = None
+        self._updated_at = datetime.now(timezone.utc)
+    
+    def _summary(self, digest: TDigest) -> Dict[str, Any]:
+        p50, p90, p99 = (digest.quantile(q) for q in REPORTED_QUANTILES)
+        return {
+            "product_count": len(digest),
+            "min_price": digest.min if len(digest) else None,
+            "max_price": digest.max if len(digest) else None,
+            "avg_price": digest.mean,
+            "median_price": p50,
+            "p90_price": p90,
+            "p99_price": p99,
+            "rank_error": {
+                f"p{int(q * 100)}": round(digest.rank_error(q), 5) for q in REPORTED_QUANTILES
+            },
+        }
+    
+    def statistics(self, category: Optional[str] = None, top: int = 10) -> Tuple[List[Dict], Dict]:
+        """
+        Approximate price statistics per category and overall.
+        
+        Args:
+            category: Case-insensitive substring filter on category name;
+                when omitted the ``top`` categories by product count are returned
+            top: Number of categories to return without a filter
+        
+        Returns:
+            Tuple of (per-category stats, overall stats)
+        """
+        if category:
+            needle = category.lower()
+            names = [name for name in self._digests if needle in name.lower()]
+        else:
+            names = sorted(self._digests, key=lambda name: len(self._digests[name]), reverse=True)[:top]
+        
+        by_category = [
+            {"category_name": name, **self._summary(self._digests[name])} for name in names
+        ]
+        
+        if self._overall is None:
+            self._overall = TDigest.merge(self._digests.values(), self.compression)
+        overall = self._summary(self._overall)
+        overall["total_products"] = overall.pop("product_count")
+        
+        return by_category, overall
+    
+    @property
+    def freshness(self) -> Dict[str, Any]:
+        """Freshness block for API responses served from the sketches."""
+        return {
+            "source": "sketch",
+            "as_of": self._updated_at.isoformat() if self._updated_at else None,
+            "compression": self.compression,
+            "pending_updates": len(self._pending_ids) + int(self._reload_pending),
+        }
+    
+    def stats(self) -> dict:
+        """Sketch status for health reporting."""
+        return {
+            "categories": len(self._digests),
+            "prices": len(self._category_of),
+            "compression": self.compression,
+            "incremental_updates": self._incremental_updates,
+            "rebuilt_categories": self._rebuilt_categories,
+        }
+
+
+# Global sketch index, built on first approximate request
+_price_sketches: Optional[PriceSketchIndex] = None
+_price_sketches_lock: Optional[asyncio.Lock] = None
+
+
+async def get_price_sketches(db_service) -> PriceSketchIndex:
+    """
+    Return the process-wide PriceSketchIndex, building it on first use.
+    
+    The index subscribes to the catalog change feed so later calls see
+    restocks and price changes without a rebuild.
+    """
+    global _price_sketches, _price_sketches_lock
+    if _price_sketches is not None:
+        return _price_sketches
+    
+    if _price_sketches_lock is None:
+        _price_sketches_lock = asyncio.Lock()
+    async with _price_sketches_lock:
+        if _price_sketches is None:
+            index = PriceSketchIndex(db_service)
+            await index.load()
+            db_service.add_change_listener(index.on_change)
+            _price_sketches = index
+    
+    return _price_sketches
@@ -0,0 +1,353 @@
+"""
+Query understanding for Blaize Bazaar search
+
+Shoppers write constraints into the query ("wireless headphones under $100
+with 4+ stars"). Embedded whole, the constraint is blurred into the vector
+and results ignore it. This parser pulls price ranges, rating floors,
+stock intent and explicit category phrases out of the query with
+precompiled regular expressions, so they can be applied as SQL filters and
+only the residual text ("wireless headphones") is embedded.
+
+Parsing is deterministic and local (no Bedrock or database calls); pattern
+groups only run when the query contains one of their keywords, so most
+queries return after a few substring checks.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.category_centroids import NEAREST_CATEGORIES_CLAUSE
+
+# "around $150" becomes a range of +/- this fraction
+AROUND_TOLERANCE = 0.2
+# Rating floor for "highly rated", "top-rated", ...
+TOP_RATED_STARS = 4.0
+# hnsw.ef_search for filtered searches: post-filtering discards candidates
+FILTERED_EF_SEARCH = 400
+
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)"
+_PRICE = r"\$\s*" + _NUMBER
+_PRICE_LEAD = r"(?:(?:priced|costing|that\s+costs?|for)\s+)?"
+_STARS = r"([1-5](?:\.\d)?)"
+_AND_UP = r"(?:\s*\+|\s+(?:or|and)\s+(?:more|up|above|higher|better))"
+
+# Substrings that gate each pattern group (checked on the lowercased query,
+# which is much cheaper than running the patterns)
+_PRICE_WORDS = ("$", "dollar", "buck", "usd")
+_STARS_WORDS = ("star", "★", "rated")
+_STOCK_WORDS = ("stock", "available", "ship", "sold")
+_CATEGORY_WORDS = ("categor", "department", "section")
+
+_CURRENCY_WORD = re.compile(_NUMBER + r"\s*(?:dollars|bucks|usd)\b", re.IGNORECASE)
+
+_PRICE_RANGE = [
+    re.compile(_PRICE_LEAD + r"\b(?:between|from)\s+" + _PRICE + r"\s*(?:and|to|-|–)\s*\$?\s*" + _NUMBER, re.IGNORECASE),
+    re.compile(_PRICE_LEAD + _PRICE + r"\s*(?:-|–|to)\s*\$?\s*" + _NUMBER, re.IGNORECASE),
+]
+_PRICE_MAX = [
+    re.compile(
+        r"\b(?:(?:do\s+not|don'?t|not)\s+(?:want\s+to\s+)?(?:spend|pay)\s+(?:more\s+than|over)|"
+        r"no\s+more\s+than|not\s+more\s+than)\s*" + _PRICE,
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\b(?:with\s+a\s+|on\s+a\s+)?budget(?:\s+(?:of|is|around|about|under|up\s+to))?\s*:?\s*" + _PRICE,
+        re.IGNORECASE,
+    ),
+    re.compile(
+        _PRICE_LEAD + r"\b(?:under|below|less\s+than|cheaper\s+than|up\s+to|at\s+most|within|max(?:imum)?(?:\s+of)?)\s*" + _PRICE,
+        re.IGNORECASE,
+    ),
+    re.compile(_PRICE_LEAD + _PRICE + r"\s*(?:or\s+(?:less|under|below|cheaper)|and\s+(?:under|below)|max)\b", re.IGNORECASE),
+]
+_PRICE_AROUND = re.compile(
+    _PRICE_LEAD + r"(?:\b(?:around|about|approximately|roughly)\s*|~\s*)" + _PRICE, re.IGNORECASE
+)
+_PRICE_MIN = [
+    re.compile(
+        _PRICE_LEAD + r"\b(?:over|above|more\s+than|at\s+least|starting\s+at|min(?:imum)?(?:\s+of)?)\s*" + _PRICE,
+        re.IGNORECASE,
+    ),
+    re.compile(_PRICE_LEAD + _PRICE + r"(?:\s*\+|\s+(?:or\s+more|and\s+(?:up|above)))", re.IGNORECASE),
+]
+_STAR_WORD = r"\s*-?\s*(?:stars?|★)"
+_RATING_WORD = r"\s+(?:rated|ratings?|reviews?)"
+_STARS_FLOOR_LEAD = r"(?:at\s+least|minimum(?:\s+of)?|over|above)\s+"
+# "N stars" is a rating floor only with a rating cue around it, so
+# "shoes for 5 star hotel" keeps its words
+_STARS_MIN = [
+    re.compile(
+        r"\b(?:(?:with|rated|having)\s+(?:" + _STARS_FLOOR_LEAD + r")?|" + _STARS_FLOOR_LEAD + r")"
+        + _STARS + r"(?:\s*\+)?" + _STAR_WORD + "(?:" + _RATING_WORD + ")?" + _AND_UP + "?",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\b" + _STARS
+        + r"(?:\s*\+" + _STAR_WORD + "(?:" + _RATING_WORD + ")?" + _AND_UP + "?"
+        + "|" + _STAR_WORD + "(?:" + _RATING_WORD + _AND_UP + "?|" + _AND_UP + "))",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\brated\s+(?:at\s+least\s+|over\s+|above\s+)?" + _STARS + _AND_UP + r"?(?![\d.%])", re.IGNORECASE
+    ),
+]
+_TOP_RATED = re.compile(r"\b(?:highly|top|well|high)[- ]rated\b", re.IGNORECASE)
+_IN_STOCK = re.compile(
+    r"\b(?:in[- ]stock|available\s+now|ready\s+to\s+ship|(?:currently\s+)?available\s+to\s+(?:buy|order|ship))\b",
+    re.IGNORECASE,
+)
+_OUT_OF_STOCK = re.compile(r"\b(?:out[- ]of[- ]stock|sold[- ]out)\b", re.IGNORECASE)
+_CATEGORY = [
+    re.compile(r"\b(?:category|department)\s*[:=]\s*(?P<name>[\w&' -]+?)\s*(?=[,.;!?]|$)", re.IGNORECASE),
+    re.compile(
+        r"\bin\s+(?:the\s+)?(?P<name>[\w&'-]+(?:\s+[\w&'-]+){0,3}?)\s+(?:category|department|section)\b",
+        re.IGNORECASE,
+    ),
+    re.compile(r"\bfor\s+(?:the\s+)?(?P<name>[\w&'-]+(?:\s+[\w&'-]+)?)\s+(?:category|department)\b", re.IGNORECASE),
+]
+_CATEGORY_STOPWORDS = {"for", "the", "in", "of", "all", "a", "an", "my", "our", "me", "show", "status"}
+
+# Connectors left dangling at the end of the residual once phrases are cut
+_DANGLING = re.compile(
+    r"(?:[\s,;:-]+(?:with|and|or|but|for|that|which|who|are|is|priced|costing|at|rated|of|in|the|a|an|,))+[\s,;:-]*$",
+    re.IGNORECASE,
+)
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+([,.;:!?])")
+_REPEATED_PUNCT = re.compile(r"([,;:])(?:\s*[,;:])+")
+
+
+def _amount(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """
+    Structured search constraints, applied as SQL predicates.
+    
+    Example:
+        ```python
+        filters = SearchFilters(max_price=100.0, min_stars=4.0)
+        query = f"... WHERE 1 - (embedding <=> %(embedding)s::vector) >= %(min_similarity)s{filters.sql()}"
+        params = {"embedding": embedding, "min_similarity": 0.0, **filters.params()}
+        ```
+    """
+    
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_stars: Optional[float] = None
+    in_stock: Optional[bool] = None
+    categories: Tuple[str, ...] = ()
+    # Restrict to the N categories nearest the query embedding
+    nearest_categories: Optional[int] = None
+    
+    def __bool__(self) -> bool:
+        return any(value not in (None, ()) for value in self.as_dict().values())
+    
+    def merged(self, other: "SearchFilters") -> "SearchFilters":
+        """These filters, with unset fields taken from ``other``."""
+        return SearchFilters(
+            min_price=self.min_price if self.min_price is not None else other.min_price,
+            max_price=self.max_price if self.max_price is not None else other.max_price,
+            min_stars=self.min_stars if self.min_stars is not None else other.min_stars,
+            in_stock=self.in_stock if self.in_stock is not None else other.in_stock,
+            categories=self.categories or other.categories,
+            nearest_categories=self.nearest_categories or other.nearest_categories,
+        )
+    
+    def sql(self) -> str:
+        """``AND ...`` predicates with named placeholders (empty if unfiltered)."""
+        clauses = []
+        if self.min_price is not None:
+            clauses.append("price >= %(filter_min_price)s")
+        if self.max_price is not None:
+            clauses.append("price <= %(filter_max_price)s")
+        if self.min_stars is not None:
+            clauses.append("stars >= %(filter_min_stars)s")
+        if self.in_stock is True:
+            clauses.append("quantity > 0")
+        elif self.in_stock is False:
+            clauses.append("quantity = 0")
+        if self.categories:
+            clauses.append("category_name = ANY(%(filter_categories)s)")
+        if self.nearest_categories:
+            # References the search statement's %(embedding)s
+            clauses.append(NEAREST_CATEGORIES_CLAUSE)
+        return "".join(f"\n              AND {clause}" for clause in clauses)
+    
+    def params(self) -> Dict[str, Any]:
+        """Parameters for the placeholders in sql()."""
+        return {
+            "filter_min_price": self.min_price,
+            "filter_max_price": self.max_price,
+            "filter_min_stars": self.min_stars,
+            "filter_categories": list(self.categories),
+            "filter_nearest_categories": self.nearest_categories,
+        }
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "min_stars": self.min_stars,
+            "in_stock": self.in_stock,
+            "categories": list(self.categories) if self.categories else None,
+            "nearest_categories": self.nearest_categories,
+        }
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """
+    A query split into residual text and extracted constraints.
+    
+    ``category_hint`` is the raw category phrase; resolve it to catalog
+    categories (CategoryDictionary.resolve) before filtering on it.
+    """
+    
+    query: str
+    text: str
+    filters: SearchFilters = SearchFilters()
+    category_hint: Optional[str] = None
+    phrases: Tuple[str, ...] = field(default=(), compare=False)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "filters": {name: value for name, value in self.filters.as_dict().items() if value is not None},
+            "category_hint": self.category_hint,
+            "phrases": list(self.phrases),
+        }
+
+
+class _Cutter:
+    """Tracks which spans of the query have been claimed by a pattern."""
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.spans: List[Tuple[int, int]] = []
+    
+    def find(self, pattern: "re.Pattern") -> Optional["re.Match"]:
+        """First match of ``pattern`` that does not overlap a claimed span."""
+        for match in pattern.finditer(self.text):
+            start, end = match.span()
+            if start != end and all(end <= s or start >= e for s, e in self.spans):
+                self.spans.append((start, end))
+                return match
+        return None
+    
+    def phrases(self) -> Tuple[str, ...]:
+        return tuple(self.text[s:e].strip() for s, e in sorted(self.spans))
+    
+    def residual(self) -> str:
+        parts, last = [], 0
+        for start, end in sorted(self.spans):
+            parts.append(self.text[last:start])
+            last = end
+        parts.append(self.text[last:])
+        text = " ".join(" ".join(parts).split())
+        text = _REPEATED_PUNCT.sub(r"\1", _SPACE_BEFORE_PUNCT.sub(r"\1", text))
+        text = _DANGLING.sub("", text.rstrip(" ,;:.!?"))
+        return text.strip(" ,;:-")
+
+
+def _parse_price(cutter: _Cutter) -> Tuple[Optional[float], Optional[float]]:
+    """(min_price, max_price): a range, else a ceiling and/or a floor."""
+    for pattern in _PRICE_RANGE:
+        match = cutter.find(pattern)
+        if match:
+            low, high = sorted((_amount(match.group(1)), _amount(match.group(2))))
+            return low, high
+    
+    min_price = max_price = None
+    for pattern in _PRICE_MAX:
+        match = cutter.find(pattern)
+        if match:
+            max_price = _amount(match.group(1))
+            break
+    if max_price is None:
+        match = cutter.find(_PRICE_AROUND)
+        if match:
+            amount = _amount(match.group(1))
+            return round(amount * (1 - AROUND_TOLERANCE), 2), round(amount * (1 + AROUND_TOLERANCE), 2)
+    for pattern in _PRICE_MIN:
+        match = cutter.find(pattern)
+        if match:
+            min_price = _amount(match.group(1))
+            break
+    return min_price, max_price
+
+
+def _parse_stars(cutter: _Cutter) -> Optional[float]:
+    for pattern in _STARS_MIN:
+        match = cutter.find(pattern)
+        if match:
+            return float(match.group(1))
+    return TOP_RATED_STARS if cutter.find(_TOP_RATED) else None
+
+
+def _parse_stock(cutter: _Cutter) -> Optional[bool]:
+    if cutter.find(_OUT_OF_STOCK):
+        return False
+    if cutter.find(_IN_STOCK):
+        return True
+    return None
+
+
+def _parse_category(cutter: _Cutter) -> Optional[str]:
+    for pattern in _CATEGORY:
+        match = cutter.find(pattern)
+        if match:
+            words = match.group("name").split()
+            while words and words[0].lower() in _CATEGORY_STOPWORDS:
+                words.pop(0)
+            return " ".join(words) or None
+    return None
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """
+    Extract price, rating, stock and category constraints from a query.
+    
+    Prices need a currency marker ("$100", "100 dollars"), so "at least 20
+    hours" or "WH-1000XM5" are left alone. Ratings are floors: "4+ stars",
+    "5-star rated" and "rated 4.5 or higher" all mean stars >= N; a bare
+    "5 star hotel" has no rating cue and is left alone.
+    
+    Args:
+        query: Search query as typed
+    
+    Returns:
+        ParsedQuery; ``text`` is the query itself when nothing was extracted
+    
+    Example:
+        ```python
+        parse_query("wireless headphones under $100 with 4+ stars")
+        # text="wireless headphones", filters=SearchFilters(max_price=100.0, min_stars=4.0)
+        ```
+    """
+    lowered = query.lower()
+    has_price = any(word in lowered for word in _PRICE_WORDS)
+    has_stars = any(word in lowered for word in _STARS_WORDS)
+    has_stock = any(word in lowered for word in _STOCK_WORDS)
+    has_category = any(word in lowered for word in _CATEGORY_WORDS)
+    if not (has_price or has_stars or has_stock or has_category):
+        return ParsedQuery(query, query)
+    
+    cutter = _Cutter(_CURRENCY_WORD.sub(r"$\1", query) if has_price else query)
+    min_price, max_price = _parse_price(cutter) if has_price else (None, None)
+    min_stars = _parse_stars(cutter) if has_stars else None
+    in_stock = _parse_stock(cutter) if has_stock else None
+    category_hint = _parse_category(cutter) if has_category else None
+    
+    if not cutter.spans:
+        return ParsedQuery(query, query)
+    
+    return ParsedQuery(
+        query=query,
+        text=cutter.residual(),
+        filters=SearchFilters(min_price=min_price, max_price=max_price, min_stars=min_stars, in_stock=in_stock),
+        category_hint=category_hint,
+        phrases=cutter.phrases(),
+    )
@@ -0,0 +1,213 @@
+"""
+"Did you mean" spelling correction for Blaize Bazaar
+
+Misspelled queries ("wirless hedphones") embed poorly and return weak
+matches. Before embedding, query tokens are checked against
+catalog_vocabulary (every distinct catalog word) with pg_trgm's %
+operator, served by a trigram GIN index; unknown tokens are replaced by the
+most similar catalog term, with frequency only breaking ties. Rare brand
+and model names are terms themselves and stay as typed. Corrections are
+cached per token, so each distinct token costs one lookup per process.
+
+The vocabulary is rebuilt shortly after writes to titles or categories
+(reported by the change feed), and the token cache is cleared with it.
+"""
+
+import asyncio
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg.errors import UndefinedTable
+
+logger = logging.getLogger(__name__)
+
+# Stricter than pg_trgm's 0.3 default: fewer candidates and fewer bad fixes
+SIMILARITY_THRESHOLD = 0.45
+MIN_TOKEN_LENGTH = 4
+CACHE_SIZE = 20000
+
+# Rebuilding scans every description; coalesce bursts of writes
+VOCABULARY_REFRESH_DELAY_SECONDS = 30.0
+
+# Catalog columns the vocabulary is built from
+VOCABULARY_COLUMNS = frozenset({"product_description", "category_name"})
+
+REFRESH_QUERY = "SELECT bedrock_integration.refresh_catalog_vocabulary() AS terms"
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+# One row per token: the token itself when it is a catalog term, otherwise
+# the most similar (then most frequent) term above the threshold, or NULL.
+# %% is a literal % (pg_trgm's similarity operator) in psycopg queries.
+CORRECTION_QUERY = """
+    SELECT t.token, v.term, v.score
+    FROM unnest(%s::text[]) AS t(token)
+    LEFT JOIN LATERAL (
+        SELECT term, similarity(term, t.token) AS score
+        FROM bedrock_integration.catalog_vocabulary
+        WHERE term %% t.token
+        ORDER BY term = t.token DESC, similarity(term, t.token) DESC, frequency DESC
+        LIMIT 1
+    ) v ON true
+"""
+
+
+def match_case(original: str, replacement: str) -> str:
+    """Give a (lowercase) replacement the case pattern of the token it replaces."""
+    if len(original) > 1 and original.isupper():
+        return replacement.upper()
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+class SpellCorrector:
+    """
+    Token-level query correction against the catalog vocabulary.
+    
+    Example:
+        ```python
+        corrector = get_spell_corrector(db)
+        corrected, corrections = await corrector.correct("wirless hedphones")
+        # "wireless headphones", [{"from": "wirless", "to": "wireless", ...}, ...]
+        ```
+    """
+    
+    # False once the vocabulary table is known to be missing
+    _available: Optional[bool] = None
+    
+    def __init__(self, db_service, cache_size: int = CACHE_SIZE):
+        self.db = db_service
+        self.cache_size = cache_size
+        # token -> (replacement or None, similarity)
+        self._cache: "OrderedDict[str, Tuple[Optional[str], Optional[float]]]" = OrderedDict()
+        self._hits = 0
+        self._lookups = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_pending = False
+        self._refreshes = 0
+    
+    async def correct(self, query: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Correct misspelled tokens in a query.
+        
+        Tokens shorter than MIN_TOKEN_LENGTH, numbers and known catalog terms
+        are left alone; the rest of the query (spacing, punctuation) is kept.
+        
+        Args:
+            query: Raw search query
+        
+        Returns:
+            Tuple of (corrected query, list of {"from", "to", "similarity"})
+        """
+        if SpellCorrector._available is False:
+            return query, []
+        
+        tokens = {
+            match.group().lower() for match in _TOKEN.finditer(query)
+            if len(match.group()) >= MIN_TOKEN_LENGTH and not match.group().isdigit()
+        }
+        missing = [token for token in tokens if token not in self._cache]
+        self._hits += len(tokens) - len(missing)
+        await self._resolve(missing)
+        
+        corrections: List[Dict[str, Any]] = []
+        
+        def replace(match: "re.Match") -> str:
+            token = match.group().lower()
+            replacement, score = self._cached(token)
+            if replacement is None or replacement == token:
+                return match.group()
+            replacement = match_case(match.group(), replacement)
+            corrections.append({"from": match.group(), "to": replacement, "similarity": round(score, 3)})
+            return replacement
+        
+        corrected = _TOKEN.sub(replace, query)
+        return corrected, corrections
+    
+    def _cached(self, token: str) -> Tuple[Optional[str], Optional[float]]:
+        entry = self._cache.get(token)
+        if entry is None:
+            return None, None
+        self._cache.move_to_end(token)
+        return entry
+    
+    async def _resolve(self, tokens: List[str]) -> None:
+        """Look up uncached tokens in one statement and cache the outcome."""
+        if not tokens:
+            return
+        
+        self._lookups += len(tokens)
+        try:
+            _, rows = await self.db.pipeline([
+                ("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", (str(SIMILARITY_THRESHOLD),)),
+                (CORRECTION_QUERY, (tokens,)),
+            ])
+            SpellCorrector._available = True
+        except UndefinedTable:
+            logger.warning("⚠️ catalog_vocabulary not found; spelling correction disabled")
+            SpellCorrector._available = False
+            return
+        
+        for row in rows:
+            self._cache[row["token"]] = (row["term"], row["score"])
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def on_change(self, change) -> None:
+        """Change-feed listener: rebuild the vocabulary after title or category writes."""
+        if SpellCorrector._available is False or not change.touches(VOCABULARY_COLUMNS):
+            return
+        self._refresh_pending = True
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_later())
+    
+    async def _refresh_later(self) -> None:
+        # Writes during a refresh queue one more round
+        while self._refresh_pending:
+            await asyncio.sleep(VOCABULARY_REFRESH_DELAY_SECONDS)
+            self._refresh_pending = False
+            try:
+                await self.refresh_vocabulary()
+            except Exception as e:
+                logger.warning(f"⚠️ Vocabulary refresh failed: {e}")
+    
+    async def refresh_vocabulary(self) -> Optional[int]:
+        """
+        Rebuild catalog_vocabulary and drop cached corrections.
+        
+        Returns:
+            Number of terms, or None when another process was refreshing
+        """
+        # execute_returning commits; the function writes
+        (row,) = await self.db.execute_returning(REFRESH_QUERY)
+        self._cache.clear()
+        self._refreshes += 1
+        if row["terms"] is not None:
+            logger.info(f"✅ Catalog vocabulary refreshed: {row['terms']:,} terms")
+        return row["terms"]
+    
+    def stats(self) -> dict:
+        """Cache status for health reporting."""
+        return {
+            "available": SpellCorrector._available,
+            "cached_tokens": len(self._cache),
+            "cache_hits": self._hits,
+            "lookups": self._lookups,
+            "vocabulary_refreshes": self._refreshes,
+        }
+
+
+# Global corrector (its cache is shared by all requests)
+_spell_corrector: Optional[SpellCorrector] = None
+
+
+def get_spell_corrector(db_service) -> SpellCorrector:
+    """Return the process-wide SpellCorrector, subscribing it to the change feed."""
+    global _spell_corrector
+    if _spell_corrector is None:
+        _spell_corrector = SpellCorrector(db_service)
+        db_service.add_change_listener(_spell_corrector.on_change)
+    return _spell_corrector
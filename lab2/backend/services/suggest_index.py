@@ -0,0 +1,402 @@
+"""
+Typeahead suggestions for Blaize Bazaar
+
+An in-memory prefix index over product titles (the first words of each
+description) and category names, so the search box can suggest as the
+user types without touching Postgres or Bedrock.
+
+Every word position of a normalized title is a key ("sony wireless
+headphones", "wireless headphones", "headphones"), so prefixes match the
+start of any word. Keys are kept in one sorted list; a prefix is a bisect
+range, and the most popular entries in that range are picked with
+argpartition over a parallel NumPy weight array. Single-character
+prefixes, the only ranges large enough to matter, are precomputed.
+
+The index is rebuilt off the event loop when the change feed reports
+changes to titles or categories. Sales and restocks only move popularity
+weights, so those products are re-read by id and their weights patched.
+Changes that arrive while either is running are queued for the next round.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.category_dictionary import normalize
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_SOURCE_QUERY = """
+    SELECT
+        "productId",
+        left(product_description, 200) AS product_description,
+        category_name,
+        reviews,
+        stars,
+        boughtinlastmonth,
+        quantity
+    FROM bedrock_integration.product_catalog
+    WHERE product_description IS NOT NULL
+"""
+
+WEIGHT_QUERY = """
+    SELECT "productId", reviews, stars, boughtinlastmonth, quantity
+    FROM bedrock_integration.product_catalog
+    WHERE "productId" = ANY(%s)
+"""
+
+# Columns the index keys come from: a change rebuilds the index
+SUGGEST_COLUMNS = frozenset({"product_description", "category_name"})
+
+# Columns popularity is computed from: a change patches those products' weights
+WEIGHT_COLUMNS = frozenset({"reviews", "stars", "boughtinlastmonth", "quantity"})
+
+TITLE_WORDS = 8
+# Matches at the start of a title rank above matches on a later word
+LATER_WORD_WEIGHT = 0.8
+REBUILD_DELAY_SECONDS = 2.0
+
+
+def product_title(description: str) -> str:
+    """Short display title: the first TITLE_WORDS words of the description."""
+    words = description.split()
+    title = " ".join(words[:TITLE_WORDS])
+    return title.rstrip(",;:-") + ("…" if len(words) > TITLE_WORDS else "")
+
+
+def popularity(reviews: Optional[int], stars: Optional[float], bought: Optional[int], in_stock: bool) -> float:
+    """Suggestion weight: review volume times rating, recent sales, stock."""
+    score = math.log1p(reviews or 0) * (stars or 0) + math.log1p(bought or 0)
+    return score * (1.0 if in_stock else 0.5)
+
+
+class PrefixIndex:
+    """
+    Sorted word-position keys with a parallel weight array.
+    
+    Example:
+        ```python
+        index = PrefixIndex.build([("Sony wireless headphones", 12.5)])
+        index.search("wir", 5)  # -> [0]
+        ```
+    """
+    
+    def __init__(self, keys: List[str], entries: np.ndarray, weights: np.ndarray, factors: np.ndarray):
+        self.keys = keys
+        self.entries = entries
+        self.weights = weights
+        # Per-key multiplier on the entry weight (1.0 or LATER_WORD_WEIGHT)
+        self.factors = factors
+        self._first_char: Dict[str, List[int]] = {}
+    
+    @classmethod
+    def build(cls, items: Sequence[Tuple[str, float]], precompute: int = 20) -> "PrefixIndex":
+        """
+        Index ``(text, weight)`` items; search returns positions in ``items``.
+        
+        Args:
+            items: Display text and popularity weight per entry
+            precompute: Results kept per single-character prefix
+        """
+        keyed = []
+        for entry, (text, weight) in enumerate(items):
+            words = normalize(text).split()
+            for position in range(len(words)):
+                key = " ".join(words[position:])
+                keyed.append((key, entry, weight, 1.0 if position == 0 else LATER_WORD_WEIGHT))
+        keyed.sort(key=lambda item: item[0])
+        
+        factors = np.fromiter((factor for _, _, _, factor in keyed), dtype=np.float64, count=len(keyed))
+        index = cls(
+            [key for key, _, _, _ in keyed],
+            np.fromiter((entry for _, entry, _, _ in keyed), dtype=np.int64, count=len(keyed)),
+            np.fromiter((weight for _, _, weight, _ in keyed), dtype=np.float64, count=len(keyed)) * factors,
+            factors,
+        )
+        index._precompute(precompute)
+        return index
+    
+    def _precompute(self, limit: int) -> None:
+        self._first_char = {
+            char: self._top(*self._range(char), limit)
+            for char in sorted({key[0] for key in self.keys if key})
+        }
+    
+    def reweighted(self, entry_weights: Dict[int, float], precompute: int = 20) -> "PrefixIndex":
+        """
+        Copy of the index with new weights for some entries (same keys).
+        
+        Args:
+            entry_weights: New popularity weight per entry position
+            precompute: Results kept per single-character prefix
+        """
+        entries = np.fromiter(entry_weights, dtype=np.int64, count=len(entry_weights))
+        new_weights = np.fromiter(entry_weights.values(), dtype=np.float64, count=len(entry_weights))
+        order = np.argsort(entries)
+        entries, new_weights = entries[order], new_weights[order]
+        
+        weights = self.weights.copy()
+        changed = np.isin(self.entries, entries)
+        weights[changed] = new_weights[np.searchsorted(entries, self.entries[changed])] * self.factors[changed]
+        
+        index = PrefixIndex(self.keys, self.entries, weights, self.factors)
+        index._precompute(precompute)
+        return index
+    
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        return lo, hi
+    
+    def _top(self, lo: int, hi: int, limit: int) -> List[int]:
+        """Distinct entries with the highest weight among keys[lo:hi]."""
+        if hi <= lo:
+            return []
+        weights = self.weights[lo:hi]
+        # An entry can match on several words; over-select, then dedupe
+        take = min(hi - lo, limit * 3)
+        best = np.argpartition(-weights, take - 1)[:take] if take < hi - lo else np.arange(hi - lo)
+        best = best[np.argsort(-weights[best], kind="stable")]
+        
+        results: List[int] = []
+        for entry in self.entries[lo + best].tolist():
+            if entry not in results:
+                results.append(entry)
+                if len(results) == limit:
+                    break
+        return results
+    
+    def search(self, prefix: str, limit: int) -> List[int]:
+        """Entries with a word starting with ``prefix`` (normalized), most popular first."""
+        if not prefix:
+            return []
+        if len(prefix) == 1 and prefix in self._first_char and limit <= len(self._first_char[prefix]):
+            return self._first_char[prefix][:limit]
+        return self._top(*self._range(prefix), limit)
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class SuggestIndex:
+    """
+    Product-title and category prefix indexes, kept fresh by the change feed.
+    """
+    
+    def __init__(self, db_service):
+        self.db = db_service
+        self._products: Optional[PrefixIndex] = None
+        self._categories: Optional[PrefixIndex] = None
+        self._product_items: List[Dict[str, Any]] = []
+        self._category_items: List[Dict[str, Any]] = []
+        self._position: Dict[str, int] = {}
+        self._ready = asyncio.Event()
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Work queued by the change feed, drained by one task at a time
+        self._rebuild_pending = False
+        self._pending_ids: set = set()
+        self._build_ms: Optional[float] = None
+        self._builds = 0
+        self._patches = 0
+    
+    async def build(self) -> None:
+        """Load titles and categories and swap in fresh indexes."""
+        start = time.perf_counter()
+        rows = await self.db.fetch_all(SUGGEST_SOURCE_QUERY)
+        products, product_index, categories, category_index = await asyncio.to_thread(self._index_rows, rows)
+        
+        self._product_items, self._products = products, product_index
+        self._category_items, self._categories = categories, category_index
+        self._position = {item["productId"]: i for i, item in enumerate(products)}
+        self._build_ms = round((time.perf_counter() - start) * 1000, 1)
+        self._builds += 1
+        self._ready.set()
+        logger.info(f"✅ Suggest index built: {len(products):,} titles, {len(categories)} categories "
+                    f"({len(product_index):,} keys) in {self._build_ms:.0f}ms")
+    
+    @staticmethod
+    def _index_rows(rows: List[dict]) -> tuple:
+        """CPU-bound part of build(), run in a worker thread."""
+        products: List[Dict[str, Any]] = []
+        category_weight: Dict[str, float] = {}
+        for row in rows:
+            weight = popularity(row["reviews"], row["stars"], row["boughtinlastmonth"], (row["quantity"] or 0) > 0)
+            products.append({
+                "text": product_title(row["product_description"]),
+                "productId": row["productId"],
+                "category": row["category_name"],
+                "weight": weight,
+            })
+            if row["category_name"]:
+                category_weight[row["category_name"]] = category_weight.get(row["category_name"], 0.0) + weight
+        
+        categories = [{"text": name, "weight": weight} for name, weight in category_weight.items()]
+        return (
+            products,
+            PrefixIndex.build([(item["text"], item["weight"]) for item in products]),
+            categories,
+            PrefixIndex.build([(item["text"], item["weight"]) for item in categories]),
+        )
+    
+    async def patch_weights(self, product_ids: Sequence[str]) -> None:
+        """Re-read popularity for some products and swap in reweighted indexes."""
+        rows = await self.db.fetch_all(WEIGHT_QUERY, list(product_ids))
+        products = self._product_items
+        
+        entry_weights: Dict[int, float] = {}
+        for row in rows:
+            entry = self._position.get(row["productId"])
+            if entry is not None:
+                entry_weights[entry] = popularity(
+                    row["reviews"], row["stars"], row["boughtinlastmonth"], (row["quantity"] or 0) > 0
+                )
+        if not entry_weights:
+            return
+        
+        product_index, categories, category_index = await asyncio.to_thread(
+            self._reweight, products, self._products, self._category_items, entry_weights
+        )
+        # A rebuild may have swapped in new items meanwhile; its weights are newer
+        if products is self._product_items:
+            for entry, weight in entry_weights.items():
+                products[entry]["weight"] = weight
+            self._products = product_index
+            self._category_items, self._categories = categories, category_index
+            self._patches += 1
+    
+    @staticmethod
+    def _reweight(
+        products: List[Dict[str, Any]],
+        product_index: PrefixIndex,
+        categories: List[Dict[str, Any]],
+        entry_weights: Dict[int, float],
+    ) -> tuple:
+        """CPU-bound part of patch_weights(), run in a worker thread."""
+        category_weight = {item["text"]: item["weight"] for item in categories}
+        for entry, weight in entry_weights.items():
+            category = products[entry]["category"]
+            if category in category_weight:
+                category_weight[category] += weight - products[entry]["weight"]
+        
+        categories = [{"text": name, "weight": weight} for name, weight in category_weight.items()]
+        return (
+            product_index.reweighted(entry_weights),
+            categories,
+            PrefixIndex.build([(item["text"], item["weight"]) for item in categories]),
+        )
+    
+    def on_change(self, change) -> None:
+        """Change-feed listener: queue a rebuild or a weight patch (coalesced)."""
+        if not self._ready.is_set():
+            return
+        if change.is_full_invalidation or change.touches(SUGGEST_COLUMNS):
+            self._rebuild_pending = True
+        elif change.touches(WEIGHT_COLUMNS):
+            self._pending_ids.update(change.ids)
+        else:
+            return
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._drain_later())
+    
+    async def _drain_later(self) -> None:
+        """Apply queued work until none is left; writes during a round queue the next."""
+        while self._rebuild_pending or self._pending_ids:
+            await asyncio.sleep(REBUILD_DELAY_SECONDS)
+            if self._rebuild_pending:
+                # A rebuild re-reads every weight too
+                self._rebuild_pending = False
+                self._pending_ids.clear()
+                await self._build_logged()
+            else:
+                product_ids, self._pending_ids = self._pending_ids, set()
+                try:
+                    await self.patch_weights(product_ids)
+                except Exception as e:
+                    logger.warning(f"⚠️ Suggest weight patch failed, rebuilding: {e}")
+                    self._rebuild_pending = True
+    
+    async def _build_logged(self) -> None:
+        try:
+            await self.build()
+        except Exception as e:
+            logger.warning(f"⚠️ Suggest index build failed, keeping previous index: {e}")
+    
+    def start(self) -> None:
+        """Build in the background unless a build is already running."""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._build_logged())
+    
+    async def suggest(self, query: str, limit: int = 8, category_limit: int = 3) -> Dict[str, Any]:
+        """
+        Suggestions for a partial query.
+        
+        Args:
+            query: What the user has typed so far
+            limit: Maximum product title suggestions
+            category_limit: Maximum category suggestions
+        
+        Returns:
+            Dict with "categories" and "products" suggestion lists
+        """
+        if not self._ready.is_set():
+            # First calls wait for the initial build; a failed one is retried
+            self.start()
+            await asyncio.shield(self._rebuild_task)
+            if not self._ready.is_set():
+                raise RuntimeError("Suggest index is not available")
+        
+        prefix = normalize(query)
+        categories = [
+            {"text": self._category_items[i]["text"], "type": "category"}
+            for i in self._categories.search(prefix, category_limit)
+        ]
+        products = [
+            {
+                "text": self._product_items[i]["text"],
+                "type": "product",
+                "productId": self._product_items[i]["productId"],
+                "category": self._product_items[i]["category"],
+            }
+            for i in self._products.search(prefix, limit)
+        ]
+        return {"categories": categories, "products": products}
+    
+    def stats(self) -> dict:
+        """Index status for health reporting."""
+        return {
+            "ready": self._ready.is_set(),
+            "titles": len(self._product_items),
+            "categories": len(self._category_items),
+            "keys": len(self._products) if self._products else 0,
+            "builds": self._builds,
+            "weight_patches": self._patches,
+            "last_build_ms": self._build_ms,
+        }
+
+
+# Global suggest index
+_suggest_index: Optional[SuggestIndex] = None
+
+
+def get_suggest_index() -> Optional[SuggestIndex]:
+    """Return the process-wide SuggestIndex, if started."""
+    return _suggest_index
+
+
+def start_suggest_index(db_service) -> SuggestIndex:
+    """
+    Create the process-wide SuggestIndex and build it in the background.
+    
+    Startup does not wait for the build; the first /api/suggest calls do.
+    """
+    global _suggest_index
+    index = SuggestIndex(db_service)
+    _suggest_index = index
+    index.start()
+    db_service.add_change_listener(index.on_change)
+    return index
@@ -66,11 +66,28 @@ class ApiClient {
     return response.data
   }
 
+  async suggest(q: string, limit: number = 8): Promise<{
+    query: string
+    categories: Array<{ text: string; type: 'category' }>
+    products: Array<{ text: string; type: 'product'; productId: string; category: string | null }>
+    took_ms: number
+  }> {
+    const response = await this.client.get('/api/suggest', { params: { q, limit } })
+    return response.data
+  }
+
   async getProduct(productId: string): Promise<Product> {
     const response = await this.client.get<Product>(`/api/products/${productId}`)
     return response.data
   }
 
+  async getProducts(productIds: string[]): Promise<{ products: Product[]; missing: string[] }> {
+    const response = await this.client.get('/api/products:batch', {
+      params: { ids: productIds.join(',') },
+    })
+    return response.data
+  }
+
   async listProducts(params?: {
     limit?: number
     category?: string